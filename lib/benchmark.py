@@ -0,0 +1,52 @@
+import subprocess
+import time
+from typing import Callable
+
+from lsf import _get_jobs_active_bjobs, _get_jobs_active_bstat
+
+
+
+# NOTE: Developer tool, run on the cluster with: python lib/benchmark.py
+
+def benchmark(name: str, function: Callable[[], object], repeats: int = 5) -> None:
+    """Benchmark a job status backend by counting subprocess calls and wall time
+
+    Args:
+        name (str): Name of backend to print
+        function (Callable[[], object]): Backend to call
+        repeats (int, optional): Number of calls to time. Defaults to 5.
+    """
+    # Count subprocess calls by wrapping subprocess.run
+    calls = 0
+    run = subprocess.run
+
+    def run_counted(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return run(*args, **kwargs)
+
+
+    # Time calls to backend
+    subprocess.run = run_counted
+    try:
+        time_start = time.perf_counter()
+        for _ in range(repeats):
+            jobs = function()
+        time_total = time.perf_counter() - time_start
+    # If backend is not installed, mark unavailable
+    except OSError:
+        jobs = None
+        time_total = time.perf_counter() - time_start
+    finally:
+        subprocess.run = run
+
+
+    # Inform of results
+    jobs = "unavailable" if jobs is None else f"{len(jobs)} jobs"
+    print(f"{name:>6}: {calls / repeats:.1f} subprocess calls, {time_total / repeats * 1000:.0f} ms per query ({jobs})")
+
+
+
+if __name__ == "__main__":
+    benchmark("bjobs", _get_jobs_active_bjobs)
+    benchmark("bstat", _get_jobs_active_bstat)
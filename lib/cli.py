@@ -1,36 +1,93 @@
 import os
+import re
+import fnmatch
+import time
 import traceback
-from typing import Union, Optional, Literal
+import itertools
+from datetime import datetime
+from typing import Union, Optional, Literal, Any
 from dataclasses import replace
 from varname import nameof
 
 from tabulate import tabulate
 
 from constants import sprinkle_project_settings_export_file
-from lsf import JobSettings, generate_bsub_script, kill_jobs, load_settings, save_settings, submit_job, get_jobs_active, view_job
+from lsf import JobSettings, JobDetails, JobSubmissionError, generate_bsub_script, kill_jobs, kill_jobs_matching, load_settings, save_settings, submit_job, get_jobs_active, query_jobs_active, view_job
+from lsf_table import JobTable, parse_time_point, parse_duration_seconds, format_duration_seconds, format_memory_bytes
+from job_files import find_job_files, list_job_files, job_file_name, compress_finished_job_files, delete_finished_job_files
+from search import search_files
+from compress import resolve_file
+from follow import follow_files
+from lsf_log import JobAccounting
+from history import query_job_history, update_job_accounting
+from summary import summarize_jobs, cpu_efficiency, mem_efficiency
+from progress import get_jobs_progress
+from recommend import recommend_settings
+from sweep import load_sweep
+from lsf_batch import SubmissionResult, load_manifest, submit_jobs
 from lsf_prompt import prompt_settings, prompt_job_active, prompt_jobs_active
-from conda import ensure_environment_specification_exists, delete_environment, recreate_environment, exists_environment
+from conda import ensure_environment_specification_exists, ensure_environment, delete_environment, recreate_environment, update_environment, environment_fingerprint, is_environment_current, get_environment_backend, pack_environment, shared_environment_name, register_shared_environment, record_shared_environment_jobs, release_shared_environment, collect_shared_environments
 from prompt import prompt_choice
+from watch import watch_jobs
 
 
 # NOTE: Remember to update both doc_short and doc_full
 doc_short = \
 """
 Usage:
-  sprinkle start [--] [<args>...]
-  sprinkle stop [<job_id>... | -a | --all]
-  sprinkle view [((output | log | error) [<job_id>])] [-a | --all]
-  sprinkle status
+  sprinkle start [--right-size] [--force] [--sweep <file>] [--] [<args>...]
+  sprinkle submit-many <manifest> [--workers <n>] [--rate <n>] [--retries <n>]
+  sprinkle stop [<job_id>... | -a | --all] [--name <pattern>] [--status <status>] [--queue <queue>] [--older-than <duration>] [--fresh]
+  sprinkle view [((output | log | error) [<job_id>])] [-a | --all | --lines <n> | --head <n> | --since <time>] [--bytes] [--fresh]
+  sprinkle follow [<job_id>... | -a | --all] [--output] [--log] [--error] [--fresh]
+  sprinkle grep <regex> [<job_id>...] [--active | --failed] [--since <time>] [-i | --ignore-case] [--output] [--log] [--error] [--fresh]
+  sprinkle status [--fresh] [-w | --watch] [--sort <column> [--descending]] [--filter <condition>]...
+  sprinkle history [--name <pattern>] [--queue <queue>] [--since <time>] [--until <time>] [--exit <code> | --failed] [--limit <n>]
+  sprinkle summary [--name <pattern>] [--limit <n>]
+  sprinkle clean [--compress] [--delete] [--keep-last <n>] [--keep-newer <duration>] [--keep-failed] [--dry-run] [--fresh]
   sprinkle settings
-  sprinkle setup [-d | --delete]
-  sprinkle export [<path>] [--] [<args>...]
+  sprinkle setup [-d | --delete | --force]
+  sprinkle export [<path>] [--sweep <file>] [--] [<args>...]
   sprinkle update
   sprinkle [help | -h | -? | --help]
 
 Options:
   -h -? --help       Show full help text.
-  -a --all           For start, kill all jobs; For view, view full file.
-  -d --delete        Delete environment without recreating it.
+  -a --all           For stop, kill all jobs; For view, view full file; For follow, follow all jobs.
+  -d --delete        Delete environment without recreating it, or files of finished jobs.
+  --right-size       Apply resources recommended from previous runs.
+  --force            Rebuild environment even if up to date.
+  --sweep <file>     Submit a job array sweeping arguments in file.
+  --workers <n>      Maximum concurrent submissions.
+  --rate <n>         Maximum submissions per second.
+  --retries <n>      Maximum retries of a submission on transient failures.
+  --output           Follow or search output.
+  --log              Follow or search log.
+  --error            Follow or search errors.
+  --fresh            Bypass cached job details.
+  -w --watch         Keep refreshing job status until interrupted.
+  --sort <column>    Sort jobs by column.
+  --descending       Sort in descending order.
+  --filter <condition>  Only show jobs satisfying condition.
+  --name <pattern>   Only jobs with names matching pattern.
+  --status <status>  Only jobs with status.
+  --queue <queue>    Only jobs submitted to queue.
+  --older-than <duration>  Only jobs submitted longer ago than duration.
+  --since <time>     Only jobs submitted, or lines written, since time.
+  --until <time>     Only jobs submitted until time.
+  --exit <code>      Only jobs that exited with code.
+  --active           Only jobs that are active.
+  --failed           Only jobs that failed.
+  --limit <n>        Maximum number of jobs to show.
+  -i --ignore-case   Ignore case when searching.
+  --compress         Compress files of finished jobs.
+  --keep-last <n>    Keep files of the last n finished jobs.
+  --keep-newer <duration>  Keep files of jobs finished within duration.
+  --keep-failed      Keep files of failed jobs.
+  --dry-run          Report what would be deleted without deleting it.
+  --lines <n>        Show last n lines.
+  --head <n>         Show first n lines.
+  --bytes            Count bytes instead of lines.
 """
 
 # NOTE: Remember to update README.md
@@ -44,30 +101,94 @@ In the below, "spr" may be used as a shorthand for "sprinkle".
 
 
 Usage:
-  sprinkle start [--] [<args>...]
+  sprinkle start [--right-size] [--force] [--sweep <file>] [--] [<args>...]
     Submit the job script and pass <args> to job script.
     If settings have not been setup, prompt to set them up.
-    If environment has not been setup, sets it up.
+    If environment has not been setup, sets it up, warns if its specification changed since, and rebuilds it if forcing.
     If <args> contains dashes, add the two dashes "--" before <args>.
-
-  sprinkle stop [<job_id>... | -a | --all]
+    Suggests resources based on previous runs, and applies them if right-sizing.
+    If sweeping, submit one job array with a job for each set of arguments in <file>.
+    Each line of <file> holds the arguments of one job, appended to <args>.
+    If <file> ends with .json, it may instead map parameters to lists of values,
+    e.g. {"--lr": [0.1, 0.01], "--seed": [1, 2]}, to sweep all combinations.
+    If staging is set in settings, paths are copied to node-local scratch ($SPRINKLE_SCRATCH) before the job
+    runs, and paths in scratch are copied back to the working directory when it exits, also upon failure.
+
+  sprinkle submit-many <manifest> [--workers <n>] [--rate <n>] [--retries <n>]
+    Submit many jobs from <manifest> in parallel, and report the result of each.
+    Each line of <manifest> holds the arguments of one job.
+    If <manifest> ends with .json, it is instead a list of objects with "args" and settings to override,
+    e.g. [{"args": ["--lr", "0.1"], "cpu_cores": 4, "queue": "gpua100"}].
+    Defaults to 4 workers, 5 submissions per second, and 3 retries of transient failures.
+
+  sprinkle stop [<job_id>... | -a | --all] [--name <pattern>] [--status <status>] [--queue <queue>] [--older-than <duration>] [--fresh]
     Stop specific jobs or all jobs.
+    Array jobs can be stopped individually (e.g. 1234[3]) or together (e.g. 1234).
     If nothing specified, prompt to select job to kill.
+    Select jobs by name (wildcards allowed), status (e.g. PEND), queue, or time since submission (e.g. 2h).
+    If selecting without job IDs, stop all selected jobs.
 
-  sprinkle view [((output | log | error) [<job_id>])] [-a | --all]
+  sprinkle view [((output | log | error) [<job_id>])] [-a | --all | --lines <n> | --head <n> | --since <time>] [--bytes] [--fresh]
     View output, log, or errors of a specific job.
-
-  sprinkle status
+    Follows the end of the file unless viewing all of it, its first or last lines, or lines since a time.
+    Lines since a time are found by timestamps at the start of lines (e.g. 2024-01-31 12:00:00).
+    To see output shortly after it is printed, and to timestamp it, enable line buffering in settings.
+    If not in a terminal, files are written directly to stdout for use in scripts and pipes.
+
+  sprinkle follow [<job_id>... | -a | --all] [--output] [--log] [--error] [--fresh]
+    Follow output, log, and errors of many jobs at once, each line prefixed with its job and stream.
+    Follows all streams unless some are specified. Array jobs can be followed together (e.g. 1234).
+    Files of jobs that have not yet started are followed once they appear.
+    If nothing specified, prompt to select jobs to follow.
+
+  sprinkle grep <regex> [<job_id>...] [--active | --failed] [--since <time>] [-i | --ignore-case] [--output] [--log] [--error] [--fresh]
+    Search files of jobs for lines matching <regex>, and show matches by job, name, and stream.
+    Searches output and errors of all jobs unless jobs or streams are specified.
+    Only search jobs that are active, failed, or submitted since a date (e.g. 2024-01-31) or duration ago (e.g. 7d).
+
+  sprinkle status [--fresh] [-w | --watch] [--sort <column> [--descending]] [--filter <condition>]...
     See overview of job details.
+    Job details are cached for a few seconds, see settings.
+    If watching, keep refreshing job details until interrupted.
+    Sort by column: name, id, queue, status, submitted, started, elapsed, cpu, mem, avg, or max.
+    Filter by conditions on columns, e.g. "status=RUN", "name=sweep-*", or "mem>2G".
+    Progress and time remaining of running jobs are read from new output, e.g. "450/1000" printed by tqdm,
+    or from a pattern set in settings.
+    If enabled in settings, compress files of jobs that have finished.
+
+  sprinkle history [--name <pattern>] [--queue <queue>] [--since <time>] [--until <time>] [--exit <code> | --failed] [--limit <n>]
+    Show submitted jobs and their resource usage once finished, newest first.
+    Filter by job name (wildcards allowed), queue, exit code, or failure.
+    Times are dates (e.g. 2024-01-31) or durations ago (e.g. 7d). Defaults to 50 jobs.
+
+  sprinkle summary [--name <pattern>] [--limit <n>]
+    Summarize resource usage of finished jobs from their log files, newest first, and in total per job name.
+    Efficiency is CPU time used of cores reserved, and max memory used of memory requested.
+    Logs are parsed in parallel and cached, so only new logs are parsed. Defaults to 50 jobs.
+
+  sprinkle clean [--compress] [--delete] [--keep-last <n>] [--keep-newer <duration>] [--keep-failed] [--dry-run] [--fresh]
+    Clean up files of finished jobs.
+    If compressing, compress output, log, and error files of finished jobs with the format chosen in settings.
+    Compressed files are decompressed transparently when viewed, followed, or searched.
+    If deleting, delete files of finished jobs except the last <n> jobs, jobs finished within <duration> (e.g. 7d),
+    or failed jobs, if keeping them. Files of active jobs are never deleted.
+    If dry running, report files that would be deleted and bytes reclaimed without deleting them.
 
   sprinkle settings
     Set up or change existing job settings.
     
-  sprinkle setup [-d | --delete]
-    Set up job environment (or recreates it in case of changes).
+  sprinkle setup [-d | --delete | --force]
+    Set up job environment (or updates it in case of changes).
+    Skips conda if the environment and requirements files have not changed since, unless forcing.
+    Changed requirements are installed with pip and other changes applied with conda env update --prune,
+    rebuilding from scratch only if forcing, if the update fails, or if the Python version changed.
+    Uses mamba or micromamba, and uv for pip requirements, if available, unless overridden in settings.
+    If enabled in settings, packs the environment with conda-pack, which jobs unpack to node-local disk once per node.
+    If sharing is enabled in settings, reuses the environment of projects with an identical specification,
+    and deletes shared environments no project or active job uses anymore. Deleting then only stops using the shared environment.
     If settings have not been setup, prompt to set them up.
 
-  sprinkle export [<path>] [<args>...]
+  sprinkle export [<path>] [--sweep <file>] [<args>...]
     Export submission script to <path> that passes <args> to the job script.
     If <args> contains dashes, add the two dashes "--" before <args>.
     Defaults to working directory.
@@ -81,8 +202,41 @@ Usage:
 
 Options:
   -h -? --help       Show full help text.
-  -a --all           For start, kill all jobs; For view, view full file.
-  -d --delete        Delete environment without recreating it.
+  -a --all           For stop, kill all jobs; For view, view full file; For follow, follow all jobs.
+  -d --delete        Delete environment without recreating it, or files of finished jobs.
+  --right-size       Apply resources recommended from previous runs.
+  --force            Rebuild environment even if up to date.
+  --sweep <file>     Submit a job array sweeping arguments in file.
+  --workers <n>      Maximum concurrent submissions.
+  --rate <n>         Maximum submissions per second.
+  --retries <n>      Maximum retries of a submission on transient failures.
+  --output           Follow or search output.
+  --log              Follow or search log.
+  --error            Follow or search errors.
+  --fresh            Bypass cached job details.
+  -w --watch         Keep refreshing job status until interrupted.
+  --sort <column>    Sort jobs by column.
+  --descending       Sort in descending order.
+  --filter <condition>  Only show jobs satisfying condition.
+  --name <pattern>   Only jobs with names matching pattern.
+  --status <status>  Only jobs with status.
+  --queue <queue>    Only jobs submitted to queue.
+  --older-than <duration>  Only jobs submitted longer ago than duration.
+  --since <time>     Only jobs submitted, or lines written, since time.
+  --until <time>     Only jobs submitted until time.
+  --exit <code>      Only jobs that exited with code.
+  --active           Only jobs that are active.
+  --failed           Only jobs that failed.
+  --limit <n>        Maximum number of jobs to show.
+  -i --ignore-case   Ignore case when searching.
+  --compress         Compress files of finished jobs.
+  --keep-last <n>    Keep files of the last n finished jobs.
+  --keep-newer <duration>  Keep files of jobs finished within duration.
+  --keep-failed      Keep files of failed jobs.
+  --dry-run          Report what would be deleted without deleting it.
+  --lines <n>        Show last n lines.
+  --head <n>         Show first n lines.
+  --bytes            Count bytes instead of lines.
 """
 
 
@@ -187,27 +341,130 @@ class Command:
 
 
 
-    def start(args: list[str] = []) -> int:
+    def _use_shared_environment(settings: JobSettings, register: bool = True) -> JobSettings:
+        """If sharing environments, register project as a user of the shared environment of its specification.
+        
+        Args:
+            settings (JobSettings): Settings of job
+            register (bool, optional): Whether to register project as a user, or only get the name of the shared environment. Defaults to True.
+        
+        Returns:
+            JobSettings: Settings using the shared environment, or settings as is if not shared
+        """
+        # If not sharing, use environment of project
+        if not settings.env_shared:
+            return settings
+
+        # If specification cannot be shared, use environment of project
+        if register:
+            env_name = register_shared_environment(settings.env_file, settings.req_file, output=True)
+        else:
+            env_name = shared_environment_name(settings.env_file, settings.req_file)
+        if env_name is None:
+            return settings
+
+
+        return replace(settings, **{nameof(JobSettings.env_name): env_name})
+
+
+
+    def _collect_shared_environments() -> None:
+        """Delete shared environments no project or active job uses anymore, unless active jobs are unknown"""
+        # Query active jobs, if failed, inform and skip, as jobs may still use environments
+        try:
+            job_details = query_jobs_active()
+        except OSError:
+            job_details = None
+
+        if job_details is None:
+            print("WARNING: Failed querying active jobs, so not deleting shared environments no longer used")
+            return
+
+
+        collect_shared_environments(job_details, output=True)
+
+
+
+    def _load_sweep(sweep_file: Optional[str]) -> Optional[list[list[str]]]:
+        """Load arguments of each job in a sweep, informing of failures.
+        
+        Args:
+            sweep_file (Optional[str]): File with arguments of each job
+        
+        Returns:
+            Optional[list[list[str]]]: Arguments of each job, or None if no file or loading failed
+        """
+        # If no sweep, return nothing
+        if not sweep_file:
+            return None
+
+        # Load sweep, inform on failure
+        try:
+            return load_sweep(sweep_file)
+        except OSError as error:
+            print(f'ERROR: Failed reading sweep file "{sweep_file}": {error}')
+        except ValueError as error:
+            print(f'ERROR: Invalid sweep file "{sweep_file}": {error}')
+
+        return None
+
+
+
+    def _get_jobs_active(fresh: bool = False) -> dict[str, JobDetails]:
+        """Get active jobs, reusing cached job details within the project's cache time.
+        
+        Args:
+            fresh (bool, optional): Whether to bypass cached job details. Defaults to False.
+        
+        Returns:
+            dict[str, JobDetails]: Dictionary of active jobs, where key is job id
+        """
+        # Load cache time from settings if available
+        settings = load_settings() or JobSettings()
+
+        # Return active jobs
+        return get_jobs_active(ttl=settings.status_cache_ttl, fresh=fresh)
+
+
+
+    def start(args: list[str] = [], right_size: bool = False, sweep_file: Optional[str] = None, force: bool = False) -> int:
         """Start a new job, passing args to job script.
         
         Args:
             args (list[str], optional): Arguments to pass to job script. Defaults to [].
+            right_size (bool, optional): Whether to apply resources recommended from previous runs. Defaults to False.
+            sweep_file (Optional[str], optional): File with arguments of each job in a job array. Defaults to None which starts a single job.
+            force (bool, optional): Whether to rebuild the environment even if it is up to date. Defaults to False.
         
         Returns:
             int: 0 if successful, 1 if failure.
         """
+        # Load sweep, if invalid, inform and return failure
+        sweep = Command._load_sweep(sweep_file)
+        if sweep_file and sweep is None:
+            return 1
+
+
         # Load settings
         settings = Command._ensure_project_initialized()
         # If no settings, return failure
         if not settings:
             return 1
 
+        # If sharing environments, use shared environment of specification
+        settings = Command._use_shared_environment(settings)
 
-        # If environment not yet set up, set it up, if failure, inform and return failure
-        if not exists_environment(settings.env_name):
-            if not recreate_environment(settings.env_name, settings.env_file, output=True):
-                print(f'ERROR: Failed to set up environment "{settings.env_name or JobSettings.defaults.env_name()}"')
-                return 1
+
+        # If environment not set up from current specification, set it up, if failure, inform and return failure
+        backend = get_environment_backend(settings.env_solver, settings.env_installer)
+        if not ensure_environment(settings.env_name, settings.env_file, settings.req_file, force=force, output=True, backend=backend):
+            print(f'ERROR: Failed to set up environment "{settings.env_name or JobSettings.defaults.env_name()}"')
+            return 1
+
+        # If environment is unpacked in jobs, pack it if not packed since set up, if failure, inform and return failure
+        if settings.env_packed and not pack_environment(settings.env_name, output=True):
+            print(f'ERROR: Failed to pack environment "{settings.env_name or JobSettings.defaults.env_name()}"')
+            return 1
 
 
         # Check if environment and requirements files exists, inform and fail if not
@@ -215,11 +472,32 @@ class Command:
             return 1
 
 
-        # Submit job script
-        job_id = submit_job(settings, args)
+        # Recommend resources based on previous runs, and apply if requested, recording accounting of finished runs only then
+        settings_recommended, recommendation = recommend_settings(settings, update=right_size)
+        if recommendation:
+            if right_size:
+                print(f"Right-sizing resources. {recommendation}")
+                settings = settings_recommended
+            else:
+                print(f"TIP: {recommendation}\nApply with: sprinkle start --right-size")
+
+
+        # Submit job script, if failure, inform and return failure
+        try:
+            job_id = submit_job(settings, args, sweep)
+        except JobSubmissionError as error:
+            print(f"ERROR: Failed submitting job: {error}")
+            return 1
+
+        # If sharing environments, keep shared environment while job is active
+        if settings.env_shared:
+            record_shared_environment_jobs(settings.env_name, [job_id])
 
         # Print job ID
-        print(f'Started job (Name: "{settings.name or JobSettings.defaults.name()}", ID: "{job_id}", Script: "{settings.script} {" ".join(args)}")')
+        if sweep:
+            print(f'Started job array (Name: "{settings.name or JobSettings.defaults.name()}", ID: "{job_id}", Jobs: {len(sweep)}, Script: "{settings.script} {" ".join(args)}")')
+        else:
+            print(f'Started job (Name: "{settings.name or JobSettings.defaults.name()}", ID: "{job_id}", Script: "{settings.script} {" ".join(args)}")')
 
 
         # Return successful
@@ -227,11 +505,122 @@ class Command:
 
 
 
-    def stop(job_ids: Union[Literal["all"], list[str]] = []) -> int:
-        """Stop jobs, either by ID or all jobs.
+    def submit_many(manifest: str, workers: Optional[str] = None, rate: Optional[str] = None, retries: Optional[str] = None) -> int:
+        """Submit many jobs from a manifest in parallel.
+        
+        Args:
+            manifest (str): Path to manifest of jobs, see load_manifest.
+            workers (Optional[str], optional): Maximum concurrent submissions. Defaults to None which means 4.
+            rate (Optional[str], optional): Maximum submissions per second. Defaults to None which means 5.
+            retries (Optional[str], optional): Maximum retries on transient failures. Defaults to None which means 3.
+        
+        Returns:
+            int: 0 if all jobs were submitted, 1 if failure.
+        """
+        # Parse arguments, inform and exit failure if invalid
+        try:
+            workers = int(workers) if workers else 4
+            rate = float(rate) if rate else 5
+            retries = int(retries) if retries else 3
+        except ValueError:
+            print("ERROR: Workers and retries must be whole numbers, and rate must be a number")
+            return 1
+
+
+        # Load settings
+        settings = Command._ensure_project_initialized()
+        # If no settings, return failure
+        if not settings:
+            return 1
+
+
+        # Load manifest, if invalid, inform and return failure
+        try:
+            jobs = load_manifest(manifest, settings)
+        except OSError as error:
+            print(f'ERROR: Failed reading manifest "{manifest}": {error}')
+            return 1
+        except ValueError as error:
+            print(f'ERROR: Invalid manifest "{manifest}": {error}')
+            return 1
+
+        # If sharing environments, use shared environment of each specification
+        shared = {}
+        for job_settings, _ in jobs:
+            if job_settings not in shared:
+                shared[job_settings] = Command._use_shared_environment(job_settings)
+
+        jobs = [(shared[job_settings], args) for job_settings, args in jobs]
+
+
+        # Ensure environments of all jobs are set up, if failure, inform and return failure
+        for env_name, env_file, req_file, env_solver, env_installer, env_packed in {
+            (job_settings.env_name, job_settings.env_file, job_settings.req_file, job_settings.env_solver, job_settings.env_installer, job_settings.env_packed) 
+            for job_settings, _ in jobs
+        }:
+            if not ensure_environment(env_name, env_file, req_file, output=True, backend=get_environment_backend(env_solver, env_installer)):
+                print(f'ERROR: Failed to set up environment "{env_name or JobSettings.defaults.env_name()}"')
+                return 1
+
+            if env_packed and not pack_environment(env_name, output=True):
+                print(f'ERROR: Failed to pack environment "{env_name or JobSettings.defaults.env_name()}"')
+                return 1
+
+
+        # Submit jobs, informing of progress as each job finishes submitting
+        print(f"Submitting {len(jobs)} jobs...")
+        completed = itertools.count(1)
+
+        def on_result(result: SubmissionResult) -> None:
+            outcome = f'ID: "{result.job_id}"' if result.job_id else f"ERROR: {result.error}"
+            print(f"[{next(completed)}/{len(jobs)}] Job #{result.index} {outcome}")
+
+        results = submit_jobs(jobs, workers=workers, rate=rate, retries=retries, on_result=on_result)
+
+        # If sharing environments, keep shared environments while jobs are active
+        shared_job_ids: dict[str, list[str]] = {}
+        for result in results:
+            job_settings, _ = jobs[result.index - 1]
+            if result.job_id and job_settings.env_shared:
+                shared_job_ids.setdefault(job_settings.env_name, []).append(result.job_id)
+
+        for env_name, job_ids in shared_job_ids.items():
+            record_shared_environment_jobs(env_name, job_ids)
+
+
+        # Display result of each job
+        print(tabulate(
+            [[result.index, result.name, result.job_id or "N/A", result.attempts, result.error or "", " ".join(result.args)]
+             for result in results],
+            headers=["#", "Name", "Job ID", "Attempts", "Error", "Args"]
+        ))
+
+        submitted = sum(1 for result in results if result.job_id)
+        print(f"Submitted {submitted} of {len(results)} jobs")
+
+
+        # Return successful if all jobs were submitted
+        return 0 if submitted == len(results) else 1
+
+
+
+    def stop(
+        job_ids: Union[Literal["all"], list[str]] = [], 
+        name: Optional[str] = None,
+        status: Optional[str] = None,
+        queue: Optional[str] = None,
+        older_than: Optional[str] = None,
+        fresh: bool = False
+    ) -> int:
+        """Stop jobs, either by ID, by selectors, or all jobs.
         
         Args:
             job_ids (Union[Literal["all"], list[str]], optional): Job IDs to stop or the string all. Defaults to [].
+            name (Optional[str], optional): Only stop jobs with names matching wildcard pattern. Defaults to None.
+            status (Optional[str], optional): Only stop jobs with status. Defaults to None.
+            queue (Optional[str], optional): Only stop jobs in queue. Defaults to None.
+            older_than (Optional[str], optional): Only stop jobs submitted longer ago than duration. Defaults to None.
+            fresh (bool, optional): Whether to bypass cached job details. Defaults to False.
         
         Returns:
             int: 0 if successful, 1 if failure.
@@ -239,36 +628,81 @@ class Command:
         
         # WARN: Not handling case where jobs finish while executing this code
 
-        # Get active jobs 
-        job_active = get_jobs_active()
-        job_start_ids = set(job_active.keys())
+        selected = any(selector is not None for selector in [name, status, queue, older_than])
         job_not_found_ids = set()
-        
-        # If no jobs available, inform and exit
-        if len(job_start_ids) == 0:
-            print("No active jobs to stop")
-            return 1
-
 
-        # If all jobs should be killed, mark all for killing
-        if job_ids == "all":
-            job_kill_ids = job_start_ids
-        # Else if no jobs provided, prompt for active jobs to kill, exit if none
-        elif len(job_ids) == 0:
-            job_kill_ids = set(prompt_jobs_active(job_active).keys())
+        # If only selecting by selectors LSF supports, let LSF select and kill jobs in one call
+        if selected and len(job_ids) == 0 and older_than is None \
+            and (killed := kill_jobs_matching(name, queue, status)) is not None:
+            job_killed_ids, job_alive_ids = killed
 
-            if len(job_kill_ids) == 0:
-                print("No jobs selected to stop")
+            if len(job_killed_ids) == 0 and len(job_alive_ids) == 0:
+                print("No active jobs matching selection to stop")
                 return 1
-        # Else jobs provided, mark selected active jobs for killing
         else:
-            job_query_ids = set(job_ids)
-            job_kill_ids = job_start_ids & job_query_ids
-            job_not_found_ids = job_query_ids - job_kill_ids
-        
+            # Get active jobs 
+            job_active = Command._get_jobs_active(fresh)
+
+            # If selecting, only keep active jobs matching selectors
+            if selected:
+                conditions = [
+                    f"{column}={value}" 
+                    for column, value in [("name", name), ("status", status and status.upper()), ("queue", queue)] 
+                    if value is not None
+                ]
+                if older_than is not None:
+                    if parse_duration_seconds(older_than) is None:
+                        print(f'ERROR: Invalid duration "{older_than}". Expected e.g. 30m, 2h, or 7d')
+                        return 1
+                    # NOTE: Only bjobs reports submission times, not its bstat fallback
+                    if any(job.time_submit is None for job in job_active.values()):
+                        print("ERROR: Filtering by age is unavailable, as submission times of jobs are unknown")
+                        return 1
+                    conditions.append(f"submitted<{older_than}")
+
+                try:
+                    job_active = JobTable.from_jobs(job_active).filter(conditions).to_jobs()
+                except ValueError as error:
+                    print(f"ERROR: {error}")
+                    return 1
+
+                # Stop all selected jobs unless specific jobs are given
+                if len(job_ids) == 0:
+                    job_ids = "all"
+
+            job_start_ids = set(job_active.keys())
+            
+            # If no jobs available, inform and exit
+            if len(job_start_ids) == 0:
+                print("No active jobs matching selection to stop" if selected else "No active jobs to stop")
+                return 1
 
-        # Send kill signal
-        job_killed_ids, job_alive_ids = kill_jobs(list(job_kill_ids))
+
+            # If all jobs should be killed, mark all for killing
+            if job_ids == "all":
+                job_kill_ids = job_start_ids
+            # Else if no jobs provided, prompt for active jobs to kill, exit if none
+            elif len(job_ids) == 0:
+                job_kill_ids = set(prompt_jobs_active(job_active).keys())
+
+                if len(job_kill_ids) == 0:
+                    print("No jobs selected to stop")
+                    return 1
+            # Else if jobs provided with selectors, mark selected active jobs and selected jobs of arrays for killing
+            elif selected:
+                job_query_ids = set(job_ids)
+                job_kill_ids = {job_id for job_id in job_start_ids if job_id in job_query_ids or job_id.split("[")[0] in job_query_ids}
+                job_not_found_ids = job_query_ids - {job_id for job_kill_id in job_kill_ids for job_id in [job_kill_id, job_kill_id.split("[")[0]]}
+            # Else jobs provided, mark selected active jobs and job arrays for killing
+            else:
+                job_query_ids = set(job_ids)
+                job_array_ids = {job_id.split("[")[0] for job_id in job_start_ids if "[" in job_id}
+                job_kill_ids = (job_start_ids | job_array_ids) & job_query_ids
+                job_not_found_ids = job_query_ids - job_kill_ids
+            
+
+            # Send kill signals
+            job_killed_ids, job_alive_ids = kill_jobs(list(job_kill_ids))
 
 
         # Track whether any jobs were killed and that all were killed successfully.
@@ -293,22 +727,52 @@ class Command:
 
 
 
-    def view(type: Optional[Literal["output", "log", "error"]], job_id: Optional[str], all: bool) -> int:
+    def view(
+        type: Optional[Literal["output", "log", "error"]], 
+        job_id: Optional[str], 
+        all: bool, 
+        lines: Optional[str] = None,
+        head: Optional[str] = None,
+        bytes: bool = False,
+        since: Optional[str] = None,
+        fresh: bool = False
+    ) -> int:
         """View output, log, or errors of a specific job.
         
         Args:
             type (Optional[Literal["output", "log", "error"]], optional): Type of view. Defaults to None which prompts for a view.
             job_id (Optional[str], optional): Job ID to view. Defaults to None which prompts for an active job.
             all (bool): Whether to view the full file.
+            lines (Optional[str], optional): Number of last lines to show. Defaults to None.
+            head (Optional[str], optional): Number of first lines to show. Defaults to None.
+            bytes (bool, optional): Whether lines and head count bytes instead of lines. Defaults to False.
+            since (Optional[str], optional): Date or duration ago to show lines timestamped since. Defaults to None.
+            fresh (bool, optional): Whether to bypass cached job details. Defaults to False.
         
         Returns:
             int: 0 if successful, 1 if failure.
         """
+        # Parse arguments, inform and exit failure if invalid
+        since_time = parse_time_point(since) if since else None
+
+        if lines and not lines.isdigit():
+            print(f'ERROR: Lines must be a number, got "{lines}"')
+            return 1
+        if head and not head.isdigit():
+            print(f'ERROR: Head must be a number, got "{head}"')
+            return 1
+        if since and since_time is None:
+            print(f'ERROR: Could not parse time "{since}"')
+            return 1
+        if bytes and lines is None and head is None:
+            print("ERROR: --bytes requires --lines or --head")
+            return 1
+
 
         # If no job ID provided, prompt for job ID
         if not job_id:
             # Get active jobs
-            job_active = get_jobs_active()
+            job_active = Command._get_jobs_active(fresh)
             
             # If no active jobs, inform and exit failure
             if len(job_active) == 0:
@@ -343,7 +807,15 @@ class Command:
 
 
         # View job
-        success = view_job(type, job_id, all)
+        success = view_job(
+            type, 
+            job_id, 
+            all, 
+            int(lines) if lines else None, 
+            int(head) if head else None, 
+            bytes, 
+            since_time
+        )
 
 
         # If not successful, inform
@@ -366,36 +838,522 @@ class Command:
 
 
 
-    def status() -> int:
-        """Display status of active jobs.
+    def follow(job_ids: Union[Literal["all"], list[str]] = [], types: list[Literal["output", "log", "error"]] = [], fresh: bool = False) -> int:
+        """Follow output, log, and errors of jobs at once.
+        
+        Args:
+            job_ids (Union[Literal["all"], list[str]], optional): Job IDs to follow or the string all. Defaults to [] which prompts for active jobs.
+            types (list[Literal["output", "log", "error"]], optional): Types of files to follow. Defaults to [] which follows all types.
+            fresh (bool, optional): Whether to bypass cached job details. Defaults to False.
         
         Returns:
             int: 0 if successful, 1 if failure.
         """
+        # If all or no job IDs provided, select from active jobs
+        if job_ids == "all" or len(job_ids) == 0:
+            job_active = Command._get_jobs_active(fresh)
+
+            # If no active jobs, inform and exit failure
+            if len(job_active) == 0:
+                print("No active jobs to follow")
+                return 1
+
+            job_ids = list(job_active.keys() if job_ids == "all" else prompt_jobs_active(job_active).keys())
+
+            if len(job_ids) == 0:
+                print("No jobs selected to follow")
+                return 1
+
+
+        # Find files of jobs
+        job_files = find_job_files(job_ids)
+        job_not_found_ids = [
+            job_id for job_id in job_ids 
+            if not any(files.job_id == job_id or files.job_id.startswith(f"{job_id}[") for files in job_files)
+        ]
+
+        if len(job_not_found_ids) > 0:
+            print(f"Failed finding files of job(s): {', '.join(job_not_found_ids)}")
+
+        if len(job_files) == 0:
+            print("Please ensure you are in the correct project directory for the selected jobs.")
+            return 1
+
+
+        # Follow files, prefixing lines with job and type
+        types = types or ["output", "log", "error"]
+        width = max(len(files.job_id) for files in job_files)
+        files = [
+            (path, f"{files.job_id:<{width}} {type:<6}| ")
+            for files in job_files
+            for type in types
+            if (path := getattr(files, type)) is not None
+        ]
+
+        print(f"Following {len(files)} file(s) of {len(job_files)} job(s). Press Ctrl+C to stop.")
+        return follow_files(files)
+
+
+
+    def grep(
+        regex: str,
+        job_ids: list[str] = [],
+        active: bool = False,
+        failed: bool = False,
+        since: Optional[str] = None,
+        ignore_case: bool = False,
+        types: list[Literal["output", "log", "error"]] = [],
+        fresh: bool = False
+    ) -> int:
+        """Search output, log, and errors of jobs for lines matching a regular expression.
+        
+        Args:
+            regex (str): Regular expression to search for
+            job_ids (list[str], optional): Job IDs to search. Defaults to [] which searches all jobs.
+            active (bool, optional): Whether to only search active jobs. Defaults to False.
+            failed (bool, optional): Whether to only search failed jobs. Defaults to False.
+            since (Optional[str], optional): Date or duration ago jobs must be submitted since. Defaults to None.
+            ignore_case (bool, optional): Whether to ignore case. Defaults to False.
+            types (list[Literal["output", "log", "error"]], optional): Types of files to search. Defaults to [] which searches output and errors.
+            fresh (bool, optional): Whether to bypass cached job details. Defaults to False.
+        
+        Returns:
+            int: 0 if any line matched, 1 otherwise.
+        """
+        # Parse arguments, inform and exit failure if invalid
+        since_time = parse_time_point(since) if since else None
+
+        if since and since_time is None:
+            print(f'ERROR: Could not parse time "{since}"')
+            return 1
+
+
+        # Find files of jobs
+        job_files = find_job_files(job_ids) if job_ids else list_job_files()
+
+        # Only keep selected jobs
+        if active:
+            job_active_ids = set(Command._get_jobs_active(fresh).keys())
+            job_files = [files for files in job_files if files.job_id in job_active_ids]
+
+        if failed or since_time is not None:
+            update_job_accounting()
+            job_history_ids = {job.job_id for job in query_job_history(since=since_time, failed=failed)}
+            job_files = [files for files in job_files if files.job_id in job_history_ids]
+
+
+        # Search files
+        types = types or ["output", "error"]
+        path_jobs = {
+            path: (files.job_id, type) 
+            for files in job_files 
+            for type in types 
+            if (path := resolve_file(getattr(files, type) or "")) is not None
+        }
+
+        try:
+            matches = search_files(regex, list(path_jobs.keys()), ignore_case)
+        except re.error as error:
+            print(f'ERROR: Invalid regular expression "{regex}": {error}')
+            return 1
+
+
+        # Print matches by job, name, and type
+        for match in matches:
+            job_id, type = path_jobs[match.path]
+            print(f"{job_id} {job_file_name(match.path)} {type}:{match.line_number}: {match.line}")
+
+        job_match_ids = {path_jobs[match.path][0] for match in matches}
+        print(f"Found {len(matches)} matching line(s) in {len(job_match_ids)} of {len(job_files)} job(s)")
+
+
+        # Return exit code
+        return 0 if len(matches) > 0 else 1
+
+
+
+    def _tabulate_jobs(jobs_active: dict[str, JobDetails]) -> str:
+        """Format active jobs as a table.
+        
+        Args:
+            jobs_active (dict[str, JobDetails]): Active jobs to format
+        
+        Returns:
+            str: Table with two header lines followed by one line per job
+        """
         # Coalesce nothing
         def na(value: str) -> str:
             return value if value else "N/A"
+
+
+        # Get progress of running jobs, reading only output written since last time
+        # NOTE: Progress is left unknown if the progress pattern was edited to be invalid
+        settings = load_settings() or JobSettings()
+        try:
+            jobs_progress = get_jobs_progress(
+                {job.job_id: parse_duration_seconds(job.time_elapsed) or 0 for job in jobs_active.values() if job.status == "RUN"},
+                settings.progress_pattern
+            )
+        except re.error:
+            jobs_progress = {}
+
+        def progress(job_id: str) -> str:
+            return f"{jobs_progress[job_id].done / jobs_progress[job_id].total:.0%}" if job_id in jobs_progress else "-"
+
+        def eta(job_id: str) -> str:
+            return na(format_duration_seconds(jobs_progress[job_id].time_remaining)) if job_id in jobs_progress else "-"
+
+
+        return tabulate(
+            [[job.name_short, job.job_id, job.queue, 
+            job.status, na(job.cpu_usage), na(job.mem_usage), na(job.mem_usage_avg), na(job.mem_usage_max), 
+            job.time_start, job.time_elapsed, progress(job.job_id), eta(job.job_id)]
+            for job in jobs_active.values()],
+            headers=["Name", "Job ID", "Queue", "Status", "CPU", "MEM", "Avg", "Max", "Started", "Elapsed", "Progress", "ETA"]
+        )
+
+
+
+    def status(fresh: bool = False, watch: bool = False, sort: Optional[str] = None, descending: bool = False, filters: list[str] = []) -> int:
+        """Display status of active jobs.
+        
+        Args:
+            fresh (bool, optional): Whether to bypass cached job details. Defaults to False.
+            watch (bool, optional): Whether to keep refreshing until interrupted. Defaults to False.
+            sort (Optional[str], optional): Column to sort jobs by. Defaults to None which keeps LSF order.
+            descending (bool, optional): Whether to sort in descending order. Defaults to False.
+            filters (list[str], optional): Conditions jobs must satisfy, such as "status=RUN". Defaults to [].
         
+        Returns:
+            int: 0 if successful, 1 if failure.
+        """
+        # Sort and filter jobs
+        def query(jobs: dict[str, JobDetails]) -> dict[str, JobDetails]:
+            table = JobTable.from_jobs(jobs).filter(filters)
+            
+            if sort:
+                table = table.sort(sort, descending)
+
+            return table.to_jobs()
+
+
+        # Validate sorting and filters before querying LSF, inform and exit failure if invalid
+        try:
+            query({})
+        except ValueError as error:
+            print(f"ERROR: {error}")
+            return 1
+
+
+        # If watching, keep polling for fresh job details
+        if watch:
+            return watch_jobs(
+                lambda: query(Command._get_jobs_active(fresh=True)), 
+                Command._tabulate_jobs
+            )
+
+
         # Get active jobs
-        jobs_active = get_jobs_active()
+        jobs_all = Command._get_jobs_active(fresh)
+        jobs_active = query(jobs_all)
 
 
-        # If no jobs, inform and exit failure
+        # If no jobs, inform
         if len(jobs_active) == 0:
             print("No active jobs to show")
-            
-            return 1
-        # Else, display jobs and exit success
+        # Else, display jobs
         else:        
-            print(tabulate(
-                [[job.name_short, job.job_id, job.queue, 
-                job.status, na(job.cpu_usage), na(job.mem_usage), na(job.mem_usage_avg), na(job.mem_usage_max), 
-                job.time_start, job.time_elapsed]
-                for job in jobs_active.values()],
-                headers=["Name", "Job ID", "Queue", "Status", "CPU", "MEM", "Avg", "Max", "Started", "Elapsed"]
-            ))
+            print(Command._tabulate_jobs(jobs_active))
+
+
+        # If enabled, compress files of jobs that finished
+        settings = load_settings()
+        if settings is not None and settings.compress_finished:
+            Command._compress_finished(set(jobs_all.keys()), settings.compress_format, rebuild=False)
+
+
+        # Return exit code
+        return 0 if len(jobs_active) > 0 else 1
+
+
+
+    def _compress_finished(job_active_ids: set[str], format: str, rebuild: bool = True, inform_empty: bool = False) -> int:
+        """Compress files of finished jobs and inform of the result.
+        
+        Args:
+            job_active_ids (set[str]): IDs of active jobs, whose files are never compressed
+            format (str): Compression format
+            rebuild (bool, optional): Whether to rebuild the job file index first. Defaults to True.
+            inform_empty (bool, optional): Whether to inform if there was nothing to compress. Defaults to False.
+        
+        Returns:
+            int: 0 if successful, 1 if failure.
+        """
+        compaction = compress_finished_job_files(job_active_ids, format, rebuild)
+
+        if compaction.files > 0:
+            print(
+                f"Compressed {compaction.files} file(s) of {compaction.jobs} finished job(s) " +
+                f"from {format_memory_bytes(compaction.bytes_before)} to {format_memory_bytes(compaction.bytes_after)}"
+            )
+        elif inform_empty and len(compaction.errors) == 0:
+            print("No files of finished jobs to compress")
+
+        for path, error in compaction.errors.items():
+            print(f"Failed compressing {path}: {error}")
+
+
+        return 0 if len(compaction.errors) == 0 else 1
+
+
+
+    def clean(
+        compress: bool = False, 
+        delete: bool = False, 
+        keep_last: Optional[str] = None, 
+        keep_newer: Optional[str] = None, 
+        keep_failed: bool = False, 
+        dry_run: bool = False, 
+        fresh: bool = False
+    ) -> int:
+        """Clean up files of finished jobs.
+        
+        Args:
+            compress (bool, optional): Whether to compress output, log, and error files of finished jobs. Defaults to False.
+            delete (bool, optional): Whether to delete output, log, and error files of finished jobs. Defaults to False.
+            keep_last (Optional[str], optional): Number of last finished jobs to keep when deleting. Defaults to None.
+            keep_newer (Optional[str], optional): Duration within which finished jobs are kept when deleting. Defaults to None.
+            keep_failed (bool, optional): Whether to keep failed jobs when deleting. Defaults to False.
+            dry_run (bool, optional): Whether to only report what would be deleted. Defaults to False.
+            fresh (bool, optional): Whether to bypass cached job details. Defaults to False.
+        
+        Returns:
+            int: 0 if successful, 1 if failure.
+        """
+        # If nothing to do, inform and exit failure
+        if not compress and not delete:
+            print("Nothing to clean. Choose what to clean, e.g. --compress or --delete")
+            return 1
+
+        # Parse arguments, inform and exit failure if invalid
+        keep_newer_seconds = parse_duration_seconds(keep_newer) if keep_newer else None
+
+        if keep_last and not keep_last.isdigit():
+            print(f'ERROR: Number of jobs to keep must be a number, got "{keep_last}"')
+            return 1
+        if keep_newer and keep_newer_seconds is None:
+            print(f'ERROR: Could not parse duration "{keep_newer}"')
+            return 1
+        if (keep_last or keep_newer or keep_failed or dry_run) and not delete:
+            print("ERROR: Retention options and dry runs only apply when deleting, add --delete")
+            return 1
+
+
+        # Get active jobs, always fresh when deleting, as files of active jobs must never be deleted
+        settings = load_settings() or JobSettings()
+        job_active_ids = set(Command._get_jobs_active(fresh or delete).keys())
+        exit_code = 0
+
+
+        # Delete files of finished jobs, before compressing so files to be deleted are not compressed
+        if delete:
+            deletion = delete_finished_job_files(
+                job_active_ids,
+                keep_last=int(keep_last) if keep_last else None,
+                keep_since=time.time() - keep_newer_seconds if keep_newer_seconds is not None else None,
+                keep_failed=keep_failed,
+                dry_run=dry_run
+            )
+
+            if dry_run:
+                print(f"Would delete {deletion.files} file(s) of {len(deletion.jobs)} finished job(s), reclaiming {format_memory_bytes(deletion.bytes)}")
+                for job in deletion.jobs:
+                    print(f"  {job.job_id}")
+            elif deletion.files > 0:
+                print(f"Deleted {deletion.files} file(s) of {len(deletion.jobs)} finished job(s), reclaiming {format_memory_bytes(deletion.bytes)}")
+            elif len(deletion.errors) == 0:
+                print("No files of finished jobs to delete")
+
+            for path, error in deletion.errors.items():
+                print(f"Failed deleting {path}: {error}")
+
+            exit_code = 0 if len(deletion.errors) == 0 else 1
+
+
+        # Compress files of finished jobs
+        if compress and not dry_run:
+            exit_code = max(exit_code, Command._compress_finished(job_active_ids, settings.compress_format, inform_empty=True))
+
+
+        # Return exit code
+        return exit_code
+
+
+
+    def history(
+        name: Optional[str] = None, 
+        queue: Optional[str] = None, 
+        since: Optional[str] = None, 
+        until: Optional[str] = None, 
+        exit_code: Optional[str] = None, 
+        failed: bool = False, 
+        limit: Optional[str] = None
+    ) -> int:
+        """Display history of submitted jobs.
+        
+        Args:
+            name (Optional[str], optional): Wildcard pattern job names must match. Defaults to None.
+            queue (Optional[str], optional): Queue jobs must have been submitted to. Defaults to None.
+            since (Optional[str], optional): Date or duration ago jobs must be submitted since. Defaults to None.
+            until (Optional[str], optional): Date or duration ago jobs must be submitted until. Defaults to None.
+            exit_code (Optional[str], optional): Exit code jobs must have exited with. Defaults to None.
+            failed (bool, optional): Whether to only show failed jobs. Defaults to False.
+            limit (Optional[str], optional): Maximum number of jobs to show. Defaults to None which shows 50.
+        
+        Returns:
+            int: 0 if successful, 1 if failure.
+        """
+        # Parse arguments, inform and exit failure if invalid
+        since_time = parse_time_point(since) if since else None
+        until_time = parse_time_point(until) if until else None
+
+        if since and since_time is None:
+            print(f'ERROR: Could not parse time "{since}"')
+            return 1
+        if until and until_time is None:
+            print(f'ERROR: Could not parse time "{until}"')
+            return 1
+        if exit_code and not exit_code.isdigit():
+            print(f'ERROR: Exit code must be a number, got "{exit_code}"')
+            return 1
+        if limit and not limit.isdigit():
+            print(f'ERROR: Limit must be a number, got "{limit}"')
+            return 1
+
+
+        # Record accounting of jobs that finished since last time
+        update_job_accounting()
+
+        # Query job history
+        jobs = query_job_history(
+            name=name,
+            queue=queue,
+            since=since_time,
+            until=until_time,
+            exit_code=int(exit_code) if exit_code else None,
+            failed=failed,
+            limit=int(limit) if limit else 50
+        )
+
+
+        # If no jobs, inform and exit failure
+        if len(jobs) == 0:
+            print("No jobs in history to show")
+            return 1
+
+
+        # Coalesce nothing
+        def na(value: Any) -> Any:
+            return value if value is not None else "N/A"
+
+        # Display jobs and exit success
+        print(tabulate(
+            [[job.job_id, job.name, job.queue, f"{datetime.fromtimestamp(job.time_submit):%Y-%m-%d %H:%M}",
+              job.accounting.status if job.accounting else "-",
+              na(job.accounting and job.accounting.exit_code),
+              na(job.accounting and format_duration_seconds(job.accounting.time_run)),
+              na(job.accounting and format_duration_seconds(job.accounting.time_cpu)),
+              na(job.accounting and format_memory_bytes(job.accounting.mem_max)),
+              " ".join(job.args)]
+             for job in jobs],
+            headers=["Job ID", "Name", "Queue", "Submitted", "Status", "Exit", "Run time", "CPU time", "Max", "Args"]
+        ))
+
+        return 0
+
+
+
+    def summary(name: Optional[str] = None, limit: Optional[str] = None) -> int:
+        """Display resource usage summary of finished jobs from their log files.
+        
+        Args:
+            name (Optional[str], optional): Wildcard pattern job names must match. Defaults to None.
+            limit (Optional[str], optional): Maximum number of jobs to show. Defaults to None which shows 50.
+        
+        Returns:
+            int: 0 if successful, 1 if failure.
+        """
+        # Parse arguments, inform and exit failure if invalid
+        if limit and not limit.isdigit():
+            print(f'ERROR: Limit must be a number, got "{limit}"')
+            return 1
+
+
+        # Summarize finished jobs
+        jobs = summarize_jobs()
+        if name:
+            jobs = [job for job in jobs if fnmatch.fnmatchcase(job.name, name)]
+
+
+        # If no jobs, inform and exit failure
+        if len(jobs) == 0:
+            print("No finished jobs to summarize")
+            return 1
+
+
+        # Coalesce nothing
+        def na(value: Any) -> Any:
+            return value if value is not None else "N/A"
+
+        def percent(value: Optional[float]) -> Optional[str]:
+            return f"{value:.0%}" if value is not None else None
+
+        def total(values: list[Optional[float]]) -> Optional[float]:
+            values = [value for value in values if value is not None]
+            return sum(values) if values else None
+
+
+        # Display jobs
+        print(tabulate(
+            [[job.job_id, job.name, job.accounting.status, job.accounting.exit_code,
+              na(job.accounting.cpu_cores),
+              na(format_duration_seconds(job.accounting.time_run)),
+              na(format_duration_seconds(job.accounting.time_cpu)),
+              na(percent(cpu_efficiency([job.accounting]))),
+              na(format_memory_bytes(job.accounting.mem_avg)),
+              na(format_memory_bytes(job.accounting.mem_max)),
+              na(format_memory_bytes(job.accounting.mem_requested)),
+              na(percent(mem_efficiency([job.accounting])))]
+             for job in jobs[:int(limit) if limit else 50]],
+            headers=["Job ID", "Name", "Status", "Exit", "Cores", "Run time", "CPU time", "CPU eff", "Avg", "Max", "Requested", "Mem eff"]
+        ))
+        print()
+
+
+        # Group jobs by name, with all jobs last
+        groups: dict[str, list[JobAccounting]] = {}
+        for job in jobs:
+            groups.setdefault(job.name, []).append(job.accounting)
+
+        groups["All"] = [job.accounting for job in jobs]
+
+
+        # Display totals of each group and exit success
+        print(tabulate(
+            [[group_name, len(accountings),
+              sum(accounting.status == "DONE" for accounting in accountings),
+              sum(accounting.status != "DONE" for accounting in accountings),
+              na(format_duration_seconds(total([accounting.time_run for accounting in accountings]))),
+              na(format_duration_seconds(total([accounting.time_cpu for accounting in accountings]))),
+              na(percent(cpu_efficiency(accountings))),
+              na(format_memory_bytes(max((accounting.mem_max for accounting in accountings if accounting.mem_max is not None), default=None))),
+              na(percent(mem_efficiency(accountings)))]
+             for group_name, accountings in groups.items()],
+            headers=["Name", "Jobs", "Done", "Exited", "Run time", "CPU time", "CPU eff", "Max", "Mem eff"]
+        ))
+
+        return 0
 
-            return 0
 
  
     def settings() -> int:
@@ -435,11 +1393,12 @@ class Command:
 
 
 
-    def setup(delete: bool = False) -> int:
-        """Recreate environment.
+    def setup(delete: bool = False, force: bool = False) -> int:
+        """Update environment, unless it is up to date, and pack it if enabled.
         
         Args:
             delete (bool, optional): Whether to only delete environment. Defaults to False.
+            force (bool, optional): Whether to recreate environment from scratch even if it is up to date. Defaults to False.
         
         Returns:
             int: 0 if successful, 1 if failure.
@@ -450,21 +1409,43 @@ class Command:
         if not settings:
             return 1
 
-        # If delete only, delete environment
+        # If delete only, stop using shared environment and delete shared environments no longer used, or delete environment of project
+        if delete and settings.env_shared:
+            released = release_shared_environment(settings.env_file, settings.req_file, output=True)
+            Command._collect_shared_environments()
+            return 0 if released else 1
         if delete:
             return 0 if delete_environment(settings.env_name, output=True) else 1
-        # Else, recreate environment
-        else:
-            return 0 if recreate_environment(settings.env_name, settings.env_file, output=True) else 1
 
+        # If sharing environments, use shared environment of specification, and delete shared environments no longer used
+        if settings.env_shared:
+            settings = Command._use_shared_environment(settings)
+            Command._collect_shared_environments()
+
+        # If environment is up to date, inform and skip conda
+        env_name = settings.env_name or JobSettings.defaults.env_name()
+        backend = get_environment_backend(settings.env_solver, settings.env_installer)
+        if not force and is_environment_current(env_name, environment_fingerprint(env_name, settings.env_file, settings.req_file)):
+            print(f'Environment "{env_name}" is up to date. Rebuild it with: sprinkle setup --force')
+        # Else if forced, recreate environment from scratch, if failure, return failure
+        elif force and not recreate_environment(settings.env_name, settings.env_file, settings.req_file, output=True, backend=backend):
+            return 1
+        # Else, update environment with changes to its specification, if failure, return failure
+        elif not force and not update_environment(settings.env_name, settings.env_file, settings.req_file, output=True, backend=backend):
+            return 1
+
+        # If environment is unpacked in jobs, pack it if not packed since set up
+        return 0 if not settings.env_packed or pack_environment(settings.env_name, output=True) else 1
 
 
-    def export(path: Optional[str], args: list[str] = []) -> int:
+
+    def export(path: Optional[str], args: list[str] = [], sweep_file: Optional[str] = None) -> int:
         """Export a submission script to a file.
         
         Args:
             path (Optional[str], optional): Path to save submission script to. Defaults to None which uses default path.
             args (list[str], optional): Additional arguments to pass to submission script. Defaults to [].
+            sweep_file (Optional[str], optional): File with arguments of each job in a job array. Defaults to None which exports a single job.
         
         Returns:
             int: 0 if successful, 1 if failure.
@@ -475,6 +1456,12 @@ class Command:
             path = sprinkle_project_settings_export_file
 
 
+        # Load sweep, if invalid, inform and return failure
+        sweep = Command._load_sweep(sweep_file)
+        if sweep_file and sweep is None:
+            return 1
+
+
         # Load settings
         settings = Command._ensure_project_initialized()
         # If no settings, return failure
@@ -482,8 +1469,8 @@ class Command:
             return 1
 
 
-        # Get submission script
-        script = generate_bsub_script(settings, args)
+        # Get submission script, using shared environment of specification if sharing
+        script = generate_bsub_script(Command._use_shared_environment(settings, register=False), args, sweep)
 
         # Attempt writing script to file
         try:
@@ -0,0 +1,177 @@
+from typing import Optional, BinaryIO, TextIO, Literal
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import gzip
+import io
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+
+# Suffixes of compressed files mapped to their compression format
+compression_suffixes = {".gz": "gzip", ".zst": "zstd"}
+
+# Bytes copied at a time while compressing
+compression_chunk_size = 1024**2
+
+
+
+def is_compressed(path: str) -> bool:
+    """Check whether a file is compressed, judged by its suffix"""
+    return os.path.splitext(path)[1] in compression_suffixes
+
+
+
+def resolve_file(path: str) -> Optional[str]:
+    """Find a file, or its compressed version if it has been compressed
+
+    Args:
+        path (str): Path of uncompressed or compressed file
+
+    Returns:
+        Optional[str]: Path of existing file, or None if neither exists
+    """
+    candidates = [path] if is_compressed(path) else [path] + [path + suffix for suffix in compression_suffixes]
+
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+
+
+    return None
+
+
+
+def open_file(path: str) -> BinaryIO:
+    """Open a file for reading in binary mode, transparently decompressing it as a stream.
+    If the file was compressed since its path was recorded, its compressed version is opened.
+
+    Args:
+        path (str): Path of uncompressed or compressed file
+
+    Raises:
+        OSError: If the file does not exist or cannot be decompressed
+
+    Returns:
+        BinaryIO: Readable file of decompressed contents
+    """
+    resolved = resolve_file(path)
+    if resolved is None:
+        raise FileNotFoundError(f"No such file: {path}")
+
+
+    match compression_suffixes.get(os.path.splitext(resolved)[1]):
+        case "gzip":
+            return gzip.open(resolved, "rb")
+        case "zstd":
+            if zstandard is None:
+                raise OSError(f"Reading {resolved} requires the zstandard package")
+            return zstandard.open(resolved, "rb")
+        case _:
+            return open(resolved, "rb")
+
+
+
+def open_text(path: str) -> TextIO:
+    """Open a file for reading as text, see open_file
+
+    Args:
+        path (str): Path of uncompressed or compressed file
+
+    Raises:
+        OSError: If the file does not exist or cannot be decompressed
+
+    Returns:
+        TextIO: Readable file of decompressed contents
+    """
+    return io.TextIOWrapper(open_file(path), errors="replace")
+
+
+
+def compress_file(path: str, format: Literal["gzip", "zstd"] = "gzip") -> str:
+    """Compress a file, replacing it with its compressed version while keeping its modification time.
+    Falls back to gzip if zstd is unavailable.
+
+    Args:
+        path (str): Path of uncompressed file
+        format (Literal["gzip", "zstd"], optional): Compression format. Defaults to "gzip".
+
+    Raises:
+        OSError: If the file cannot be compressed
+
+    Returns:
+        str: Path of compressed file
+    """
+    if format == "zstd" and zstandard is None:
+        format = "gzip"
+
+    suffix = next(suffix for suffix, suffix_format in compression_suffixes.items() if suffix_format == format)
+    path_compressed = path + suffix
+    path_temporary = path_compressed + ".tmp"
+
+
+    # Compress into temporary file, so an interruption never leaves a partial compressed file
+    try:
+        with open(path, "rb") as source:
+            if format == "zstd":
+                with open(path_temporary, "wb") as target:
+                    zstandard.ZstdCompressor(level=10).copy_stream(source, target, read_size=compression_chunk_size)
+            else:
+                with gzip.open(path_temporary, "wb", compresslevel=6) as target:
+                    shutil.copyfileobj(source, target, compression_chunk_size)
+
+        stat = os.stat(path)
+        os.utime(path_temporary, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(path_temporary, path_compressed)
+    except BaseException:
+        if os.path.exists(path_temporary):
+            os.remove(path_temporary)
+        raise
+
+
+    # Remove uncompressed file
+    os.remove(path)
+
+
+    return path_compressed
+
+
+
+def compress_files(paths: list[str], format: Literal["gzip", "zstd"] = "gzip", workers: int = 4) -> tuple[dict[str, str], dict[str, str]]:
+    """Compress files in parallel, see compress_file
+
+    Args:
+        paths (list[str]): Paths of uncompressed files
+        format (Literal["gzip", "zstd"], optional): Compression format. Defaults to "gzip".
+        workers (int, optional): Maximum files compressed concurrently. Defaults to 4.
+
+    Returns:
+        tuple[dict[str, str], dict[str, str]]: Tuple of (paths mapped to compressed paths, paths mapped to errors)
+    """
+    # If nothing to compress, return nothing
+    if len(paths) == 0:
+        return {}, {}
+
+
+    # Compress file, capturing errors
+    def compress(path: str) -> tuple[Optional[str], Optional[str]]:
+        try:
+            return compress_file(path, format), None
+        except OSError as error:
+            return None, str(error)
+
+
+    # Compress files in parallel, as compressors release the GIL
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as executor:
+        results = list(executor.map(compress, paths))
+
+
+    # Return compressed files and errors
+    compressed = {path: path_compressed for path, (path_compressed, _) in zip(paths, results) if path_compressed is not None}
+    failed = {path: error for path, (_, error) in zip(paths, results) if error is not None}
+
+    return compressed, failed
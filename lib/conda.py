@@ -1,11 +1,187 @@
-from typing import Optional
-from dataclasses import replace
+from typing import Optional, Any, Iterator, Iterable
+from dataclasses import dataclass, replace
+from contextlib import contextmanager
+import hashlib
+import fcntl
+import json
 import os
+import re
+import shutil
 import subprocess
+import sys
+import tempfile
+import time
 
 from varname import nameof
 
-from lsf import JobSettings
+from lsf import JobSettings, packed_environment_file
+from constants import sprinkle_project_dir, sprinkle_project_environments_file, sprinkle_user_dir, sprinkle_user_shared_environments_file
+
+
+
+# Environments found by reading conda's files, and the modification times of those files
+environment_registry_cache: Optional[tuple[tuple, dict[str, str]]] = None
+
+
+
+def _conda_root_prefix() -> Optional[str]:
+    """Gets the directory of the current conda installation without running conda
+
+    Returns:
+        Optional[str]: Directory of conda installation, or None if unknown
+    """
+    # Set by conda's shell integration
+    for variable in ["CONDA_ROOT", "_CONDA_ROOT", "MAMBA_ROOT_PREFIX"]:
+        if os.environ.get(variable):
+            return os.environ[variable]
+
+    # Executables are placed in bin or condabin of the installation
+    for variable in ["CONDA_EXE", "CONDA_PYTHON_EXE"]:
+        if os.environ.get(variable):
+            return os.path.dirname(os.path.dirname(os.environ[variable]))
+
+    # Installation directory of sprinkle's installer
+    prefix = os.path.expanduser("~/miniconda3")
+    return prefix if os.path.isdir(os.path.join(prefix, "conda-meta")) else None
+
+
+
+def _list_environments_registry() -> Optional[dict[str, str]]:
+    """Lists environments by reading environments.txt and the envs directories of conda,
+    cached by the modification times of those files.
+
+    Returns:
+        Optional[dict[str, str]]: Environment names mapped to their directories, 
+            or None if the environments cannot be found without running conda
+    """
+    global environment_registry_cache
+
+    root = _conda_root_prefix()
+    if root is None:
+        return None
+
+    # If envs directories are configured in .condarc, leave parsing configuration to conda
+    for condarc in [os.path.expanduser("~/.condarc"), os.path.join(root, ".condarc")]:
+        try:
+            with open(condarc, "r") as file:
+                if "envs_dirs" in file.read():
+                    return None
+        except OSError:
+            pass
+
+
+    # Directories holding named environments, in the order conda searches them
+    envs_dirs = [
+        path 
+        for variable in ["CONDA_ENVS_PATH", "CONDA_ENVS_DIRS"] 
+        for path in os.environ.get(variable, "").replace(",", os.pathsep).split(os.pathsep) if path
+    ] + [os.path.join(root, "envs"), os.path.expanduser("~/.conda/envs")]
+    environments_file = os.path.expanduser("~/.conda/environments.txt")
+
+
+    # If files have not been modified since last time, return cached environments
+    def modified(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    key = tuple((path, modified(path)) for path in [environments_file, *envs_dirs])
+    if environment_registry_cache is not None and environment_registry_cache[0] == key:
+        return environment_registry_cache[1]
+
+
+    # Find environments, where earlier directories take precedence for duplicate names
+    environments = {"base": root}
+
+    for envs_dir in envs_dirs:
+        try:
+            with os.scandir(envs_dir) as entries:
+                for entry in sorted(entries, key=lambda entry: entry.name):
+                    if os.path.isdir(os.path.join(entry.path, "conda-meta")):
+                        environments.setdefault(entry.name, entry.path)
+        except OSError:
+            pass
+
+
+    # Add named environments registered by conda in other envs directories
+    try:
+        with open(environments_file, "r") as file:
+            for line in file:
+                path = line.strip()
+                if os.path.basename(os.path.dirname(path)) == "envs" and os.path.isdir(os.path.join(path, "conda-meta")):
+                    environments.setdefault(os.path.basename(path), path)
+    except OSError:
+        pass
+
+
+    environment_registry_cache = (key, environments)
+    return environments
+
+
+
+def _list_environments_conda() -> tuple[dict[str, str], Optional[str]]:
+    """Lists environments by running conda
+
+    Returns:
+        tuple[dict[str, str], Optional[str]]: Tuple containing environment names mapped to their directories, 
+            and the current environment
+    """
+    # Get list of environments
+    output = subprocess.run(
+        ["conda", "env", "list"],
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.DEVNULL,
+        encoding="utf-8"
+    ).stdout.splitlines()
+
+    # Parse list of environments, skipping environments without names
+    environments = {}
+    environment_active = None
+
+    for line in output:
+        if not line or line.startswith("#"):
+            continue
+        
+        components = line.split()
+        if len(components) < 2:
+            continue
+
+        environments[components[0]] = components[-1]
+        if components[1] == '*':
+            environment_active = components[0]
+
+
+    # Return environments
+    return environments, environment_active
+
+
+
+def list_environments() -> tuple[dict[str, str], Optional[str]]:
+    """Lists environments in the current conda installation and the current environment.
+    Reads conda's files directly, and only runs conda if they cannot be found.
+
+    Returns:
+        tuple[dict[str, str], Optional[str]]: Tuple containing environment names mapped to their directories, 
+            and the current environment
+    """
+    environments = _list_environments_registry()
+    if environments is None:
+        return _list_environments_conda()
+
+
+    # Find current environment by its directory
+    prefix_active = os.environ.get("CONDA_PREFIX")
+    environment_active = next(
+        (
+            name for name, prefix in environments.items() 
+            if prefix_active and os.path.realpath(prefix) == os.path.realpath(prefix_active)
+        ),
+        None
+    )
+
+
+    return environments, environment_active
 
 
 
@@ -13,33 +189,641 @@ def get_environments() -> tuple[set[str], Optional[str]]:
     """Gets a set of all environments available in the current conda installation and the current environment
 
     Returns:
-        tuple[set[str], Optional[str]]: Tuple containing a set of all environments and the current environment
+        tuple[set[str], Optional[str]]: Tuple containing a set of all environments and the current environment
+    """
+    environments, environment_active = list_environments()
+
+    return set(environments), environment_active
+
+
+
+def get_environment_prefix(env_name: str) -> Optional[str]:
+    """Gets the directory of an environment in the current conda installation
+
+    Args:
+        env_name (str): Name of environment
+
+    Returns:
+        Optional[str]: Directory of environment, or None if environment does not exist
+    """
+    return list_environments()[0].get(env_name)
+
+
+
+@dataclass(frozen=True)
+class EnvironmentBackend:
+    solver: str     # Creates environments from conda packages: "conda", "mamba", or "micromamba"
+    installer: str  # Installs pip requirements into environments: "pip" or "uv"
+
+
+
+# Solvers in order of preference when auto-detecting, all accepting the arguments of conda create
+environment_solvers = ["mamba", "micromamba", "conda"]
+
+
+
+def get_environment_backend(solver: str = "", installer: str = "") -> EnvironmentBackend:
+    """Gets the tools setting up environments, auto-detecting the fastest available of those not specified
+
+    Args:
+        solver (str, optional): "conda", "mamba", or "micromamba". Defaults to "" which auto-detects.
+        installer (str, optional): "pip" or "uv". Defaults to "" which auto-detects.
+
+    Returns:
+        EnvironmentBackend: Backend
+    """
+    solver = solver or next((solver for solver in environment_solvers if shutil.which(solver)), "conda")
+    installer = installer or ("uv" if shutil.which("uv") else "pip")
+
+    return EnvironmentBackend(solver, installer)
+
+
+
+def _environment_target(backend: EnvironmentBackend, env_name: str) -> list[str]:
+    """Gets the arguments of the solver selecting an environment by name in the current conda installation
+    NOTE: micromamba has its own root prefix, so it is given the directory conda uses instead
+    """
+    if backend.solver == "micromamba":
+        root = _conda_root_prefix()
+        prefix = get_environment_prefix(env_name) or (os.path.join(root, "envs", env_name) if root else None)
+
+        if prefix:
+            return ["-p", prefix]
+
+
+    return ["-n", env_name]
+
+
+def _pip_command(backend: EnvironmentBackend, python: str, action: str) -> list[str]:
+    """Gets the command of the installer installing or uninstalling requirements for a Python executable"""
+    if backend.installer == "uv":
+        return ["uv", "pip", action, "--python", python]
+
+    return [python, "-m", "pip", action] + (["-y"] if action == "uninstall" else [])
+
+
+
+def _pip_requirements(env_file_content: str) -> list[str]:
+    """Gets the pip requirements of an environment file.
+    NOTE: Only the subset of YAML used by environment files is parsed, to not depend on a YAML parser
+
+    Args:
+        env_file_content (str): Contents of environment file
+
+    Returns:
+        list[str]: Pip requirements listed below pip in the dependencies
+    """
+    requirements = []
+    section = None
+    pip_indent = None
+
+    for line in env_file_content.splitlines():
+        # Skip comments and blank lines
+        line = re.sub(r"(^|\s)#.*", "", line).rstrip()
+        if not line:
+            continue
+
+        indent = len(line) - len(line.lstrip())
+        item = re.fullmatch(r"\s*-\s*(.*)", line)
+
+
+        # If top level key, track section
+        if indent == 0 and not item:
+            section = line.split(":")[0].strip()
+            pip_indent = None
+        # Else if indented below pip, item is a pip requirement
+        elif pip_indent is not None and indent > pip_indent:
+            if item:
+                requirements.append(item.group(1).strip("'\""))
+        # Else if start of pip requirements, track them
+        elif section == "dependencies" and item and re.fullmatch(r"pip\s*:", item.group(1)):
+            pip_indent = indent
+        # Else, pip requirements ended
+        else:
+            pip_indent = None
+
+
+    return requirements
+
+
+
+def _without_pip_section(env_file_content: str) -> str:
+    """Removes the pip requirements of an environment file, keeping everything else as is
+
+    Args:
+        env_file_content (str): Contents of environment file
+
+    Returns:
+        str: Contents of environment file without pip requirements
+    """
+    lines = []
+    pip_indent = None
+
+    for line in env_file_content.splitlines():
+        content = re.sub(r"(^|\s)#.*", "", line).rstrip()
+        indent = len(content) - len(content.lstrip())
+
+        # Skip pip requirements, which are indented below pip
+        if pip_indent is not None and (not content or indent > pip_indent):
+            continue
+        pip_indent = None
+
+        # Skip start of pip requirements
+        if re.fullmatch(r"\s*-\s*pip\s*:", content):
+            pip_indent = indent
+            continue
+
+        lines.append(line)
+
+
+    return "\n".join(lines) + "\n"
+
+
+
+# Headers solvers output at the start of phases of creating an environment, where solving starts immediately
+# NOTE: conda and mamba announce downloading and preparing the transaction, 
+#       while micromamba downloads right after its transaction summary, and then announces the transaction starting
+environment_phase_markers = {
+    "download": re.compile(rb"^(Downloading and Extracting Packages|Transaction\s*$)"),
+    "link": re.compile(rb"^(Preparing transaction|Transaction starting)"),
+}
+
+
+
+def _create_environment(backend: EnvironmentBackend, env_name: str, env_file_name: str, output: bool = False) -> Optional[dict[str, float]]:
+    """Creates an environment that does not exist in separately timed phases: 
+    the solver creates the environment from the environment file without its pip requirements, 
+    where solving, downloading, and linking are timed by when the solver reports them,
+    then the installer installs the pip requirements
+
+    Args:
+        backend (EnvironmentBackend): Backend creating environment
+        env_name (str): Name of environment
+        env_file_name (str): File path of environment file
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+
+    Returns:
+        Optional[dict[str, float]]: Seconds each phase took, or None if failure
+    """
+    try:
+        with open(env_file_name, "r") as file:
+            env_file_content = file.read()
+    except OSError:
+        return None
+
+    requirements = _pip_requirements(env_file_content)
+    target = _environment_target(backend, env_name)
+    env_dir = os.path.dirname(os.path.abspath(env_file_name))
+
+
+    # Write environment file without pip requirements beside it, so the solver treats it as the original
+    with tempfile.NamedTemporaryFile("w", dir=env_dir, prefix="condaenv.", suffix=".yml", delete=False) as file:
+        file.write(_without_pip_section(env_file_content))
+
+    # NOTE: micromamba creates environments from environment files with create instead of env create
+    if backend.solver == "micromamba":
+        command = [backend.solver, "create", *target, "--yes", "-f", file.name]
+    else:
+        command = [backend.solver, "env", "create", *target, "-f", file.name]
+
+
+    # Create environment, noting when each phase starts from the output of the solver
+    time_start = time.time()
+    phases_start = {"solve": time_start}
+
+    try:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=None if output else subprocess.DEVNULL,
+            cwd=env_dir,
+            env={**os.environ, "PYTHONUNBUFFERED": "1"}
+        )
+
+        for line in process.stdout:
+            for phase, marker in environment_phase_markers.items():
+                if phase not in phases_start and marker.search(line):
+                    phases_start[phase] = time.time()
+
+            if output:
+                sys.stdout.buffer.write(line)
+                sys.stdout.buffer.flush()
+
+        if process.wait() != 0:
+            return None
+    except OSError:
+        return None
+    finally:
+        os.remove(file.name)
+
+
+    # Each phase lasts until the next one starts, and if the solver reported no phases, time creation as a whole
+    if len(phases_start) == 1:
+        phases_start = {"create": time_start}
+
+    phases = sorted(phases_start.items(), key=lambda phase: phase[1])
+    time_ends = [time_phase for _, time_phase in phases[1:]] + [time.time()]
+    timings = {phase: time_end - time_phase for (phase, time_phase), time_end in zip(phases, time_ends)}
+
+
+    # Install pip requirements, where paths in them are relative to the environment file as with conda
+    if requirements:
+        prefix = target[1] if target[0] == "-p" else get_environment_prefix(env_name)
+        if prefix is None:
+            return None
+
+        with tempfile.NamedTemporaryFile("w", dir=env_dir, prefix="condaenv.", suffix=".requirements.txt", delete=False) as file:
+            file.write("\n".join(requirements) + "\n")
+
+        try:
+            time_start = time.time()
+            if not _run_commands([_pip_command(backend, os.path.join(prefix, "bin", "python"), "install") + ["-r", file.name]], output, cwd=env_dir):
+                return None
+            timings["pip"] = time.time() - time_start
+        finally:
+            os.remove(file.name)
+
+
+    return timings
+
+
+
+def environment_fingerprint(env_name: str, env_file_name: str, req_file_name: str) -> Optional[str]:
+    """Computes a content hash of an environment's specification
+
+    Args:
+        env_name (str): Name of environment
+        env_file_name (str): File path of environment file
+        req_file_name (str): File path of requirements file
+
+    Returns:
+        Optional[str]: Hash of environment name and contents of files, or None if the environment file is missing
+    """
+    fingerprint = hashlib.sha256(env_name.encode())
+
+    for file_name in [env_file_name, req_file_name]:
+        try:
+            with open(file_name, "rb") as file:
+                fingerprint.update(b"\0" + hashlib.sha256(file.read()).digest())
+        except OSError:
+            # Environment file is required, while requirements file may not be referenced by it
+            if file_name == env_file_name:
+                return None
+            fingerprint.update(b"\0")
+
+
+    return fingerprint.hexdigest()
+
+
+
+def read_environment_specification(env_file_name: str, req_file_name: str) -> Optional[dict[str, Optional[str]]]:
+    """Reads the contents of an environment's specification, so later changes can be diffed against it
+
+    Args:
+        env_file_name (str): File path of environment file
+        req_file_name (str): File path of requirements file
+
+    Returns:
+        Optional[dict[str, Optional[str]]]: Contents of environment file ("env") and requirements file ("req"), 
+            or None if the environment file is missing
+    """
+    specification = {}
+
+    for key, file_name in [("env", env_file_name), ("req", req_file_name)]:
+        try:
+            with open(file_name, "r") as file:
+                specification[key] = file.read()
+        except OSError:
+            specification[key] = None
+
+
+    return specification if specification["env"] is not None else None
+
+
+
+def _load_environment_records() -> dict[str, dict[str, Any]]:
+    """Loads fingerprints and directories of environments set up for the project
+
+    Returns:
+        dict[str, dict[str, Any]]: Environment names mapped to their fingerprint and prefix
+    """
+    try:
+        with open(sprinkle_project_environments_file, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+
+def _save_environment_records(records: dict[str, dict[str, Any]]) -> None:
+    """Saves fingerprints and directories of environments set up for the project
+
+    Args:
+        records (dict[str, dict[str, Any]]): Environment names mapped to their fingerprint and prefix
+    """
+    # If not in a project directory, do not create one just for the records
+    if not os.path.isdir(sprinkle_project_dir):
+        return
+
+    # Write to temporary file and replace, so records are never partially written
+    with open(sprinkle_project_environments_file + ".tmp", "w") as file:
+        json.dump(records, file, indent=2)
+
+    os.replace(sprinkle_project_environments_file + ".tmp", sprinkle_project_environments_file)
+
+
+
+def record_environment(env_name: str, fingerprint: Optional[str], specification: Optional[dict[str, Optional[str]]] = None) -> None:
+    """Records the fingerprint, specification, and directory of an environment that was set up
+
+    Args:
+        env_name (str): Name of environment
+        fingerprint (Optional[str]): Fingerprint of environment specification, see environment_fingerprint
+        specification (Optional[dict[str, Optional[str]]], optional): Specification environment was set up from, 
+            see read_environment_specification. Defaults to None which means unknown.
+    """
+    records = _load_environment_records()
+
+    if fingerprint is None:
+        records.pop(env_name, None)
+    else:
+        records[env_name] = {"fingerprint": fingerprint, "prefix": get_environment_prefix(env_name), "specification": specification}
+
+    _save_environment_records(records)
+
+
+
+def forget_environment(env_name: str) -> None:
+    """Forgets the fingerprint of an environment, such that it is set up again
+
+    Args:
+        env_name (str): Name of environment
+    """
+    record_environment(env_name, None)
+
+
+
+def _mark_environment_in_progress(env_name: str) -> None:
+    """Marks an environment as being set up, such that it is not trusted until it is recorded as set up.
+    Unlike forgetting it, an interrupted or failed setup then leaves a record behind.
+
+    Args:
+        env_name (str): Name of environment
+    """
+    records = _load_environment_records()
+    records[env_name] = {"fingerprint": None, "prefix": None, "specification": None, "in_progress": True}
+    _save_environment_records(records)
+
+
+
+def is_environment_current(env_name: str, fingerprint: Optional[str]) -> bool:
+    """Checks whether an environment was set up from the same specification and still exists, without calling conda
+
+    Args:
+        env_name (str): Name of environment
+        fingerprint (Optional[str]): Fingerprint of environment specification, see environment_fingerprint
+
+    Returns:
+        bool: True if environment is up to date, False otherwise
+    """
+    record = _load_environment_records().get(env_name)
+    if fingerprint is None or record is None or record.get("prefix") is None:
+        return False
+
+    # If shared environment is being set up by another project, it is not up to date yet
+    if env_name.startswith(shared_environment_prefix) and not _is_shared_environment_ready(env_name):
+        return False
+
+
+    return record["fingerprint"] == fingerprint and os.path.isdir(os.path.join(record["prefix"], "conda-meta"))
+
+
+
+def ensure_environment(env_name: str, env_file_name: str, req_file_name: str, force: bool = False, output: bool = False, backend: Optional[EnvironmentBackend] = None) -> bool:
+    """Ensures an environment is set up from its current specification.
+    Conda is skipped entirely if the environment's fingerprint matches.
+    If its specification changed since it was set up, it is kept as is with a warning,
+    as pending and running jobs still use it, see update_environment.
+
+    Args:
+        env_name (str): Name of environment
+        env_file_name (str): File path of environment file
+        req_file_name (str): File path of requirements file
+        force (bool, optional): If True, rebuild environment from scratch regardless. Defaults to False.
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+        backend (Optional[EnvironmentBackend], optional): Backend setting up environment. Defaults to None which auto-detects.
+
+    Returns:
+        bool: True if environment is set up, False otherwise
+    """
+    # Use default environment name if not specified
+    env_name = env_name or JobSettings.defaults.env_name()
+    fingerprint = environment_fingerprint(env_name, env_file_name or JobSettings.defaults.env_file(), req_file_name or JobSettings.defaults.req_file())
+
+
+    # If environment is up to date, skip conda
+    if not force and is_environment_current(env_name, fingerprint):
+        return True
+
+    # If shared environment, it is named by its specification, and set up while waiting for other projects setting it up
+    shared = env_name.startswith(shared_environment_prefix)
+
+    # If environment was set up before fingerprints were ever recorded, trust it as before
+    if not force and not shared and not os.path.exists(sprinkle_project_environments_file) and exists_environment(env_name):
+        record_environment(env_name, fingerprint)
+        return True
+
+    # If environment was completely set up from an older specification, keep using it, as jobs may still use it
+    record = _load_environment_records().get(env_name) or {}
+    if not force and not shared and record.get("prefix") is not None and os.path.isdir(os.path.join(record["prefix"], "conda-meta")):
+        if output:
+            print(f'WARNING: Specification of environment "{env_name}" changed since it was set up. Update it with: sprinkle setup')
+        return True
+
+
+    # If forced, rebuild environment
+    if force:
+        return recreate_environment(env_name, env_file_name, req_file_name, output, backend)
+
+    # Else, set up environment, rebuilding it if its setup was interrupted
+    return update_environment(env_name, env_file_name, req_file_name, output, backend)
+
+
+
+def _python_requirement(env_file_content: str) -> Optional[str]:
+    """Gets the Python requirement of an environment file (e.g. "python=3.10"), ignoring whitespace"""
+    match = re.search(r"^\s*-\s*(python(?:\s*[=<>!~][^#\n]*)?)\s*(?:#.*)?$", env_file_content, re.MULTILINE)
+    return re.sub(r"\s+", "", match.group(1)) if match else None
+
+
+def _requirement_lines(req_file_content: Optional[str]) -> list[str]:
+    """Gets the requirements of a requirements file without comments and blank lines"""
+    lines = [line.split(" #")[0].strip() for line in (req_file_content or "").splitlines()]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def _requirement_name(line: str) -> Optional[str]:
+    """Gets the normalized package name of a requirement (e.g. "torch>=2.0"), or None if not a plain requirement"""
+    match = re.fullmatch(r"([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?:[=<>!~;@].*)?", line)
+    return re.sub(r"[-_.]+", "-", match.group(1)).lower() if match else None
+
+
+
+def _pip_update_commands(backend: EnvironmentBackend, python: str, req_file_name: str, req_old: Optional[str], req_new: Optional[str]) -> list[list[str]]:
+    """Gets installer commands that change installed requirements from an old to a new requirements file.
+    Only added or changed requirements are installed, and removed requirements are uninstalled.
+    
+    Args:
+        backend (EnvironmentBackend): Backend installing requirements
+        python (str): Path of Python executable of environment
+        req_file_name (str): File path of new requirements file
+        req_old (Optional[str]): Contents of old requirements file
+        req_new (Optional[str]): Contents of new requirements file
+
+    Returns:
+        list[list[str]]: Commands to run
+    """
+    lines_old = _requirement_lines(req_old)
+    lines_new = _requirement_lines(req_new)
+
+    lines_added = [line for line in lines_new if line not in lines_old]
+    lines_removed = [line for line in lines_old if line not in lines_new]
+    names_new = {_requirement_name(line) for line in lines_new}
+
+    commands = []
+
+
+    # Uninstall packages no longer required
+    names_removed = sorted({name for line in lines_removed if (name := _requirement_name(line)) is not None} - names_new)
+    if names_removed:
+        commands.append(_pip_command(backend, python, "uninstall") + names_removed)
+
+    # Install added requirements, or all requirements if options, URLs, or paths changed
+    if any(_requirement_name(line) is None for line in lines_added + lines_removed):
+        commands.append(_pip_command(backend, python, "install") + ["-r", req_file_name])
+    elif lines_added:
+        commands.append(_pip_command(backend, python, "install") + lines_added)
+
+
+    return commands
+
+
+
+def _run_commands(commands: list[list[str]], output: bool = False, cwd: Optional[str] = None) -> bool:
+    """Runs commands in order until one fails
+
+    Args:
+        commands (list[list[str]]): Commands to run
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+        cwd (Optional[str], optional): Directory to run commands in. Defaults to None which is the working directory.
+
+    Returns:
+        bool: True if all commands succeeded, False otherwise
+    """
+    for command in commands:
+        try:
+            exit_status = subprocess.run(
+                command,
+                stdout=None if output else subprocess.DEVNULL,
+                stderr=None if output else subprocess.DEVNULL,
+                cwd=cwd
+            ).returncode
+        except OSError:
+            return False
+
+        if exit_status != 0:
+            return False
+
+
+    return True
+
+
+
+def update_environment(env_name: str, env_file_name: str, req_file_name: str = "", output: bool = False, backend: Optional[EnvironmentBackend] = None) -> bool:
+    """Updates an environment in place from the changes to its specification since it was set up.
+    If only requirements changed, they are installed with the installer, 
+    else the environment is updated with the solver's env update --prune.
+    Rebuilds the environment instead if the update fails, if the Python version changed, 
+    if the solver cannot prune (micromamba), or if the specification it was set up from is unknown.
+    Shared environments are set up by one project at a time, and reused once another project completely set them up.
+
+    Args:
+        env_name (str): Name of environment
+        env_file_name (str): File path of environment file
+        req_file_name (str, optional): File path of requirements file. Defaults to "" which uses default path.
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+        backend (Optional[EnvironmentBackend], optional): Backend updating environment. Defaults to None which auto-detects.
+
+    Returns:
+        bool: True if environment was successfully updated or rebuilt, False otherwise
     """
-    # Get list of environments
-    output = subprocess.run(
-        ["conda", "env", "list"],
-        stdout=subprocess.PIPE, 
-        stderr=subprocess.DEVNULL,
-        encoding="ascii"
-    ).stdout.splitlines()
+    # Use default names and backend if not specified
+    env_name = env_name or JobSettings.defaults.env_name()
+    env_file_name = env_file_name or JobSettings.defaults.env_file()
+    req_file_name = req_file_name or JobSettings.defaults.req_file()
+    backend = backend or get_environment_backend()
 
-    # Parse list of environments
-    environments = []
-    environment_active = None
 
-    for line in output:
-        if not line or line.startswith("#"):
-            continue
-        
-        components = line.split()
+    # Wait while another project sets up the same shared environment
+    with _shared_environment_setup_locked(env_name):
+        return _update_environment(env_name, env_file_name, req_file_name, output, backend)
 
-        environments.append(components[0])
-        if components[1] == '*':
-            environment_active = components[0]
 
 
-    # Return set of enviroments
-    return set(environments), environment_active
+def _update_environment(env_name: str, env_file_name: str, req_file_name: str, output: bool, backend: EnvironmentBackend) -> bool:
+    """Updates an environment in place, see update_environment"""
+    # Get specification environment was set up from, and the current specification
+    record = _load_environment_records().get(env_name) or {}
+    prefix = record.get("prefix")
+    specification_old = record.get("specification")
+    specification = read_environment_specification(env_file_name, req_file_name)
+    fingerprint = environment_fingerprint(env_name, env_file_name, req_file_name)
+
+
+    # If shared environment was completely set up by any project, it was set up from an identical specification
+    if env_name.startswith(shared_environment_prefix) and _is_shared_environment_ready(env_name) and exists_environment(env_name):
+        record_environment(env_name, fingerprint, specification)
+        return True
+
+    # If changes are unknown, environment is missing, or Python changed, rebuild
+    if (
+        specification is None or specification_old is None or prefix is None 
+        or not os.path.isdir(os.path.join(prefix, "conda-meta"))
+        or _python_requirement(specification_old["env"]) != _python_requirement(specification["env"])
+        or (specification_old["env"] != specification["env"] and backend.solver == "micromamba")
+    ):
+        return recreate_environment(env_name, env_file_name, req_file_name, output, backend)
+
+
+    # If only requirements changed, install changed requirements with the installer
+    if specification_old["env"] == specification["env"]:
+        tool = backend.installer
+        commands = _pip_update_commands(backend, os.path.join(prefix, "bin", "python"), req_file_name, specification_old["req"], specification["req"])
+    # Else, update environment with the solver, removing packages no longer specified
+    else:
+        tool = backend.solver
+        commands = [[backend.solver, "env", "update", "-n", env_name, "-f", env_file_name, "--prune"]]
+
+
+    # Mark environment as in progress, so an interrupted update is not considered up to date
+    _mark_environment_in_progress(env_name)
+    _mark_shared_environment_ready(env_name, False)
+
+    # Update environment, and if failure, rebuild
+    time_start = time.time()
+    if _run_commands(commands, output):
+        record_environment(env_name, fingerprint, specification)
+        _mark_shared_environment_ready(env_name, True)
+
+        if output:
+            print(f'Updated environment "{env_name}" with {tool} in {time.time() - time_start:.1f} s')
+
+        return True
+
+    if output:
+        print(f'Failed updating environment "{env_name}", rebuilding it')
+
+    return recreate_environment(env_name, env_file_name, req_file_name, output, backend)
 
 
 
@@ -60,19 +844,42 @@ def exists_environment(env_name: str) -> bool:
 
 
 
-def recreate_environment(env_name: str, env_file_name: str, output: bool = False) -> bool:
-    """(Re)creates an environment in the current conda installation
+def recreate_environment(env_name: str, env_file_name: str, req_file_name: str = "", output: bool = False, backend: Optional[EnvironmentBackend] = None) -> bool:
+    """(Re)creates an environment in the current conda installation, and records its fingerprint.
+    When outputting, prints how long solving, downloading, linking, and installing pip requirements took.
+    Shared environments are set up by one project at a time.
     
     Args:
         env_name (str): Name of environment
         env_file_name (str): File path of environment file
+        req_file_name (str, optional): File path of requirements file, part of the fingerprint. Defaults to "" which uses default path.
         output (bool, optional): If True, output is printed to stdout. Defaults to False.
+        backend (Optional[EnvironmentBackend], optional): Backend creating environment. Defaults to None which auto-detects.
 
     Returns:
         bool: True if environment was successfully (re)created, False otherwise
     """
-    # Use default environment name if not specified
+    # Use default environment name and backend if not specified
     env_name = env_name or JobSettings.defaults.env_name()
+    backend = backend or get_environment_backend()
+
+
+    # Wait while another project sets up the same shared environment
+    with _shared_environment_setup_locked(env_name):
+        return _recreate_environment(env_name, env_file_name, req_file_name, output, backend)
+
+
+
+def _recreate_environment(env_name: str, env_file_name: str, req_file_name: str, output: bool, backend: EnvironmentBackend) -> bool:
+    """(Re)creates an environment, see recreate_environment"""
+    # Fingerprint specification before creating environment, so later changes are detected
+    env_file_name = env_file_name or JobSettings.defaults.env_file()
+    fingerprint = environment_fingerprint(env_name, env_file_name, req_file_name or JobSettings.defaults.req_file())
+    specification = read_environment_specification(env_file_name, req_file_name or JobSettings.defaults.req_file())
+
+    # Mark environment as in progress, so an interrupted rebuild is not considered up to date
+    _mark_environment_in_progress(env_name)
+    _mark_shared_environment_ready(env_name, False)
 
 
     # Get list of environments and the activate environment
@@ -90,9 +897,6 @@ def recreate_environment(env_name: str, env_file_name: str, output: bool = False
     if env_name in environments:
         commands.append(f"conda env remove -n {env_name}")
 
-    # Create environment from environment file
-    commands.append(f"conda env create -n {env_name} -f {env_file_name or JobSettings.defaults.env_file()}")
-
 
     # Execute commands
     for command in commands:
@@ -112,7 +916,83 @@ def recreate_environment(env_name: str, env_file_name: str, output: bool = False
             return False
 
 
-    # Return success
+    # Create environment from environment file, if failure, return failure
+    timings = _create_environment(backend, env_name, env_file_name, output)
+    if timings is None:
+        return False
+
+    if output:
+        print(
+            f'Created environment "{env_name}" with {backend.solver} and {backend.installer} in {sum(timings.values()):.1f} s (' + 
+            ", ".join(f"{phase} {seconds:.1f} s" for phase, seconds in timings.items()) + ")"
+        )
+
+
+    # Record fingerprint and return success
+    record_environment(env_name, fingerprint, specification)
+    _mark_shared_environment_ready(env_name, True)
+
+    return True
+
+
+
+def pack_environment(env_name: str, force: bool = False, output: bool = False) -> bool:
+    """Packs an environment into a relocatable archive with conda-pack, which jobs unpack to node-local disk.
+    Skipped if the environment has been packed since it was set up, unless forcing.
+
+    Args:
+        env_name (str): Name of environment
+        force (bool, optional): If True, pack environment regardless. Defaults to False.
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+
+    Returns:
+        bool: True if environment is packed, False otherwise
+    """
+    # Use default environment name if not specified
+    env_name = env_name or JobSettings.defaults.env_name()
+    archive = packed_environment_file(env_name)
+
+
+    # If packed since environment was set up, skip packing
+    record = _load_environment_records().get(env_name)
+    if not force and record is not None and record.get("packed") and os.path.isfile(archive):
+        return True
+
+    # If conda-pack is not installed, inform and return failure
+    if shutil.which("conda-pack") is None:
+        if output:
+            print("Packing environments requires conda-pack. Install it with: conda install -n base -c conda-forge conda-pack")
+        return False
+
+    # If environment does not exist, return failure
+    prefix = get_environment_prefix(env_name)
+    if prefix is None:
+        return False
+
+
+    # Pack to a temporary archive that then replaces the archive, so jobs unpacking the previous archive are unaffected
+    # NOTE: conda-pack infers the format from the extension
+    archive_partial = os.path.join(os.path.dirname(archive), "." + os.path.basename(archive))
+    os.makedirs(os.path.dirname(archive), exist_ok=True)
+
+    time_start = time.time()
+    if not _run_commands([["conda-pack", "-p", prefix, "-o", archive_partial, "--force", "--n-threads", "-1"]], output):
+        if os.path.exists(archive_partial):
+            os.remove(archive_partial)
+        return False
+
+    os.replace(archive_partial, archive)
+
+
+    # Record environment was packed, so it is packed again once it is set up again
+    if record is not None:
+        records = _load_environment_records()
+        records[env_name] = {**record, "packed": True}
+        _save_environment_records(records)
+
+    if output:
+        print(f'Packed environment "{env_name}" in {time.time() - time_start:.1f} s')
+
     return True
 
 
@@ -134,6 +1014,12 @@ def delete_environment(env_name: str, output: bool = False) -> bool:
     environments, active = get_environments()
 
 
+    # Forget fingerprint and remove packed environment, as environment is being removed
+    forget_environment(env_name)
+
+    if os.path.isfile(packed_environment_file(env_name)):
+        os.remove(packed_environment_file(env_name))
+
     # If environment does not exist, return failure
     if env_name not in environments:
         return False
@@ -156,7 +1042,379 @@ def delete_environment(env_name: str, output: bool = False) -> bool:
             ["conda", "env", "remove", "-n", env_name],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL
-        ) == 0
+        ).returncode == 0
+
+
+
+# Prefix of names of environments shared across projects, followed by the start of their specification hash
+shared_environment_prefix = "sprinkle-shared-"
+
+# Requirements that refer to files of a project, which makes its environment differ from identical specifications
+shared_environment_local_pattern = re.compile(r"^(-e|--editable|\.|/|~|file:)")
+
+
+
+def shared_environment_fingerprint(env_file_name: str, req_file_name: str) -> Optional[str]:
+    """Computes a hash of an environment's normalized specification, which is the same across projects.
+    Comments, blank lines, the environment's name, and the order of requirements are ignored.
+
+    Args:
+        env_file_name (str): File path of environment file
+        req_file_name (str): File path of requirements file
+
+    Returns:
+        Optional[str]: Hash of specification, or None if the environment file is missing
+    """
+    specification = read_environment_specification(env_file_name, req_file_name)
+    if specification is None:
+        return None
+
+    env_lines = [
+        line for line in (re.sub(r"(^|\s)#.*", "", line).rstrip() for line in specification["env"].splitlines())
+        if line and not re.match(r"(name|prefix)\s*:", line)
+    ]
+    req_lines = sorted(_requirement_lines(specification["req"]))
+
+
+    return hashlib.sha256(json.dumps([env_lines, req_lines]).encode()).hexdigest()
+
+
+
+def _is_shareable(env_file_name: str, req_file_name: str) -> bool:
+    """Checks whether an environment's specification only refers to packages, and not to files of the project"""
+    specification = read_environment_specification(env_file_name, req_file_name) or {"env": None, "req": None}
+    requirements = _pip_requirements(specification["env"] or "")
+
+    return not any(
+        shared_environment_local_pattern.match(line) 
+        for line in requirements + _requirement_lines(specification["req"])
+    )
+
+
+
+def _load_shared_environments() -> dict[str, dict[str, Any]]:
+    """Loads the user's shared environments, see _shared_environments_locked
+
+    Returns:
+        dict[str, dict[str, Any]]: Specification hashes mapped to environment name, references, jobs, and whether it is ready
+    """
+    try:
+        with open(os.path.expanduser(sprinkle_user_shared_environments_file), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+
+@contextmanager
+def _shared_environments_locked() -> Iterator[dict[str, dict[str, Any]]]:
+    """Loads the user's shared environments for modification, saving them when done.
+    Other processes wait meanwhile, as projects of the user may be set up concurrently.
+
+    Yields:
+        Iterator[dict[str, dict[str, Any]]]: Specification hashes mapped to environment name and references, 
+            where each reference is the environment and requirements file of a project using the environment
+    """
+    file_name = os.path.expanduser(sprinkle_user_shared_environments_file)
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+
+    with open(file_name + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        environments = _load_shared_environments()
+
+        yield environments
+
+        # Write to temporary file and replace, so environments are never partially written
+        with open(file_name + ".tmp", "w") as file:
+            json.dump(environments, file, indent=2)
+
+        os.replace(file_name + ".tmp", file_name)
+
+
+
+# Shared environments this process holds the setup lock of, as setting up nests, e.g. a failed update rebuilds
+_shared_environment_setup_locks: set[str] = set()
+
+
+
+@contextmanager
+def _shared_environment_setup_locked(env_name: str, wait: bool = True) -> Iterator[bool]:
+    """Holds an exclusive lock on a shared environment while it is set up or deleted, 
+    as projects of the user with an identical specification may set it up concurrently.
+    Environments of projects are not locked.
+
+    Args:
+        env_name (str): Name of environment
+        wait (bool, optional): If False, do not wait for another process holding the lock. Defaults to True.
+
+    Yields:
+        Iterator[bool]: True if the lock is held, False if another process holds it and not waiting
+    """
+    # If environment of project, or lock already held by this process, no need to lock
+    if not env_name.startswith(shared_environment_prefix) or env_name in _shared_environment_setup_locks:
+        yield True
+        return
+
+    file_name = os.path.join(os.path.expanduser(sprinkle_user_dir), env_name + ".lock")
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+
+    with open(file_name, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+
+        _shared_environment_setup_locks.add(env_name)
+        try:
+            yield True
+        finally:
+            _shared_environment_setup_locks.discard(env_name)
+
+
+
+def _is_shared_environment_ready(env_name: str) -> bool:
+    """Checks whether a shared environment was completely set up, and is not being set up again.
+    Environments registered before readiness was recorded are considered ready.
+
+    Args:
+        env_name (str): Name of shared environment
+
+    Returns:
+        bool: True if shared environment is ready, False otherwise
+    """
+    return any(
+        environment.get("ready", True)
+        for environment in _load_shared_environments().values()
+        if environment["env_name"] == env_name
+    )
+
+
+
+def _mark_shared_environment_ready(env_name: str, ready: bool) -> None:
+    """Records whether a shared environment is completely set up. Environments of projects are ignored.
+
+    Args:
+        env_name (str): Name of environment
+        ready (bool): Whether environment is completely set up
+    """
+    if not env_name.startswith(shared_environment_prefix):
+        return
+
+    with _shared_environments_locked() as environments:
+        for environment in environments.values():
+            if environment["env_name"] == env_name:
+                environment["ready"] = ready
+
+
+
+def shared_environment_name(env_file_name: str, req_file_name: str, output: bool = False) -> Optional[str]:
+    """Gets the name of the shared environment of a specification, without registering the project as its user.
+
+    Args:
+        env_file_name (str): File path of environment file
+        req_file_name (str): File path of requirements file
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+
+    Returns:
+        Optional[str]: Name of shared environment, or None if the specification cannot be shared
+    """
+    fingerprint = shared_environment_fingerprint(env_file_name, req_file_name)
+
+    # If specification missing or refers to files of the project, it cannot be shared
+    if fingerprint is None:
+        return None
+
+    if not _is_shareable(env_file_name, req_file_name):
+        if output:
+            print("Specification refers to local files, so using an environment of the project instead of a shared one")
+        return None
+
+
+    return shared_environment_prefix + fingerprint[:16]
+
+
+
+def _is_referenced(reference: list[str], fingerprint: str) -> bool:
+    """Checks whether a project still uses a shared environment.
+    Files that exist but cannot be read, e.g. on a temporarily unreachable file system, keep the reference.
+
+    Args:
+        reference (list[str]): Environment and requirements file of project
+        fingerprint (str): Hash of specification of shared environment
+
+    Returns:
+        bool: False if the project was removed or its specification changed, True otherwise
+    """
+    for index, file_name in enumerate(reference):
+        try:
+            os.stat(file_name)
+        except FileNotFoundError:
+            # Missing environment file means the project was removed, missing requirements file is optional
+            if index == 0:
+                return False
+        except OSError:
+            return True
+
+    fingerprint_current = shared_environment_fingerprint(*reference)
+
+
+    return fingerprint_current is None or fingerprint_current == fingerprint
+
+
+
+def _collect_shared_environments(environments: dict[str, dict[str, Any]], active_job_ids: set[str], output: bool = False) -> list[str]:
+    """Deletes shared environments no project and no active job uses anymore.
+    A reference counts while its files still exist and still specify the environment.
+
+    Args:
+        environments (dict[str, dict[str, Any]]): Shared environments, see _shared_environments_locked
+        active_job_ids (set[str]): IDs of active jobs, without array indices
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+
+    Returns:
+        list[str]: Names of deleted environments
+    """
+    deleted = []
+
+    for fingerprint, environment in list(environments.items()):
+        # Drop references of projects that were removed or whose specification changed
+        environment["references"] = [
+            reference for reference in environment["references"]
+            if _is_referenced(reference, fingerprint)
+        ]
+
+        # Drop jobs that finished, as pending and running jobs still activate the environment
+        environment["jobs"] = [job_id for job_id in environment.get("jobs", []) if job_id in active_job_ids]
+
+        # If still referenced or used by jobs, keep environment
+        if environment["references"] or environment["jobs"]:
+            continue
+
+        # If being set up by another project, keep environment, as waiting for it while holding the shared environments would deadlock
+        with _shared_environment_setup_locked(environment["env_name"], wait=False) as locked:
+            if not locked:
+                continue
+
+            if output:
+                print(f'Deleting shared environment "{environment["env_name"]}" no longer used by any project or job')
+
+            # If removal failed, keep environment, so it is collected again, but not reused while partially removed
+            if not delete_environment(environment["env_name"], output) and exists_environment(environment["env_name"]):
+                environment["ready"] = False
+                continue
+
+            del environments[fingerprint]
+            deleted.append(environment["env_name"])
+
+
+    return deleted
+
+
+
+def collect_shared_environments(active_job_ids: Iterable[str], output: bool = False) -> list[str]:
+    """Deletes shared environments no project and no active job uses anymore
+
+    Args:
+        active_job_ids (Iterable[str]): IDs of active jobs, see get_jobs_active
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+
+    Returns:
+        list[str]: Names of deleted environments
+    """
+    # Jobs are recorded by the ID of their job array
+    active_job_ids = {job_id.split("[")[0] for job_id in active_job_ids}
+
+    with _shared_environments_locked() as environments:
+        return _collect_shared_environments(environments, active_job_ids, output)
+
+
+
+def register_shared_environment(env_file_name: str, req_file_name: str, output: bool = False) -> Optional[str]:
+    """Registers a project as a user of the shared environment of its specification, 
+    releasing the shared environment it used before, which is kept until collect_shared_environments.
+    The shared environment is not set up here, see ensure_environment.
+
+    Args:
+        env_file_name (str): File path of environment file
+        req_file_name (str): File path of requirements file
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+
+    Returns:
+        Optional[str]: Name of shared environment, or None if the specification cannot be shared
+    """
+    env_file_name = os.path.abspath(env_file_name or JobSettings.defaults.env_file())
+    req_file_name = os.path.abspath(req_file_name or JobSettings.defaults.req_file())
+
+    # If specification cannot be shared, use environment of project
+    env_name = shared_environment_name(env_file_name, req_file_name, output)
+    if env_name is None:
+        return None
+
+
+    with _shared_environments_locked() as environments:
+        # Move reference of project to shared environment of its specification
+        reference = [env_file_name, req_file_name]
+        for environment in environments.values():
+            if reference in environment["references"]:
+                environment["references"].remove(reference)
+
+        environment = environments.setdefault(
+            shared_environment_fingerprint(env_file_name, req_file_name), 
+            {"env_name": env_name, "references": [], "ready": False}
+        )
+        environment["references"].append(reference)
+
+
+    return env_name
+
+
+
+def record_shared_environment_jobs(env_name: str, job_ids: list[str]) -> None:
+    """Records jobs submitted with a shared environment, so it is kept while they are active
+
+    Args:
+        env_name (str): Name of shared environment
+        job_ids (list[str]): IDs of submitted jobs
+    """
+    with _shared_environments_locked() as environments:
+        for environment in environments.values():
+            if environment["env_name"] == env_name:
+                environment.setdefault("jobs", []).extend(job_ids)
+
+
+
+def release_shared_environment(env_file_name: str, req_file_name: str, output: bool = False) -> bool:
+    """Releases the shared environment a project uses, which is kept until collect_shared_environments
+
+    Args:
+        env_file_name (str): File path of environment file
+        req_file_name (str): File path of requirements file
+        output (bool, optional): If True, output is printed to stdout. Defaults to False.
+
+    Returns:
+        bool: True if the project used a shared environment, False otherwise
+    """
+    reference = [
+        os.path.abspath(env_file_name or JobSettings.defaults.env_file()), 
+        os.path.abspath(req_file_name or JobSettings.defaults.req_file())
+    ]
+    released = False
+
+
+    with _shared_environments_locked() as environments:
+        # Remove reference of project
+        for environment in environments.values():
+            if reference in environment["references"]:
+                environment["references"].remove(reference)
+                released = True
+
+                if output:
+                    print(f'Released shared environment "{environment["env_name"]}", used by {len(environment["references"])} other project(s)')
+
+
+    return released
 
 
 
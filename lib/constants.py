@@ -1,6 +1,16 @@
 sprinkle_project_dir = ".sprinkle"
 sprinkle_project_settings_file = "settings.pkl"
 sprinkle_project_settings_export_file = "sprinkle-job-export.sh"
+sprinkle_project_status_cache_file = "status.pkl"
 sprinkle_project_output_dir = sprinkle_project_dir + "/output"
 sprinkle_project_log_dir = sprinkle_project_dir + "/log"
-sprinkle_project_error_dir = sprinkle_project_dir + "/error"
\ No newline at end of file
+sprinkle_project_error_dir = sprinkle_project_dir + "/error"
+sprinkle_project_history_file = sprinkle_project_dir + "/history.db"
+sprinkle_project_job_files_file = sprinkle_project_dir + "/files.db"
+sprinkle_project_summary_file = sprinkle_project_dir + "/summary.db"
+sprinkle_project_progress_file = sprinkle_project_dir + "/progress.db"
+sprinkle_project_environments_file = sprinkle_project_dir + "/environments.json"
+sprinkle_project_packed_dir = sprinkle_project_dir + "/packed"
+
+sprinkle_user_dir = "~/.sprinkle"
+sprinkle_user_shared_environments_file = sprinkle_user_dir + "/shared-environments.json"
@@ -0,0 +1,251 @@
+from typing import Optional, BinaryIO
+from collections import deque
+import ctypes
+import ctypes.util
+import select
+import sys
+import os
+
+from constants import sprinkle_project_output_dir, sprinkle_project_log_dir, sprinkle_project_error_dir
+from compress import is_compressed, resolve_file, open_text
+
+
+
+# inotify events signalling that files were written or created
+inotify_mask = 0x00000002 | 0x00000100 | 0x00000080     # IN_MODIFY | IN_CREATE | IN_MOVED_TO
+
+# Bytes read from the end of a file at a time when searching for its last lines
+tail_block_size = 8192
+
+
+
+class FollowedFile:
+    """A file that is followed, which may not exist yet"""
+    __slots__ = ["path", "prefix", "file", "position", "partial", "pending"]
+
+
+    def __init__(self, path: str, prefix: str) -> None:
+        """
+        Args:
+            path (str): Path of file
+            prefix (str): Prefix of each line printed from file
+        """
+        self.path = path
+        self.prefix = prefix
+        self.file: Optional[BinaryIO] = None
+        self.position = 0
+        self.partial = b""
+        self.pending: Optional[list[str]] = None
+
+
+    def open(self, lines: Optional[int]) -> bool:
+        """Open file if it exists, starting from its last lines
+
+        Args:
+            lines (Optional[int]): Number of last lines to start from, or None to start from the beginning
+
+        Returns:
+            bool: Whether file is open
+        """
+        if self.file is None and self.pending is None:
+            path = resolve_file(self.path)
+            if path is None:
+                return False
+
+            # Compressed files belong to finished jobs, so read their last lines once
+            if is_compressed(path):
+                try:
+                    with open_text(path) as file:
+                        self.pending = [line.rstrip("\r\n") for line in deque(file, maxlen=lines)]
+                except (OSError, EOFError):
+                    return False
+
+                return True
+
+            try:
+                self.file = open(path, "rb")
+            except OSError:
+                return False
+
+            self.position = tail_offset(self.file, lines) if lines is not None else 0
+
+        return True
+
+
+    def read(self) -> list[str]:
+        """Read complete lines written since last read
+
+        Returns:
+            list[str]: New lines without line endings
+        """
+        # If compressed, return its lines once
+        if self.pending is not None:
+            lines, self.pending = self.pending, []
+            return lines
+
+        # If file was truncated, start over
+        size = os.fstat(self.file.fileno()).st_size
+        if size < self.position:
+            self.position = 0
+            self.partial = b""
+
+        # If nothing new, return nothing
+        if size == self.position:
+            return []
+
+
+        # Read new data, keeping incomplete last line for next read
+        self.file.seek(self.position)
+        data = self.partial + self.file.read(size - self.position)
+        self.position = self.file.tell()
+
+        *lines, self.partial = data.split(b"\n")
+
+
+        return [line.decode(errors="replace").rstrip("\r") for line in lines]
+
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+
+def tail_offset(file: BinaryIO, lines: int) -> int:
+    """Find the offset of the last lines of a file by reading blocks backwards from its end
+
+    Args:
+        file (BinaryIO): File opened in binary mode
+        lines (int): Number of last lines
+
+    Returns:
+        int: Offset where the last lines start
+    """
+    position = file.seek(0, os.SEEK_END)
+    if lines <= 0:
+        return position
+
+    # Ignore line ending of last line
+    newlines = 0
+    if position > 0:
+        file.seek(position - 1)
+        newlines = -1 if file.read(1) == b"\n" else 0
+
+
+    # Count line endings backwards until enough lines are found
+    while position > 0:
+        size = min(tail_block_size, position)
+        position -= size
+        file.seek(position)
+        block = file.read(size)
+
+        for index in range(len(block) - 1, -1, -1):
+            if block[index] == ord("\n"):
+                newlines += 1
+                if newlines == lines:
+                    return position + index + 1
+
+
+    return 0
+
+
+
+def _inotify_open(directories: list[str]) -> Optional[int]:
+    """Watch directories for written and created files with inotify
+
+    Args:
+        directories (list[str]): Directories to watch
+
+    Returns:
+        Optional[int]: File descriptor that becomes readable on events, or None if inotify is unavailable
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        descriptor = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError, TypeError):
+        return None
+
+    if descriptor < 0:
+        return None
+
+
+    for directory in directories:
+        if os.path.isdir(directory):
+            libc.inotify_add_watch(descriptor, os.fsencode(directory), inotify_mask)
+
+
+    return descriptor
+
+
+
+def _wait(descriptor: Optional[int], timeout: float) -> None:
+    """Wait until inotify reports events or timeout passes
+
+    Args:
+        descriptor (Optional[int]): inotify file descriptor, or None to only wait for timeout
+        timeout (float): Maximum seconds to wait
+    """
+    # Without inotify, poll
+    if descriptor is None:
+        select.select([], [], [], timeout)
+        return
+
+    # Wait for events and discard them, as all files are checked anyway
+    readable, _, _ = select.select([descriptor], [], [], timeout)
+    if readable:
+        try:
+            while os.read(descriptor, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+
+
+def follow_files(files: list[tuple[str, str]], lines: int = 10, interval: float = 1) -> int:
+    """Follow files until interrupted, printing new lines of all files interleaved with their prefixes.
+    Files that do not exist yet are followed from their beginning once they appear.
+    Wakes up on inotify events, and also polls as network filesystems do not report remote writes.
+
+    Args:
+        files (list[tuple[str, str]]): Paths of files to follow and the prefix of their lines
+        lines (int, optional): Number of last lines of each file to print first. Defaults to 10.
+        interval (float, optional): Maximum seconds between checks for new lines. Defaults to 1.
+
+    Returns:
+        int: 0 meaning success. Always.
+    """
+    followed = [FollowedFile(path, prefix) for path, prefix in files]
+    descriptor = _inotify_open([sprinkle_project_output_dir, sprinkle_project_log_dir, sprinkle_project_error_dir])
+
+
+    # Files existing from the start begin at their last lines
+    lines_start = lines
+
+    try:
+        while True:
+            # Print new lines of files that exist
+            for file in followed:
+                if not file.open(lines_start):
+                    continue
+
+                new_lines = file.read()
+                if new_lines:
+                    sys.stdout.write("".join(f"{file.prefix}{line}\n" for line in new_lines))
+
+            sys.stdout.flush()
+            lines_start = None
+
+            # Wait for changes
+            _wait(descriptor, interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for file in followed:
+            file.close()
+
+        if descriptor is not None:
+            os.close(descriptor)
+
+
+    return 0
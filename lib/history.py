@@ -0,0 +1,225 @@
+from typing import Optional, Any
+from dataclasses import dataclass
+import sqlite3
+import json
+import time
+import os
+
+from constants import sprinkle_project_dir, sprinkle_project_history_file
+from lsf_log import JobAccounting, read_log
+
+
+
+@dataclass(frozen=True)
+class JobHistory:
+    job_id: str
+    name: str
+    queue: str
+    script: str
+    args: list[str]
+    settings: dict[str, Any]
+    log_file: str
+    time_submit: float
+    accounting: Optional[JobAccounting] = None
+
+
+
+history_schema = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id          TEXT PRIMARY KEY,
+    name            TEXT NOT NULL,
+    queue           TEXT NOT NULL,
+    script          TEXT NOT NULL,
+    args            TEXT NOT NULL,
+    settings        TEXT NOT NULL,
+    log_file        TEXT NOT NULL,
+    time_submit     REAL NOT NULL,
+
+    status          TEXT,
+    exit_code       INTEGER,
+    time_cpu        REAL,
+    time_run        INTEGER,
+    mem_max         INTEGER,
+    mem_avg         INTEGER,
+    mem_requested   INTEGER,
+    time_start      REAL,
+    time_end        REAL
+);
+
+CREATE INDEX IF NOT EXISTS jobs_time_submit ON jobs (time_submit);
+CREATE INDEX IF NOT EXISTS jobs_name ON jobs (name, time_submit);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (queue, time_submit);
+CREATE INDEX IF NOT EXISTS jobs_exit_code ON jobs (exit_code, time_submit);
+CREATE INDEX IF NOT EXISTS jobs_unfinished ON jobs (job_id) WHERE status IS NULL;
+"""
+
+# Columns of accounting in the order of JobAccounting
+history_accounting_columns = [
+    "status", "exit_code", "time_cpu", "time_run", "mem_max", "mem_avg", "mem_requested", "time_start", "time_end"
+]
+
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """Connect to the project's job history database, creating it if necessary
+
+    Returns:
+        Optional[sqlite3.Connection]: Connection, or None if not in a project directory
+    """
+    # If not in a project directory, do not create one just for the history
+    if not os.path.isdir(sprinkle_project_dir):
+        return None
+
+    connection = sqlite3.connect(sprinkle_project_history_file, timeout=30)
+    connection.executescript(history_schema)
+
+    return connection
+
+
+
+def _to_job_history(row: tuple) -> JobHistory:
+    job_id, name, queue, script, args, settings, log_file, time_submit, *accounting = row
+
+    return JobHistory(
+        job_id=job_id,
+        name=name,
+        queue=queue,
+        script=script,
+        args=json.loads(args),
+        settings=json.loads(settings),
+        log_file=log_file,
+        time_submit=time_submit,
+        accounting=JobAccounting(*accounting) if accounting[0] is not None else None
+    )
+
+
+
+def record_job_submission(job_id: str, name: str, queue: str, script: str, args: list[str], settings: dict[str, Any], log_file: str) -> None:
+    """Record a submitted job in the job history
+
+    Args:
+        job_id (str): Job ID
+        name (str): Job name
+        queue (str): Queue job was submitted to
+        script (str): Job script
+        args (list[str]): Arguments passed to job script
+        settings (dict[str, Any]): Job settings used for submission
+        log_file (str): Path to LSF log file of job
+    """
+    # History is best effort, so never fail a submission because of it
+    try:
+        connection = _connect()
+        if connection is None:
+            return
+
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, name, queue, script, args, settings, log_file, time_submit) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, name, queue, script, json.dumps(args), json.dumps(settings), log_file, time.time())
+            )
+        connection.close()
+    except sqlite3.Error as error:
+        print(f"WARNING: Failed recording job in history: {error}")
+
+
+
+def update_job_accounting() -> int:
+    """Record accounting of finished jobs from their LSF log files
+
+    Returns:
+        int: Number of jobs whose accounting was recorded
+    """
+    connection = _connect()
+    if connection is None:
+        return 0
+
+
+    # Parse log files of unfinished jobs
+    updates = []
+    for job_id, log_file in connection.execute("SELECT job_id, log_file FROM jobs WHERE status IS NULL"):
+        accounting = read_log(log_file)
+        if accounting is not None:
+            updates.append((*[getattr(accounting, column) for column in history_accounting_columns], job_id))
+
+
+    # Store accounting of finished jobs
+    with connection:
+        connection.executemany(
+            f"UPDATE jobs SET {', '.join(f'{column} = ?' for column in history_accounting_columns)} WHERE job_id = ?",
+            updates
+        )
+    connection.close()
+
+
+    return len(updates)
+
+
+
+def query_job_history(
+    name: Optional[str] = None,
+    queue: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    exit_code: Optional[int] = None,
+    failed: bool = False,
+    limit: Optional[int] = None
+) -> list[JobHistory]:
+    """Query job history, newest first
+
+    Args:
+        name (Optional[str], optional): Wildcard pattern job name must match. Defaults to None.
+        queue (Optional[str], optional): Queue job must have been submitted to. Defaults to None.
+        since (Optional[float], optional): Earliest submission time in seconds since epoch. Defaults to None.
+        until (Optional[float], optional): Latest submission time in seconds since epoch. Defaults to None.
+        exit_code (Optional[int], optional): Exit code finished job must have. Defaults to None.
+        failed (bool, optional): Whether to only include failed jobs. Defaults to False.
+        limit (Optional[int], optional): Maximum number of jobs. Defaults to None.
+
+    Returns:
+        list[JobHistory]: Jobs matching all conditions
+    """
+    connection = _connect()
+    if connection is None:
+        return []
+
+
+    # Build conditions
+    conditions = []
+    parameters = []
+
+    if name is not None:
+        conditions.append("name GLOB ?")
+        parameters.append(name)
+    if queue is not None:
+        conditions.append("queue = ?")
+        parameters.append(queue)
+    if since is not None:
+        conditions.append("time_submit >= ?")
+        parameters.append(since)
+    if until is not None:
+        conditions.append("time_submit <= ?")
+        parameters.append(until)
+    if exit_code is not None:
+        conditions.append("exit_code = ?")
+        parameters.append(exit_code)
+    if failed:
+        conditions.append("exit_code != 0")
+
+    if limit is not None:
+        parameters.append(limit)
+
+
+    # Query jobs
+    rows = connection.execute(
+        "SELECT job_id, name, queue, script, args, settings, log_file, time_submit, " +
+            ", ".join(history_accounting_columns) + " FROM jobs" +
+            (" WHERE " + " AND ".join(conditions) if conditions else "") +
+            " ORDER BY time_submit DESC" +
+            (" LIMIT ?" if limit is not None else ""),
+        parameters
+    ).fetchall()
+    connection.close()
+
+
+    # Return jobs
+    return [_to_job_history(row) for row in rows]
@@ -0,0 +1,485 @@
+from typing import Optional, Literal
+from dataclasses import dataclass, replace
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+import time
+import os
+import re
+
+from constants import sprinkle_project_dir, sprinkle_project_job_files_file, sprinkle_project_output_dir, sprinkle_project_log_dir, sprinkle_project_error_dir
+from compress import is_compressed, resolve_file, compress_files
+from lsf_log import read_log
+
+
+
+@dataclass(frozen=True)
+class JobFiles:
+    job_id: str
+    output: Optional[str] = None
+    log: Optional[str] = None
+    error: Optional[str] = None
+
+
+
+@dataclass(frozen=True)
+class JobFilesCompaction:
+    jobs: int
+    files: int
+    bytes_before: int
+    bytes_after: int
+    errors: dict[str, str]
+
+
+
+@dataclass(frozen=True)
+class JobFilesDeletion:
+    jobs: list[JobFiles]
+    files: int
+    bytes: int
+    errors: dict[str, str]
+
+
+
+job_files_schema = """
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id  TEXT PRIMARY KEY,
+    output  TEXT,
+    log     TEXT,
+    error   TEXT
+);
+
+CREATE TABLE IF NOT EXISTS job_files_rebuilt (
+    id      INTEGER PRIMARY KEY CHECK (id = 0),
+    time    REAL NOT NULL
+);
+"""
+
+# Minimum seconds between rebuilds of a non-empty index caused by jobs missing from it
+job_files_rebuild_interval = 60
+
+# File types mapped to the directories holding them
+job_files_dirs = {
+    "output": sprinkle_project_output_dir,
+    "log": sprinkle_project_log_dir,
+    "error": sprinkle_project_error_dir,
+}
+
+# File names of jobs, e.g. "1234-name.txt" or "1234_3-name.txt.gz" for compressed array jobs
+job_file_name_pattern = re.compile(r"(\d+)(?:_(\d+))?-(.*)\.txt(?:\.gz|\.zst)?")
+
+
+
+def job_file_id(job_id: str) -> str:
+    """Get the identifier used in file names of a job.
+    Array jobs (e.g. "1234[3]") are identified by job id and index (e.g. "1234_3").
+
+    Args:
+        job_id (str): Job ID, optionally with array index
+
+    Returns:
+        str: Identifier used in file names
+    """
+    return re.sub(r"\[(\d+)\]$", r"_\1", job_id)
+
+
+
+def job_file_name(path: str) -> Optional[str]:
+    """Get the job name from the path of a job file
+
+    Args:
+        path (str): Path of output, log, or error file
+
+    Returns:
+        Optional[str]: Job name, or None if not a job file
+    """
+    match = job_file_name_pattern.fullmatch(os.path.basename(path))
+    return match.group(3) if match else None
+
+
+
+def job_file_paths(job_id: str, name: str) -> JobFiles:
+    """Get the output, log, and error file paths of a job
+
+    Args:
+        job_id (str): Job ID, optionally with array index
+        name (str): Job name
+
+    Returns:
+        JobFiles: File paths of job
+    """
+    file_name = f"{job_file_id(job_id)}-{name}.txt"
+
+    return JobFiles(job_id, **{type: f"{directory}/{file_name}" for type, directory in job_files_dirs.items()})
+
+
+
+def _job_id_order(job_id: str) -> list[int]:
+    """Sort key ordering jobs by job id and then array index"""
+    return [int(part) for part in re.findall(r"\d+", job_id)]
+
+
+
+def _modified_time(path: str) -> float:
+    """Get modification time of a file, or its compressed version, in seconds since epoch"""
+    return os.path.getmtime(resolve_file(path) or path)
+
+
+def _file_size(path: str) -> int:
+    """Get size of a file in bytes, or 0 if it was removed meanwhile (e.g. by a concurrent clean)"""
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """Connect to the project's job file index, creating it if necessary
+
+    Returns:
+        Optional[sqlite3.Connection]: Connection, or None if not in a project directory
+    """
+    # If not in a project directory, do not create one just for the index
+    if not os.path.isdir(sprinkle_project_dir):
+        return None
+
+    connection = sqlite3.connect(sprinkle_project_job_files_file, timeout=30)
+    connection.executescript(job_files_schema)
+
+    return connection
+
+
+
+def _rebuild_due(connection: sqlite3.Connection) -> bool:
+    """Check whether jobs missing from the index warrant rebuilding it, 
+    which is if the index is empty, or if it has not been rebuilt recently.
+    NOTE: Jobs of other projects or of purged files are never found, so rebuilding every time would scan every time
+    """
+    if connection.execute("SELECT 1 FROM job_files LIMIT 1").fetchone() is None:
+        return True
+
+    row = connection.execute("SELECT time FROM job_files_rebuilt").fetchone()
+    return row is None or time.time() - row[0] >= job_files_rebuild_interval
+
+
+
+def record_job_files(jobs: list[JobFiles]) -> None:
+    """Record file paths of jobs in the job file index
+
+    Args:
+        jobs (list[JobFiles]): File paths of jobs
+    """
+    # Index is rebuildable, so never fail a submission because of it
+    try:
+        connection = _connect()
+        if connection is None:
+            return
+
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO job_files (job_id, output, log, error) VALUES (?, ?, ?, ?)",
+                [(job.job_id, job.output, job.log, job.error) for job in jobs]
+            )
+        connection.close()
+    except sqlite3.Error as error:
+        print(f"WARNING: Failed recording job files in index: {error}")
+
+
+
+def rebuild_job_files() -> int:
+    """Rebuild the job file index by scanning the output, log, and error directories
+
+    Returns:
+        int: Number of jobs in rebuilt index
+    """
+    # Group files of each job by type
+    jobs: dict[str, dict[str, str]] = {}
+    for type, directory in job_files_dirs.items():
+        if not os.path.isdir(directory):
+            continue
+
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                match = job_file_name_pattern.fullmatch(entry.name)
+                if not match:
+                    continue
+
+                job_id = match.group(1) if match.group(2) is None else f"{match.group(1)}[{match.group(2)}]"
+                jobs.setdefault(job_id, {})[type] = f"{directory}/{entry.name}"
+
+
+    # Store found files, keeping indexed files whose jobs have not yet created them
+    connection = _connect()
+    if connection is None:
+        return 0
+
+    with connection:
+        connection.execute("INSERT OR REPLACE INTO job_files_rebuilt (id, time) VALUES (0, ?)", (time.time(),))
+        connection.executemany(
+            "INSERT INTO job_files (job_id, output, log, error) VALUES (:job_id, :output, :log, :error) " +
+                "ON CONFLICT (job_id) DO UPDATE SET " +
+                "output = COALESCE(excluded.output, output), log = COALESCE(excluded.log, log), error = COALESCE(excluded.error, error)",
+            [{"job_id": job_id, "output": None, "log": None, "error": None, **files} for job_id, files in jobs.items()]
+        )
+    count = connection.execute("SELECT COUNT(*) FROM job_files").fetchone()[0]
+    connection.close()
+
+
+    return count
+
+
+
+def get_job_files(job_id: str, rebuild: bool = True) -> Optional[JobFiles]:
+    """Get file paths of a job from the job file index
+
+    Args:
+        job_id (str): Job ID, optionally with array index
+        rebuild (bool, optional): Whether to rebuild the index if the job is missing and a rebuild is due. Defaults to True.
+
+    Returns:
+        Optional[JobFiles]: File paths of job, or None if job is unknown
+    """
+    connection = _connect()
+    if connection is None:
+        return None
+
+    row = connection.execute("SELECT job_id, output, log, error FROM job_files WHERE job_id = ?", (job_id,)).fetchone()
+    rebuild = rebuild and row is None and _rebuild_due(connection)
+    connection.close()
+
+
+    # If job is missing, index may be lost or stale, so rebuild and retry once
+    if row is None:
+        if rebuild and rebuild_job_files() > 0:
+            return get_job_files(job_id, rebuild=False)
+
+        return None
+
+
+    return JobFiles(*row)
+
+
+
+def find_job_files(job_ids: list[str], rebuild: bool = True) -> list[JobFiles]:
+    """Get file paths of jobs from the job file index, where job array ids (e.g. "1234") include all their jobs
+
+    Args:
+        job_ids (list[str]): Job IDs, optionally with array index
+        rebuild (bool, optional): Whether to rebuild the index if jobs are missing and a rebuild is due. Defaults to True.
+
+    Returns:
+        list[JobFiles]: File paths of found jobs, in the order of job_ids and then array index
+    """
+    connection = _connect()
+    if connection is None:
+        return []
+
+    # Find job or jobs of job array
+    def query(job_id: str) -> list[JobFiles]:
+        rows = connection.execute(
+            "SELECT job_id, output, log, error FROM job_files WHERE job_id = ? OR job_id LIKE ?", 
+            (job_id, f"{job_id}[%")
+        ).fetchall()
+        rows.sort(key=lambda row: _job_id_order(row[0]))
+
+        return [JobFiles(*row) for row in rows]
+
+
+    # If any jobs are missing, index may be lost or stale, so rebuild and retry once
+    found = [query(job_id) for job_id in job_ids]
+    if rebuild and any(len(jobs) == 0 for jobs in found) and _rebuild_due(connection) and rebuild_job_files() > 0:
+        found = [query(job_id) for job_id in job_ids]
+
+    connection.close()
+
+
+    return [job for jobs in found for job in jobs]
+
+
+
+def list_job_files() -> list[JobFiles]:
+    """Get file paths of all jobs, rebuilding the job file index first to include files of any job
+
+    Returns:
+        list[JobFiles]: File paths of all jobs, ordered by job id and then array index
+    """
+    rebuild_job_files()
+
+    connection = _connect()
+    if connection is None:
+        return []
+
+    rows = connection.execute("SELECT job_id, output, log, error FROM job_files").fetchall()
+    connection.close()
+
+    rows.sort(key=lambda row: _job_id_order(row[0]))
+
+
+    return [JobFiles(*row) for row in rows]
+
+
+
+def compress_finished_job_files(
+    job_active_ids: set[str], 
+    format: Literal["gzip", "zstd"] = "gzip", 
+    rebuild: bool = True, 
+    workers: int = 4
+) -> JobFilesCompaction:
+    """Compress output, log, and error files of finished jobs.
+    A job is finished once LSF has written its resource usage summary to its log file, and it is not active.
+
+    Args:
+        job_active_ids (set[str]): IDs of active jobs, whose files are never compressed
+        format (Literal["gzip", "zstd"], optional): Compression format. Defaults to "gzip".
+        rebuild (bool, optional): Whether to rebuild the job file index first to include files of any job. Defaults to True.
+        workers (int, optional): Maximum files compressed concurrently. Defaults to 4.
+
+    Returns:
+        JobFilesCompaction: Summary of compressed files
+    """
+    if rebuild:
+        rebuild_job_files()
+
+    connection = _connect()
+    if connection is None:
+        return JobFilesCompaction(0, 0, 0, 0, {})
+
+    # Find jobs with uncompressed files
+    rows = connection.execute(
+        "SELECT job_id, output, log, error FROM job_files WHERE " + 
+            " OR ".join(f"({type} IS NOT NULL AND {type} NOT LIKE '%.gz' AND {type} NOT LIKE '%.zst')" for type in job_files_dirs)
+    ).fetchall()
+    connection.close()
+
+
+    # Find uncompressed files of finished jobs
+    jobs: list[JobFiles] = []
+    paths: list[str] = []
+    for row in rows:
+        job = JobFiles(*row)
+        if job.job_id in job_active_ids or job.log is None or read_log(job.log) is None:
+            continue
+
+        jobs.append(job)
+        paths += [
+            path for type in job_files_dirs 
+            if (path := resolve_file(getattr(job, type) or "")) is not None and not is_compressed(path)
+        ]
+
+
+    # Compress files
+    bytes_before = sum(os.path.getsize(path) for path in paths)
+    compressed, errors = compress_files(paths, format, workers)
+    bytes_after = sum(os.path.getsize(path) for path in compressed.values())
+    bytes_before -= sum(os.path.getsize(path) for path in errors if os.path.isfile(path))
+
+
+    # Point index to compressed files, including files compressed earlier
+    record_job_files([
+        replace(job, **{
+            type: resolve_file(path) or path
+            for type in job_files_dirs
+            if (path := getattr(job, type)) is not None
+        })
+        for job in jobs
+    ])
+
+
+    return JobFilesCompaction(len(jobs), len(compressed), bytes_before, bytes_after, errors)
+
+
+
+def delete_finished_job_files(
+    job_active_ids: set[str],
+    keep_last: Optional[int] = None,
+    keep_since: Optional[float] = None,
+    keep_failed: bool = False,
+    dry_run: bool = False,
+    batch_size: int = 200,
+    workers: int = 4
+) -> JobFilesDeletion:
+    """Delete output, log, and error files of finished jobs, except those kept by retention policies.
+    A job is finished once LSF has written its resource usage summary to its log file, and it is not active.
+
+    Args:
+        job_active_ids (set[str]): IDs of active jobs, whose files are never deleted
+        keep_last (Optional[int], optional): Number of most recently submitted finished jobs to keep. Defaults to None.
+        keep_since (Optional[float], optional): Keep jobs that finished since this time in seconds since epoch. Defaults to None.
+        keep_failed (bool, optional): Whether to keep jobs that failed. Defaults to False.
+        dry_run (bool, optional): Whether to only find files that would be deleted. Defaults to False.
+        batch_size (int, optional): Files deleted by each task. Defaults to 200.
+        workers (int, optional): Maximum batches deleted concurrently. Defaults to 4.
+
+    Returns:
+        JobFilesDeletion: Summary of deleted files
+    """
+    jobs_all = list_job_files()
+
+    # Read accounting of jobs that may be finished, in parallel as reading is bound by the file system
+    jobs_inactive = [job for job in jobs_all if job.job_id not in job_active_ids and job.log is not None]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs_inactive)))) as executor:
+        accountings = list(executor.map(lambda job: read_log(job.log), jobs_inactive))
+
+    jobs_finished = [(job, accounting) for job, accounting in zip(jobs_inactive, accountings) if accounting is not None]
+
+
+    # Apply retention policies, where jobs are ordered by submission
+    jobs_finished = jobs_finished[:-keep_last] if keep_last else jobs_finished
+
+    if keep_since is not None:
+        jobs_finished = [
+            (job, accounting) for job, accounting in jobs_finished 
+            if (accounting.time_end or _modified_time(job.log)) < keep_since
+        ]
+    if keep_failed:
+        jobs_finished = [(job, accounting) for job, accounting in jobs_finished if accounting.exit_code == 0]
+
+
+    # Find files of jobs to delete
+    jobs = [job for job, _ in jobs_finished]
+    jobs_paths = {
+        job.job_id: [path for type in job_files_dirs if (path := resolve_file(getattr(job, type) or "")) is not None]
+        for job in jobs
+    }
+    paths = [path for job_paths in jobs_paths.values() for path in job_paths]
+    bytes = sum(_file_size(path) for path in paths)
+
+    if dry_run:
+        return JobFilesDeletion(jobs, len(paths), bytes, {})
+
+
+    # Delete files in batches, in parallel as deleting is bound by the latency of the file system
+    def delete(batch: list[str]) -> dict[str, str]:
+        errors = {}
+        for path in batch:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as error:
+                errors[path] = str(error)
+
+        return errors
+
+
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as executor:
+        for batch_errors in executor.map(delete, batches):
+            errors.update(batch_errors)
+
+    bytes -= sum(_file_size(path) for path in errors)
+
+
+    # Remove jobs whose files were all deleted from index
+    connection = _connect()
+    if connection is not None:
+        with connection:
+            connection.executemany(
+                "DELETE FROM job_files WHERE job_id = ?",
+                [(job_id,) for job_id, job_paths in jobs_paths.items() if not any(path in errors for path in job_paths)]
+            )
+        connection.close()
+
+
+    return JobFilesDeletion(jobs, len(paths) - len(errors), bytes, errors)
@@ -1,14 +1,23 @@
 from typing import Optional, Literal, Callable
-from dataclasses import dataclass, replace
+from dataclasses import dataclass, asdict
 from itertools import islice
 import pickle
+import json
 import os
+import time
 import subprocess
+import shlex
+import shutil
+import sys
 import re
+from concurrent.futures import ThreadPoolExecutor
 
-from varname import nameof
-
-from constants import sprinkle_project_dir, sprinkle_project_settings_file, sprinkle_project_log_dir, sprinkle_project_error_dir, sprinkle_project_output_dir
+from history import record_job_submission
+from job_files import record_job_files, job_file_paths, get_job_files
+from follow import follow_files
+from compress import is_compressed, resolve_file, open_file
+from view import write_range
+from constants import sprinkle_project_dir, sprinkle_project_settings_file, sprinkle_project_status_cache_file, sprinkle_project_log_dir, sprinkle_project_error_dir, sprinkle_project_output_dir, sprinkle_project_packed_dir
 
 
 
@@ -31,10 +40,27 @@ class JobSettings:
     env_name: str                          = ""
     
     env_on_done_delete: bool               = False
+    env_solver: str                        = "" # "conda", "mamba", or "micromamba", empty auto-detects
+    env_installer: str                     = "" # "pip" or "uv", empty auto-detects
+    env_packed: bool                       = False # Pack environment upon setup, and unpack it to node-local disk in jobs
+    env_shared: bool                       = False # Reuse environment of identical specification across projects, instead of env_name
 
     email: str                             = ""
+
+    status_cache_ttl: int                  = 5 # Seconds, 0 disables caching
+
+    compress_finished: bool                = False # Compress files of finished jobs upon status
+    compress_format: str                   = "gzip" # "gzip" or "zstd"
+
+    output_buffering: str                  = "block" # "block" or "line"
+    output_timestamps: bool                = False # Prefix output lines with time, requires line buffering
+
+    stage_in: str                          = "" # Comma separated paths copied to node-local scratch before job
+    stage_out: str                         = "" # Comma separated paths in scratch copied back when job exits
+
+    progress_pattern: str                  = "" # Regular expression of progress in job output, empty matches x/y
     
-    version: str                           = "4"
+    version: str                           = "12"
     
     
     class defaults:
@@ -60,8 +86,31 @@ class JobDetails:
     mem_usage: Optional[str] = None
     mem_usage_avg: Optional[str] = None
     mem_usage_max: Optional[str] = None
+    time_submit: Optional[str] = None
+
+
+class JobSubmissionError(Exception):
+    """Raised when LSF does not accept a job submission"""
+
 
 
+# Seconds between flushes of line buffered job output to its file
+output_flush_interval = 1
+
+# Script that flushes job output in batches, run inside jobs
+output_flusher_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output_flusher.py")
+
+# Node-local directory packed environments are unpacked to, shared by jobs of the user on the node
+# NOTE: Not $TMPDIR, as LSF may give each job its own, which would unpack for every job
+packed_environment_cache_dir = "/tmp/sprinkle-$(id -un)/environments"
+
+
+# Fields retrieved from bjobs to populate job details
+bjobs_fields = [
+    "jobid", "jobindex", "job_name", "queue", "stat", "submit_time", "start_time", "run_time", 
+    "cpu_efficiency", "mem", "avg_mem", "max_mem"
+]
+
 
 
 def save_settings(settings: JobSettings) -> None:
@@ -106,34 +155,98 @@ def load_settings() -> Optional[JobSettings]:
 
 
 
-def submit_job(settings: JobSettings, args: list[str] = []) -> str:
+def split_paths(paths: str) -> list[str]:
+    """Split comma separated paths of a job setting
+
+    Args:
+        paths (str): Comma separated paths, e.g. "data/train, data/test"
+
+    Returns:
+        list[str]: Paths without surrounding whitespace, skipping empty paths
+    """
+    return [path.strip() for path in paths.split(",") if path.strip()]
+
+
+
+def packed_environment_file(env_name: str) -> str:
+    """Get the path of the archive of a packed environment
+
+    Args:
+        env_name (str): Name of environment
+
+    Returns:
+        str: Absolute path of archive, which may not exist
+    """
+    return os.path.abspath(f"{sprinkle_project_packed_dir}/{env_name}.tar.gz")
+
+
+
+def submit_job(settings: JobSettings, args: list[str] = [], sweep: Optional[list[list[str]]] = None) -> str:
     """Submit a job to the cluster and return the job id
     
     Args:
         settings (JobSettings): Settings for the job
         args (list[str], optional): Arguments to pass to the job. Defaults to [].
+        sweep (Optional[list[list[str]]], optional): Additional arguments of each job in a job array. 
+            Defaults to None which submits a single job.
+    
+    Raises:
+        JobSubmissionError: If the job was not submitted
     
     Returns:
         str: Job id
     """
-    
-    #TODO: Error if job submission failed
-    
     # If sprinkle directories do not exist for project, create them
     for dir in [sprinkle_project_log_dir, sprinkle_project_error_dir, sprinkle_project_output_dir]:
-        if not os.path.isdir(dir):
-            os.makedirs(dir)
+        os.makedirs(dir, exist_ok=True)
     
+    # Job list is about to change, so invalidate cached job status
+    invalidate_jobs_active_cache()
+
     # Submit job script and save stdout
-    submission = subprocess.run(
-        ["bsub"], 
-        stdout=subprocess.PIPE, 
-        input=generate_bsub_script(settings, args),
-        encoding="ascii"
-    )
+    try:
+        submission = subprocess.run(
+            ["bsub"], 
+            stdout=subprocess.PIPE, 
+            stderr=subprocess.PIPE,
+            input=generate_bsub_script(settings, args, sweep),
+            encoding="ascii",
+            errors="replace"
+        )
+    except OSError as error:
+        raise JobSubmissionError(str(error)) from error
+    # Job list changed, so invalidate job status cached meanwhile, e.g. by a concurrent status
+    finally:
+        invalidate_jobs_active_cache()
     
-    # Retrieve job id
-    job_id = re.search("Job <(\d+)>", submission.stdout).group(1)
+    # Retrieve job id, if missing, submission failed
+    match = re.search(r"Job <(\d+)>", submission.stdout)
+    if not match:
+        raise JobSubmissionError((submission.stderr.strip() or submission.stdout.strip()) or f"bsub exited with code {submission.returncode}")
+
+    job_id = match.group(1)
+
+
+    # Record submission of each job in job history
+    name = settings.name or JobSettings.defaults.name()
+    jobs = [(job_id, args)] if sweep is None else [
+        (f"{job_id}[{index}]", args + sweep_args) 
+        for index, sweep_args in enumerate(sweep, start=1)
+    ]
+
+    files = [job_file_paths(job_element_id, name) for job_element_id, _ in jobs]
+    record_job_files(files)
+
+    for (job_element_id, job_args), job_files in zip(jobs, files):
+        record_job_submission(
+            job_id=job_element_id,
+            name=name,
+            queue=settings.queue,
+            script=settings.script,
+            args=job_args,
+            settings=asdict(settings),
+            log_file=job_files.log
+        )
 
 
     # Return new submission job id
@@ -141,65 +254,263 @@ def submit_job(settings: JobSettings, args: list[str] = []) -> str:
 
 
 
-def kill_jobs(job_ids: list[str]) -> tuple[list[str], list[str]]:
-    """Kill jobs by job id
+def _parse_kill_output(output: str) -> tuple[list[str], list[str]]:
+    """Parse output of bkill
     
     Args:
-        job_ids (list[str]): List of job ids to kill
+        output (str): Output of bkill
     
     Returns:
         tuple[list[str], list[str]]: Tuple of (killed job ids, not killed job ids)
     """
-    
-    # If no jobs to kill, return nothing
-    if len(job_ids) == 0:
-        return [], []
-
-
-    # Send kill command
-    killed = subprocess.run(
-        ["bkill"] + job_ids, 
-        stdout=subprocess.PIPE, 
-        stderr=subprocess.PIPE,
-        encoding="ascii"
-    )
-
-
-    # Parse killed and not killed job ids
     success = []
     failure = []
-    for line in killed.stdout.splitlines():
-        match = re.findall(r"Job <(\d+)> is being terminated", line)
+    for line in output.splitlines():
+        match = re.findall(r"Job <(\d+(?:\[\d+\])?)> is being terminated", line)
         if match:
             success.append(match[0])
             continue
         
-        match = re.findall(r"Job <(\d+)>: No matching job found", line)
+        match = re.findall(r"Job <(\d+(?:\[\d+\])?)>: No matching job found", line)
         if match:
             failure.append(match[0])
             continue
 
-        match = re.findall(r"Job <(\d+)>: Job has already finished", line)
+        match = re.findall(r"Job <(\d+(?:\[\d+\])?)>: Job has already finished", line)
         if match:
             failure.append(match[0])
             continue
 
+        # Selection matched no jobs
+        if re.match(r"No (?:unfinished|matching) job found", line):
+            continue
+
 
         # No known message was seen. Warn user
         print(f"WARNING: Unknown kill job message: {line}\nPlease share this with a sprinkle developer")
 
 
-
     # Return jobs killed and not killed
     return success, failure
 
 
 
-def get_jobs_active() -> dict[str, JobDetails]:
-    """Get all active jobs
+def _run_kill(arguments: list[str]) -> tuple[list[str], list[str]]:
+    """Run bkill with arguments and parse its output
+    
+    Args:
+        arguments (list[str]): Arguments to bkill
     
     Returns:
-        dict[str, JobDetails]: Dictionary of active jobs, where key is job id
+        tuple[list[str], list[str]]: Tuple of (killed job ids, not killed job ids)
+    """
+    killed = subprocess.run(
+        ["bkill"] + arguments, 
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.STDOUT,
+        encoding="ascii",
+        errors="replace"
+    )
+
+    return _parse_kill_output(killed.stdout)
+
+
+
+def kill_jobs(job_ids: list[str], chunk_size: int = 200, workers: int = 4) -> tuple[list[str], list[str]]:
+    """Kill jobs by job id.
+    Job ids are split into chunks that are killed in parallel to stay below argument limits.
+    
+    Args:
+        job_ids (list[str]): List of job ids to kill
+        chunk_size (int, optional): Maximum job ids per bkill call. Defaults to 200.
+        workers (int, optional): Maximum concurrent bkill calls. Defaults to 4.
+    
+    Returns:
+        tuple[list[str], list[str]]: Tuple of (killed job ids, not killed job ids)
+    """
+    
+    # If no jobs to kill, return nothing
+    if len(job_ids) == 0:
+        return [], []
+
+
+    # Job list is about to change, so invalidate cached job status
+    invalidate_jobs_active_cache()
+
+    # Send kill commands in parallel
+    chunks = [job_ids[i:i+chunk_size] for i in range(0, len(job_ids), chunk_size)]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as executor:
+        results = list(executor.map(_run_kill, chunks))
+
+    # Job list changed, so invalidate job status cached meanwhile, e.g. by a concurrent status
+    invalidate_jobs_active_cache()
+
+
+    # Return jobs killed and not killed
+    return [job_id for success, _ in results for job_id in success], [job_id for _, failure in results for job_id in failure]
+
+
+
+# Job statuses that bkill can select by exactly, mapped to bkill's names
+# NOTE: Suspended statuses are not included, as bkill selects all of them with "susp"
+bkill_statuses = {"RUN": "run", "PEND": "pend"}
+
+
+def kill_jobs_matching(name: Optional[str] = None, queue: Optional[str] = None, status: Optional[str] = None) -> Optional[tuple[list[str], list[str]]]:
+    """Kill all jobs matching selectors with a single bkill call, letting LSF select the jobs
+    
+    Args:
+        name (Optional[str], optional): Job name pattern, only * wildcards supported. Defaults to None.
+        queue (Optional[str], optional): Queue of jobs. Defaults to None.
+        status (Optional[str], optional): Status of jobs, only RUN and PEND supported. Defaults to None.
+    
+    Returns:
+        Optional[tuple[list[str], list[str]]]: Tuple of (killed job ids, not killed job ids), 
+            or None if LSF cannot select by the selectors
+    """
+    # If selectors are not supported by bkill, signal fallback
+    if name is not None and re.search(r"[?\[\]]", name):
+        return None
+    if status is not None and status.upper() not in bkill_statuses:
+        return None
+
+
+    # Build selectors, 0 means all jobs matching selectors
+    arguments = []
+    if name is not None:
+        arguments += ["-J", name]
+    if queue is not None:
+        arguments += ["-q", queue]
+    if status is not None:
+        arguments += ["-stat", bkill_statuses[status.upper()]]
+    arguments.append("0")
+
+
+    # Job list is about to change, so invalidate cached job status
+    invalidate_jobs_active_cache()
+
+    # Kill jobs
+    results = _run_kill(arguments)
+
+    # Job list changed, so invalidate job status cached meanwhile, e.g. by a concurrent status
+    invalidate_jobs_active_cache()
+
+
+    # Return jobs killed and not killed
+    return results
+
+
+
+def _get_jobs_active_bjobs() -> Optional[dict[str, JobDetails]]:
+    """Get all active jobs with a single bjobs call
+    
+    Returns:
+        Optional[dict[str, JobDetails]]: Dictionary of active jobs, where key is job id, 
+            or None if bjobs is unavailable or its output could not be parsed
+    """
+    # Get all job details in one call
+    try:
+        status = subprocess.run(
+            ["bjobs", "-o", " ".join(bjobs_fields), "-json"], 
+            stdout=subprocess.PIPE, 
+            stderr=subprocess.PIPE,
+            encoding="ascii",
+            errors="replace"
+        )
+    except OSError:
+        return None
+
+    # If bjobs failed, signal fallback
+    if status.returncode != 0:
+        return None
+
+    # Parse output, if malformed, signal fallback
+    try:
+        records = json.loads(status.stdout)["RECORDS"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+    # Coalesce empty fields
+    def na(value: Optional[str]) -> Optional[str]:
+        return value.strip() if value and value.strip() not in ["", "-"] else None
+
+
+    # Store details
+    job_details = {}
+
+    # For each job record, parse job
+    for record in records:
+        # If record is an error message, skip it
+        if "ERROR" in record or "JOBID" not in record:
+            continue
+
+        # Identify array jobs by job id and index
+        job_id = record["JOBID"]
+        if record.get("JOBINDEX") not in [None, "", "0"]:
+            job_id = f"{job_id}[{record['JOBINDEX']}]"
+
+        # Instantiate job details object
+        job_details[job_id] = JobDetails(
+            name_short=record["JOB_NAME"],
+            job_id=job_id,
+            queue=record["QUEUE"],
+            status=record["STAT"],
+            cpu_usage=(na(record.get("CPU_EFFICIENCY")) or "").rstrip("%") or None,
+            mem_usage=_format_bjobs_memory(na(record.get("MEM"))),
+            mem_usage_avg=_format_bjobs_memory(na(record.get("AVG_MEM"))),
+            mem_usage_max=_format_bjobs_memory(na(record.get("MAX_MEM"))),
+            time_submit=na(record.get("SUBMIT_TIME")),
+            time_start=na(record.get("START_TIME")) or "-",
+            time_elapsed=_format_bjobs_duration(record.get("RUN_TIME"))
+        )
+
+
+    # Return details about all active jobs
+    return job_details
+
+
+
+def _format_bjobs_memory(value: Optional[str]) -> Optional[str]:
+    """Format bjobs memory (e.g. "1.2 Gbytes") as bstat does (e.g. "1.2G")
+
+    Args:
+        value (Optional[str]): Memory as reported by bjobs
+
+    Returns:
+        Optional[str]: Memory formatted like bstat, or None if no value
+    """
+    if value is None:
+        return None
+
+    match = re.fullmatch(r"([\d.]+)\s*([KMGTP]?)bytes", value)
+    return f"{match.group(1)}{match.group(2)}" if match else value
+
+
+
+def _format_bjobs_duration(value: Optional[str]) -> str:
+    """Format bjobs run time (e.g. "3723 second(s)") as bstat does (e.g. "1:02:03")
+
+    Args:
+        value (Optional[str]): Run time as reported by bjobs
+
+    Returns:
+        str: Run time formatted like bstat
+    """
+    match = re.match(r"\s*(\d+)", value or "")
+    if not match:
+        return "-"
+
+    seconds = int(match.group(1))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+
+def _get_jobs_active_bstat() -> Optional[dict[str, JobDetails]]:
+    """Get all active jobs by parsing bstat, bstat -C, and bstat -M
+    
+    Returns:
+        Optional[dict[str, JobDetails]]: Dictionary of active jobs, where key is job id, or None if bstat failed
     """
     
     # WARN: Race condition possible. Solving via ostrich algorithm.
@@ -225,6 +536,10 @@ def get_jobs_active() -> dict[str, JobDetails]:
     )
 
 
+    # If bstat failed, signal failure, as opposed to there being no jobs
+    if status_meta.returncode != 0 and not re.search(r"No (unfinished )?job", status_meta.stdout + status_meta.stderr):
+        return None
+
     # If there were no jobs, return nothing    
     if status_meta.stdout == '':
         return {}
@@ -232,8 +547,8 @@ def get_jobs_active() -> dict[str, JobDetails]:
 
     # Parse and return job details
     
-    # Store details
-    job_details = {}
+    # Store fields of job details, and construct each job details object once at the end
+    job_fields: dict[str, dict[str, Optional[str]]] = {}
 
     # For each line in meta status message, skip header, parse jobs
     for line in islice(status_meta.stdout.splitlines(), 1, None):
@@ -245,97 +560,221 @@ def get_jobs_active() -> dict[str, JobDetails]:
             meta = meta[0]
 
 
-        # Instantiate job details object
-        job_details[meta[0]] = JobDetails(
-            name_short=meta[3],
-            job_id=meta[0],
-            queue=meta[2],
-            status=meta[5],
-            cpu_usage=None,
-            mem_usage=None,
-            mem_usage_avg=None,
-            mem_usage_max=None,
-            time_start=meta[6].strip(),
-            time_elapsed=meta[7]
-        )
+        # Store job details fields
+        job_fields[meta[0]] = {
+            "name_short": meta[3],
+            "job_id": meta[0],
+            "queue": meta[2],
+            "status": meta[5],
+            "time_start": meta[6].strip(),
+            "time_elapsed": meta[7]
+        }
 
     # For each line in cpu status message, skip header, parse jobs
-    cpu_attr = nameof(JobDetails.cpu_usage)
     for line in islice(status_cpu.stdout.splitlines(), 1, None):
         # Parse cpu details
         cpu = re.findall(r"(\S+)\s+(?:\S+\s+){5}(\S+)", line)
-        if len(cpu) == 0:
+        if len(cpu) == 0 or cpu[0][0] not in job_fields:
             continue
         else:
             cpu = cpu[0]
         
         # Set cpu usage
-        job_details[cpu[0]] = replace(job_details[cpu[0]], **{cpu_attr: cpu[1]})
+        job_fields[cpu[0]]["cpu_usage"] = cpu[1]
 
     # For each line in memory status message, skip header, parse jobs
-    mem_attr = nameof(JobDetails.mem_usage)
-    mem_avg_attr = nameof(JobDetails.mem_usage_avg)
-    mem_max_attr = nameof(JobDetails.mem_usage_max)
     for line in islice(status_mem.stdout.splitlines(), 1, None):
         # Parse memory details
         mem = re.findall(r"(\S+)\s+(?:\S+\s+){4}(\S+)\s+(\S+)\s+(\S+)\s+\S+", line)
-        if len(mem) == 0:
+        if len(mem) == 0 or mem[0][0] not in job_fields:
             continue
         else:
             mem = mem[0]
         
         # Set memory usage
-        job_details[mem[0]] = replace(job_details[mem[0]], **{mem_attr: mem[1], mem_avg_attr: mem[3], mem_max_attr: mem[2]})
+        job_fields[mem[0]].update(mem_usage=mem[1], mem_usage_avg=mem[3], mem_usage_max=mem[2])
+
+
+    # Return details about all active jobs
+    return {job_id: JobDetails(**fields) for job_id, fields in job_fields.items()}
+
+
+
+def _load_jobs_active_cache(ttl: int) -> Optional[dict[str, JobDetails]]:
+    """Load cached active jobs if the cache is younger than the time-to-live
+
+    Args:
+        ttl (int): Maximum age of cache in seconds
+
+    Returns:
+        Optional[dict[str, JobDetails]]: Cached active jobs, or None if no valid cache
+    """
+    # Construct path to cache file
+    cache_file_path = f"{sprinkle_project_dir}/{sprinkle_project_status_cache_file}"
+
+    # Load cache, if missing or corrupt, return nothing
+    try:
+        with open(cache_file_path, "rb") as file:
+            time_cached, job_details = pickle.load(file)
+    except Exception:
+        return None
+
+
+    # Return cache if still fresh
+    return job_details if 0 <= time.time() - time_cached < ttl else None
+
+
+
+def _save_jobs_active_cache(job_details: dict[str, JobDetails]) -> None:
+    """Save active jobs to cache
+
+    Args:
+        job_details (dict[str, JobDetails]): Active jobs to cache
+    """
+    # If not in a project directory, do not create one just for the cache
+    if not os.path.isdir(sprinkle_project_dir):
+        return
+
+    # Construct path to cache file
+    cache_file_path = f"{sprinkle_project_dir}/{sprinkle_project_status_cache_file}"
+
+    # Write to temporary file and then swap, so concurrent readers never see partial caches
+    cache_file_path_tmp = f"{cache_file_path}.{os.getpid()}"
+    try:
+        with open(cache_file_path_tmp, "wb") as file:
+            pickle.dump((time.time(), job_details), file)
+        os.replace(cache_file_path_tmp, cache_file_path)
+    # Caching is best effort, so ignore failures
+    except OSError:
+        pass
+
+
 
+def invalidate_jobs_active_cache() -> None:
+    """Invalidate cached active jobs"""
+    try:
+        os.remove(f"{sprinkle_project_dir}/{sprinkle_project_status_cache_file}")
+    except OSError:
+        pass
+
+
+
+def query_jobs_active() -> Optional[dict[str, JobDetails]]:
+    """Get all active jobs from LSF without the cache, telling a failed query apart from there being no active jobs.
+    Uses a single bjobs call, and falls back to bstat if bjobs is unavailable.
+
+    Returns:
+        Optional[dict[str, JobDetails]]: Dictionary of active jobs, where key is job id, or None if bjobs and bstat failed
+    """
+    # Attempt retrieving all details in one call
+    job_details = _get_jobs_active_bjobs()
+
+    # If failed, fall back to multiple bstat calls
+    if job_details is None:
+        job_details = _get_jobs_active_bstat()
+
+
+    return job_details
+
+
+
+def get_jobs_active(ttl: int = JobSettings.status_cache_ttl, fresh: bool = False) -> dict[str, JobDetails]:
+    """Get all active jobs.
+    Uses a single bjobs call, and falls back to bstat if bjobs is unavailable.
+    Results are cached in the project directory for ttl seconds.
+    
+    Args:
+        ttl (int, optional): Seconds a cached result may be reused. Defaults to JobSettings.status_cache_ttl.
+        fresh (bool, optional): Whether to bypass the cache. Defaults to False.
+    
+    Returns:
+        dict[str, JobDetails]: Dictionary of active jobs, where key is job id
+    """
+    # If cache allowed and still fresh, return cached jobs
+    if not fresh and ttl > 0:
+        job_details = _load_jobs_active_cache(ttl)
+        if job_details is not None:
+            return job_details
+
+
+    # Query LSF, if failed, return nothing without caching it
+    job_details = query_jobs_active()
+    if job_details is None:
+        return {}
+
+
+    # Cache result for subsequent calls
+    _save_jobs_active_cache(job_details)
 
     # Return details about all active jobs
     return job_details
 
 
 
-def view_job(type: Literal["output", "log", "error"], job_id: str, all: bool) -> bool:
-    """View job output, log, or error
+def view_job(
+    type: Literal["output", "log", "error"], 
+    job_id: str, 
+    all: bool, 
+    lines: Optional[int] = None, 
+    head: Optional[int] = None, 
+    bytes: bool = False, 
+    since: Optional[float] = None
+) -> bool:
+    """View job output, log, or error.
+    Writes ranges or the full file directly to stdout when given a range or when stdout is not a terminal.
 
     Args:
         type (Literal["output", "log", "error"]): Type of file to view
         job_id (str): Job ID
         all (bool): View all output, log, or error
+        lines (Optional[int], optional): Number of last lines to write. Defaults to None.
+        head (Optional[int], optional): Number of first lines to write. Defaults to None.
+        bytes (bool, optional): Whether lines and head count bytes instead of lines. Defaults to False.
+        since (Optional[float], optional): Only write lines timestamped since this time in seconds since epoch. Defaults to None.
 
     Returns:
         bool: True if file exists and was successfully viewed, False otherwise
     """
-    # Get directory for file
-    match type:
-        case "output":
-            directory = sprinkle_project_output_dir
-        case "log":
-            directory = sprinkle_project_log_dir
-        case "error":
-            directory = sprinkle_project_error_dir
-    
-    # If directory does not exist, return failure
-    if not os.path.isdir(directory):
-        return False
+    # Look up associated file, which may have been compressed
+    job_files = get_job_files(job_id)
+    file = resolve_file(getattr(job_files, type) or "") if job_files else None
 
-
-    # Search for associated file
-    directory_contents = os.listdir(directory)
-    file = ""
-    for content in directory_contents:
-        if job_id in content:
-            file = content
-            break
-    
     # If file does not exist, return failure
-    if not os.path.isfile(f"{directory}/{file}"):
+    if file is None:
         return False
 
 
-    # Track bottom of file
     try:
-        subprocess.run((["less"] if all else ["tail", "-f"]) + [f"{directory}/{file}"])
-    except KeyboardInterrupt:
-        pass
+        # Write range, or full file if not viewed in a terminal (e.g. piped to grep)
+        if lines is not None or head is not None or since is not None or not sys.stdout.isatty():
+            try:
+                write_range(file, sys.stdout.buffer, lines, head, bytes, since)
+                sys.stdout.flush()
+            except BrokenPipeError:
+                # Reader closed pipe early (e.g. head), so silence the failing flush at exit
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        # View full file, streaming decompressed contents if compressed
+        elif all:
+            try:
+                if is_compressed(file):
+                    with open_file(file) as source:
+                        viewer = subprocess.Popen(["less"], stdin=subprocess.PIPE)
+                        try:
+                            shutil.copyfileobj(source, viewer.stdin)
+                            viewer.stdin.close()
+                        except BrokenPipeError:
+                            pass
+                        viewer.wait()
+                else:
+                    subprocess.run(["less", file])
+            except KeyboardInterrupt:
+                pass
+        # Track bottom of file
+        else:
+            follow_files([(file, "")])
+    except (OSError, EOFError) as error:
+        print(f"ERROR: Failed reading {file}: {error}")
+        return False
 
 
     # Return success
@@ -343,12 +782,14 @@ def view_job(type: Literal["output", "log", "error"], job_id: str, all: bool) ->
 
 
 
-def generate_bsub_script(settings: JobSettings, args: list[str] = []) -> str: 
+def generate_bsub_script(settings: JobSettings, args: list[str] = [], sweep: Optional[list[list[str]]] = None) -> str: 
     """Generates a bsub script for a job
 
     Args:
         settings (JobSettings): Settings for the job to be run
         args (list[str], optional): Arguments to pass to the job.
+        sweep (Optional[list[list[str]]], optional): Additional arguments of each job in a job array.
+            Each job selects its arguments via its array index. Defaults to None which generates a single job.
     
     Returns:
         str: Generated bsub script
@@ -361,11 +802,24 @@ def generate_bsub_script(settings: JobSettings, args: list[str] = []) -> str:
     env_name = settings.env_name or JobSettings.defaults.env_name()
     working_dir = settings.working_dir or JobSettings.defaults.working_dir()
 
+    # Array jobs are identified by job id and index
+    file_id_pattern = "%J_%I" if sweep else "%J"
+    file_id_variable = "${LSB_JOBID}_${LSB_JOBINDEX}" if sweep else "$LSB_JOBID"
+
+    command = f"""{settings.script} {" ".join(args)}{' "$@"' if sweep else ""}"""
+    output_file = f"{sprinkle_project_output_dir}/{file_id_variable}-{name}.txt"
+    output_flusher = f"python3 {shlex.quote(output_flusher_file)} --interval {output_flush_interval}{' --timestamps' if settings.output_timestamps else ''}"
+
+    # Paths to stage, relative to working directory and scratch directory respectively
+    stage_in = " ".join(shlex.quote(path) for path in split_paths(settings.stage_in))
+    stage_out = " ".join(shlex.quote(path) for path in split_paths(settings.stage_out))
+    stage_out_copy = f'    (cd "$SPRINKLE_SCRATCH" && stage_copy out {shlex.quote(working_dir)} {stage_out})\n' if stage_out else ""
+
 
     return (f"""\
 #!/bin/bash
-### Job name
-#BSUB -J {name}
+### Job name{" and array indices" if sweep else ""}
+#BSUB -J {name}{f"[1-{len(sweep)}]" if sweep else ""}
 
 
 ### Job queue
@@ -396,10 +850,10 @@ export OMP_NUM_THREADS=$LSB_DJOB_NUMPROC
 #BSUB -W {settings.time_max}
 
 
-### Output and error file. %J is the job-id -- 
+### Output and error file. %J is the job-id, %I is the array index -- 
 ### -o and -e mean append, -oo and -eo mean overwrite -- 
-#BSUB -oo {sprinkle_project_log_dir}/%J-{name}.txt
-#BSUB -eo {sprinkle_project_error_dir}/%J-{name}.txt
+#BSUB -oo {sprinkle_project_log_dir}/{file_id_pattern}-{name}.txt
+#BSUB -eo {sprinkle_project_error_dir}/{file_id_pattern}-{name}.txt
 """
 +
 conditional_string(settings.email, 
@@ -423,9 +877,57 @@ source ~/.bashrc
 cd {working_dir}
 
 
+"""
++
+conditional_string(not settings.env_packed,
+f"""\
 # Activate environment for script
-conda activate {env_name}
-
+conda activate {env_name}""")
++
+conditional_string(settings.env_packed,
+f"""\
+# Unpack packed environment to node-local disk, once per node as co-located jobs wait for and share it
+env_archive={shlex.quote(packed_environment_file(env_name))}
+env_cache="{packed_environment_cache_dir}"
+env_dir="$env_cache/{env_name}-$(stat -c %Y-%s "$env_archive" 2> /dev/null)"
+time_unpack_start=$SECONDS
+mkdir -p "$env_cache"
+
+# Mark unpacked environment as used until job exits, so other jobs do not remove it
+exec 6>> "$env_dir.use"
+flock -s 6
+
+(
+    flock 9
+    if [[ ! -f "$env_dir/.unpacked" ]]; then
+        rm -rf "$env_dir" && mkdir -p "$env_dir" &&
+        tar -xzf "$env_archive" -C "$env_dir" &&
+        "$env_dir/bin/conda-unpack" &&
+        touch "$env_dir/.unpacked"
+    fi
+
+    # Remove environments unpacked from previous archives, unless jobs are unpacking or using them
+    if [[ -f "$env_dir/.unpacked" ]]; then
+        for env_dir_stale in "$env_cache/{env_name}"-*/; do
+            env_dir_stale=${{env_dir_stale%/}}
+            [[ "$env_dir_stale" != "$env_dir" && "${{env_dir_stale#"$env_cache/{env_name}-"}}" =~ ^[0-9]+-[0-9]+$ ]] || continue
+            (
+                flock -n 7 && flock -n 8 &&
+                rm -rf "$env_dir_stale" && rm -f "$env_dir_stale.lock" "$env_dir_stale.use"
+            ) 7>> "$env_dir_stale.lock" 8>> "$env_dir_stale.use"
+        done
+    fi
+) 9> "$env_dir.lock"
+
+# Activate unpacked environment for script, or if unable, the shared environment
+if [[ -f "$env_dir/.unpacked" ]] && source "$env_dir/bin/activate"; then
+    echo "Activated packed environment ({env_name}) from $env_dir after $((SECONDS - time_unpack_start)) s"
+else
+    echo "Failed to unpack environment ({env_name}) for job ($LSB_JOBID), using shared environment." >&2
+    conda activate {env_name}
+fi""")
++
+f"""
 # If unable to activate environment, inform and exit
 if [[ $? -ne 0 ]]; then
     echo "Failed to activate environment ({env_name}) for job ($LSB_JOBID)." >&2
@@ -433,14 +935,104 @@ if [[ $? -ne 0 ]]; then
     exit 1
 fi
 
-
+"""
++
+conditional_string(stage_in or stage_out,
+f"""
+# Node-local scratch directory of job for staged files
+export SPRINKLE_SCRATCH="${{TMPDIR:-/tmp}}/sprinkle-{file_id_variable}"
+mkdir -p "$SPRINKLE_SCRATCH"
+
+# Print seconds since a time given in nanoseconds
+seconds_since() {{
+    local milliseconds=$(( ($(date +%s%N) - $1) / 1000000 ))
+    printf "%d.%03d" $((milliseconds / 1000)) $((milliseconds % 1000))
+}}
+
+# Copy paths, relative to current directory, into a directory in parallel and log durations
+stage_copy() {{
+    local direction=$1 destination=$2
+    shift 2
+
+    local time_start=$(date +%s%N)
+    local pids=() failed=0
+
+    for path in "$@"; do
+        (
+            time_path_start=$(date +%s%N)
+            cp -a --parents "$path" "$destination" || exit 1
+            echo "Staged $direction $path in $(seconds_since $time_path_start) s"
+        ) &
+        pids+=($!)
+    done
+
+    for pid in "${{pids[@]}}"; do
+        wait $pid || failed=1
+    done
+
+    echo "Staged $direction $# path(s) in $(seconds_since $time_start) s"
+    return $failed
+}}
+
+# When job exits, also upon failure, copy outputs back to working directory and remove scratch
+stage_exit() {{
+    local exit_code=$?
+    trap - EXIT
+{stage_out_copy}    rm -rf "$SPRINKLE_SCRATCH"
+    exit $exit_code
+}}
+trap stage_exit EXIT
+trap 'exit 130' INT
+trap 'exit 143' TERM
+""")
++
+conditional_string(stage_in,
+f"""
+# Stage inputs to scratch, exiting if unable
+if ! stage_copy in "$SPRINKLE_SCRATCH" {stage_in}; then
+    echo "Failed to stage inputs of job ($LSB_JOBID) to $SPRINKLE_SCRATCH." >&2
+    exit 1
+fi
+""")
++
+conditional_string(sweep,
+f"""
+# Arguments of each job in sweep, select arguments of this job by array index
+sweep_args=(
+{"".join(f"    {shlex.quote(shlex.join(sweep_args))}{chr(10)}" for sweep_args in sweep or [])})
+eval "set -- ${{sweep_args[$((LSB_JOBINDEX-1))]}}"
+""")
++
+conditional_string(settings.output_buffering != "line",
+f"""
 # Run job script and save output to file
 # NOTE: %J is not available so using environment variable
-{settings.script} {" ".join(args)} > {sprinkle_project_output_dir}/$LSB_JOBID-{name}.txt
+{command} > {output_file}
 
-"""
+""")
++
+conditional_string(settings.output_buffering == "line",
+f"""
+# Line buffer output of job script, also for non-Python commands if possible
+export PYTHONUNBUFFERED=1
+line_buffer=()
+if command -v stdbuf > /dev/null; then
+    line_buffer=(stdbuf -oL -eL)
+fi
+
+# Run job script and save output to file, flushing output at most every {output_flush_interval} second(s) if possible
+# NOTE: %J is not available so using environment variable
+set -o pipefail
+if command -v python3 > /dev/null; then
+    "${{line_buffer[@]}}" {command} | {output_flusher} > {output_file}
+else
+    "${{line_buffer[@]}}" {command} > {output_file}
+fi
+
+""")
 +
-conditional_string(settings.env_on_done_delete, 
+# NOTE: Not removing environment for sweeps or if shared, as other jobs may still use it
+conditional_string(settings.env_on_done_delete and not sweep and not settings.env_shared, 
 f"""
 ### Remove environment when done
 conda env remove -n {env_name} -y
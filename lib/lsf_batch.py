@@ -0,0 +1,200 @@
+from typing import Optional, Callable
+from dataclasses import dataclass, fields, replace
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import shlex
+import json
+import time
+import re
+
+from varname import nameof
+
+from lsf import JobSettings, JobSubmissionError, submit_job
+
+
+
+@dataclass(frozen=True)
+class SubmissionResult:
+    index: int
+    name: str
+    args: list[str]
+    job_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
+
+# Messages of bsub failures where the job was not accepted, but may be if retried
+submission_transient_errors = re.compile(
+    r"not responding|try again|please wait|temporarily|cannot connect|connection refused",
+    re.IGNORECASE
+)
+
+# Messages of bsub failures where mbatchd may have accepted the job without bsub receiving its id, so retrying could submit it twice
+submission_uncertain_errors = re.compile(
+    r"timed? ?out|connection reset|broken pipe|LSF library call|mbatchd",
+    re.IGNORECASE
+)
+
+
+
+class RateLimiter:
+    """Limits how often an action may start, shared across threads"""
+    __slots__ = ["interval", "time_next", "lock"]
+
+
+    def __init__(self, rate: float) -> None:
+        """
+        Args:
+            rate (float): Maximum actions per second, 0 or less means unlimited
+        """
+        self.interval = 1 / rate if rate > 0 else 0
+        self.time_next = time.monotonic()
+        self.lock = threading.Lock()
+
+
+    def wait(self) -> None:
+        """Block until the next action may start"""
+        # Reserve next slot
+        with self.lock:
+            time_now = time.monotonic()
+            time_slot = max(time_now, self.time_next)
+            self.time_next = time_slot + self.interval
+
+        # Wait for reserved slot
+        if time_slot > time_now:
+            time.sleep(time_slot - time_now)
+
+
+
+def load_manifest(path: str, settings: JobSettings) -> list[tuple[JobSettings, list[str]]]:
+    """Load a manifest of jobs to submit.
+    If JSON, a list of objects with "args" (list or string) and any job settings to override,
+        e.g. [{"args": ["--lr", "0.1"], "cpu_cores": 4, "queue": "gpua100"}].
+    Else, each non-empty line that is not a comment (#) contains the arguments of one job.
+
+    Args:
+        path (str): Path to manifest, parsed as JSON if it ends with .json
+        settings (JobSettings): Settings that jobs override
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the manifest is malformed or empty
+
+    Returns:
+        list[tuple[JobSettings, list[str]]]: Settings and arguments of each job
+    """
+    with open(path, "r") as file:
+        text = file.read()
+
+
+    # Plain text, one line of arguments per job
+    if not path.lower().endswith(".json"):
+        jobs = [
+            (settings, shlex.split(line))
+            for line in text.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+    # JSON, one object of arguments and setting overrides per job
+    else:
+        manifest = json.loads(text)
+        if not isinstance(manifest, list):
+            raise ValueError("Manifest JSON must be a list of objects")
+
+        settings_fields = {field.name for field in fields(JobSettings)} - {nameof(JobSettings.version)}
+        jobs = []
+
+        for element in manifest:
+            if not isinstance(element, dict):
+                raise ValueError(f"Manifest elements must be objects, got: {element}")
+
+            # Parse arguments
+            overrides = dict(element)
+            args = overrides.pop("args", [])
+            args = shlex.split(args) if isinstance(args, str) else [str(arg) for arg in args]
+
+            # Validate setting overrides
+            for key, value in overrides.items():
+                if key not in settings_fields:
+                    raise ValueError(f'Unknown setting "{key}". Choose from: {", ".join(sorted(settings_fields))}')
+                if type(value) is not type(getattr(settings, key)):
+                    raise ValueError(f'Setting "{key}" must be of type {type(getattr(settings, key)).__name__}, got: {value}')
+
+            # NOTE: GPU queues are prefixed with "gpu", see prompt_new_queue
+            if nameof(JobSettings.queue) in overrides and nameof(JobSettings.is_gpu_queue) not in overrides:
+                overrides[nameof(JobSettings.is_gpu_queue)] = overrides[nameof(JobSettings.queue)].startswith("gpu")
+
+            jobs.append((replace(settings, **overrides), args))
+
+
+    # If empty, manifest is invalid
+    if len(jobs) == 0:
+        raise ValueError("Manifest contains no jobs")
+
+
+    return jobs
+
+
+
+def submit_jobs(
+    jobs: list[tuple[JobSettings, list[str]]],
+    workers: int = 4,
+    rate: float = 5,
+    retries: int = 3,
+    on_result: Optional[Callable[[SubmissionResult], None]] = None
+) -> list[SubmissionResult]:
+    """Submit many jobs in parallel, limiting the submission rate and retrying transient failures
+
+    Args:
+        jobs (list[tuple[JobSettings, list[str]]]): Settings and arguments of each job
+        workers (int, optional): Maximum concurrent submissions. Defaults to 4.
+        rate (float, optional): Maximum submissions per second across workers, 0 means unlimited. Defaults to 5.
+        retries (int, optional): Maximum retries of each job on transient failures. Defaults to 3.
+        on_result (Optional[Callable[[SubmissionResult], None]], optional): Called as each job finishes submitting. Defaults to None.
+
+    Returns:
+        list[SubmissionResult]: Result of each job, in the order of jobs
+    """
+    limiter = RateLimiter(rate)
+
+
+    # Submit a job, retrying with exponential backoff on transient failures
+    def submit(index: int, settings: JobSettings, args: list[str]) -> SubmissionResult:
+        name = settings.name or JobSettings.defaults.name()
+        error = None
+
+        for attempt in range(1, retries + 2):
+            # Back off before retries
+            if attempt > 1:
+                time.sleep(2 ** (attempt - 2))
+
+            limiter.wait()
+
+            # Attempt submission
+            try:
+                result = SubmissionResult(index, name, args, job_id=submit_job(settings, args), attempts=attempt)
+                break
+            except JobSubmissionError as exception:
+                error = str(exception)
+                result = SubmissionResult(index, name, args, error=error, attempts=attempt)
+
+                # If job may have been accepted, inform and do not retry
+                if submission_uncertain_errors.search(error):
+                    result = replace(result, error=f"{error} (job may have been submitted, check with: sprinkle status)")
+                    break
+
+                # If failure is not transient, do not retry
+                if not submission_transient_errors.search(error):
+                    break
+
+        if on_result:
+            on_result(result)
+
+        return result
+
+
+    # Submit jobs in parallel
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(submit, index, settings, args) for index, (settings, args) in enumerate(jobs, start=1)]
+
+        return [future.result() for future in futures]
@@ -0,0 +1,124 @@
+from typing import Optional
+from dataclasses import dataclass
+from datetime import datetime
+import re
+
+from compress import open_text
+
+
+
+@dataclass(frozen=True)
+class JobAccounting:
+    status: str                           # "DONE" or "EXIT"
+    exit_code: int
+    time_cpu: Optional[float] = None      # Seconds
+    time_run: Optional[int] = None        # Seconds
+    mem_max: Optional[int] = None         # Bytes
+    mem_avg: Optional[int] = None         # Bytes
+    mem_requested: Optional[int] = None   # Bytes
+    time_start: Optional[float] = None    # Seconds since epoch
+    time_end: Optional[float] = None      # Seconds since epoch
+    cpu_cores: Optional[int] = None
+
+
+
+# Maximum bytes to read from the start of a log file.
+# NOTE: Job output is redirected to the output file,
+#  so the resource usage summary is near the start of the log file.
+log_read_max = 1024**2
+
+# Multipliers of memory units used in LSF log files
+log_memory_units = {"KB": 1024, "MB": 1024**2, "GB": 1024**3, "TB": 1024**4}
+
+
+
+def _parse_log_memory(value: Optional[str]) -> Optional[int]:
+    match = re.fullmatch(r"([\d.]+)\s*([KMGT]B)", value or "")
+    return int(float(match.group(1)) * log_memory_units[match.group(2)]) if match else None
+
+
+def _parse_log_time(value: Optional[str]) -> Optional[float]:
+    try:
+        return datetime.strptime(" ".join((value or "").split()), "%a %b %d %H:%M:%S %Y").timestamp()
+    except ValueError:
+        return None
+
+
+def _parse_log_number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+
+def parse_log(text: str) -> Optional[JobAccounting]:
+    """Parse the resource usage summary that LSF writes to a job's log file
+
+    Args:
+        text (str): Contents of log file
+
+    Returns:
+        Optional[JobAccounting]: Accounting of job, or None if job has not finished
+    """
+    # Find exit status, if missing, job has not finished
+    if re.search(r"^Successfully completed\.", text, re.MULTILINE):
+        status, exit_code = "DONE", 0
+    elif match := re.search(r"^Exited with exit code (\d+)\.", text, re.MULTILINE):
+        status, exit_code = "EXIT", int(match.group(1))
+    elif re.search(r"^Exited with signal termination", text, re.MULTILINE):
+        status, exit_code = "EXIT", -1
+    else:
+        return None
+
+
+    # Find field of resource usage summary
+    def field(name: str) -> Optional[str]:
+        match = re.search(rf"^\s*{name}\s*:\s*(.+?)\s*$", text, re.MULTILINE)
+        return match.group(1) if match else None
+
+    def number(name: str) -> Optional[float]:
+        return _parse_log_number((field(name) or "").removesuffix("sec.").strip())
+
+    def timestamp(name: str) -> Optional[float]:
+        match = re.search(rf"^{name} at (.+?)\s*$", text, re.MULTILINE)
+        return _parse_log_time(match.group(1)) if match else None
+
+
+    # Count cores of execution hosts, e.g. "<16*n-62-31-2>"
+    match = re.search(r"^Job was executed on host\(s\) (.+?), in queue", text, re.MULTILINE)
+    cpu_cores = sum(int(count or 1) for count in re.findall(r"<(?:(\d+)\*)?[^>]*>", match.group(1))) if match else None
+
+
+    # Return parsed accounting
+    time_run = number("Run time")
+
+    return JobAccounting(
+        status=status,
+        exit_code=exit_code,
+        time_cpu=number("CPU time"),
+        time_run=int(time_run) if time_run is not None else None,
+        mem_max=_parse_log_memory(field("Max Memory")),
+        mem_avg=_parse_log_memory(field("Average Memory")),
+        mem_requested=_parse_log_memory(field("Total Requested Memory")),
+        time_start=timestamp("Started"),
+        time_end=timestamp("Terminated"),
+        cpu_cores=cpu_cores
+    )
+
+
+
+def read_log(path: str) -> Optional[JobAccounting]:
+    """Read and parse the resource usage summary of a job's log file
+
+    Args:
+        path (str): Path to log file, which may have been compressed
+
+    Returns:
+        Optional[JobAccounting]: Accounting of job, or None if log file is missing or job has not finished
+    """
+    try:
+        with open_text(path) as file:
+            return parse_log(file.read(log_read_max))
+    except (OSError, EOFError):
+        return None
@@ -4,7 +4,7 @@ from dataclasses import replace
 import re
 
 from prompt import prompt_range_integer, prompt_path, prompt_string, prompt_regex, prompt_boolean, prompt_choice
-from lsf import JobSettings, JobDetails, get_jobs_active
+from lsf import JobSettings, JobDetails, get_jobs_active, split_paths
 
 
 # Track whether module initialized
@@ -54,10 +54,39 @@ job_settings_formatter: dict[str, tuple[str, Callable[[str], str]]] = lambda: {
         ("Environment name", empty_coalesce(JobSettings.defaults.env_name())),
     f"{nameof(JobSettings.env_on_done_delete)}": 
         ("Auto-delete environment", as_is_boolean),
+    f"{nameof(JobSettings.env_solver)}": 
+        ("Environment solver", empty_coalesce("Auto-detect")),
+    f"{nameof(JobSettings.env_installer)}": 
+        ("Environment pip installer", empty_coalesce("Auto-detect")),
+    f"{nameof(JobSettings.env_packed)}": 
+        ("Unpack environment to node-local disk", as_is_boolean),
+    f"{nameof(JobSettings.env_shared)}": 
+        ("Share environment across projects", as_is_boolean),
 
     f"{nameof(JobSettings.email)}": 
         ("Notification email", empty_coalesce("No notification")),
 
+    f"{nameof(JobSettings.status_cache_ttl)}": 
+        ("Job status cache time", surround(suffix=" s")),
+
+    f"{nameof(JobSettings.compress_finished)}": 
+        ("Auto-compress finished job files", as_is_boolean),
+    f"{nameof(JobSettings.compress_format)}": 
+        ("Compression format", as_is),
+
+    f"{nameof(JobSettings.output_buffering)}": 
+        ("Output buffering", as_is),
+    f"{nameof(JobSettings.output_timestamps)}": 
+        ("Output timestamps", as_is_boolean),
+
+    f"{nameof(JobSettings.stage_in)}": 
+        ("Stage to scratch before job", empty_coalesce("Nothing")),
+    f"{nameof(JobSettings.stage_out)}": 
+        ("Stage from scratch after job", empty_coalesce("Nothing")),
+
+    f"{nameof(JobSettings.progress_pattern)}": 
+        ("Progress pattern", empty_coalesce("x/y")),
+
     # Skipping: version
 }
 
@@ -97,6 +126,16 @@ def prompt_new_natural(attr: str, value_current: int, value_default: int) -> int
     )}
 
 
+def prompt_new_whole(attr: str, value_current: int, value_default: int) -> int:
+    name, formatter = job_settings_formatter[attr]
+
+    return {attr: prompt_range_integer(
+        f"{name}\nCurrent: {formatter(value_current)} (Default: {formatter(value_default)})\n\nChoose new value: ",
+        value_min=0, 
+        value_max=float("inf"),
+    )}
+
+
 def prompt_new_path(path_type: Literal["file", "directory"], allow_empty: bool = False) -> Callable[[str, str, str], str]:
     def prompt(attr: str, value_current: str, value_default: str) -> str:
         name, formatter = job_settings_formatter[attr]
@@ -165,6 +204,113 @@ def prompt_new_queue(attr: str, value_current: str, value_default: str) -> str:
             nameof(JobSettings.is_gpu_queue): queue_chosen in queue_gpu}
 
 
+def prompt_new_compression(attr: str, value_current: str, value_default: str) -> str:
+    name, formatter = job_settings_formatter[attr]
+
+    formats = ["gzip", "zstd"]
+
+    response = prompt_choice(
+        f"{name}\nCurrent: {formatter(value_current)} (Default: {formatter(value_default)})\n\nChoose new value: ",
+        [formats],
+    )
+
+
+    return {attr: formats[int(response)-1]}
+
+
+def prompt_new_backend(backends: list[str]) -> Callable[[str, str, str], str]:
+    def prompt(attr: str, value_current: str, value_default: str) -> str:
+        name, formatter = job_settings_formatter[attr]
+
+        choices = [formatter("")] + backends
+
+        response = prompt_choice(
+            f"{name}\nCurrent: {formatter(value_current)} (Default: {formatter(value_default)})\n\nChoose new value: ",
+            [choices],
+        )
+
+        # NOTE: Empty auto-detects
+        return {attr: "" if int(response) == 1 else choices[int(response)-1]}
+
+
+    return prompt
+
+
+def prompt_new_buffering(attr: str, value_current: str, value_default: str) -> str:
+    name, formatter = job_settings_formatter[attr]
+
+    buffering = ["block", "line"]
+
+    response = prompt_choice(
+        f"{name}\nBlock buffering writes output in large chunks, line buffering writes output shortly after each line.\n" + 
+        f"Current: {formatter(value_current)} (Default: {formatter(value_default)})\n\nChoose new value: ",
+        [buffering],
+    )
+    
+    buffering_chosen = buffering[int(response)-1]
+
+
+    # NOTE: Timestamps are added while flushing line buffered output
+    if buffering_chosen == "line":
+        return {attr: buffering_chosen}
+    else:
+        return {attr: buffering_chosen,
+                nameof(JobSettings.output_timestamps): False}
+
+
+def prompt_new_timestamps(attr: str, value_current: bool, value_default: bool) -> bool:
+    timestamps = prompt_new_boolean(attr, value_current, value_default)
+
+    # NOTE: Timestamps are added while flushing line buffered output
+    if timestamps[attr]:
+        timestamps[nameof(JobSettings.output_buffering)] = "line"
+
+    return timestamps
+
+
+def prompt_new_paths(attr: str, value_current: str, value_default: str) -> str:
+    name, formatter = job_settings_formatter[attr]
+
+    paths = prompt_string(
+        f"{name}\nPaths are separated by commas, and are relative to the working directory before the job " + 
+        "and to $SPRINKLE_SCRATCH after the job.\n" + 
+        f"Current: {formatter(value_current)} (Default: {formatter(value_default)})\n\nChoose new value: ",
+        value_suggestion=formatter(value_default)
+    )
+
+    # If default suggestion chosen, stage nothing
+    if paths == formatter(value_default):
+        paths = ""
+
+
+    return {attr: ", ".join(split_paths(paths))}
+
+
+def prompt_new_pattern(attr: str, value_current: str, value_default: str) -> str:
+    name, formatter = job_settings_formatter[attr]
+
+    while True:
+        pattern = prompt_string(
+            f"{name}\nRegular expression with groups for done and total (e.g. Epoch (\\d+)/(\\d+)), " + 
+            "or a single group for a percentage.\n" + 
+            f"Current: {formatter(value_current)} (Default: {formatter(value_default)})\n\nChoose new value: ",
+            value_suggestion=formatter(value_default)
+        )
+
+        # If default suggestion chosen, match x/y
+        if pattern == formatter(value_default):
+            return {attr: ""}
+
+        # If valid regular expression with groups, return it
+        try:
+            if re.compile(pattern).groups > 0:
+                return {attr: pattern}
+
+            print("Pattern must have at least one group\n")
+        except re.error as error:
+            print(f"Invalid regular expression: {error}\n")
+
+
 
 job_settings_prompter: dict[str, Callable[[str, str, str], Union[str, int]]] = lambda: {
     f"{nameof(JobSettings.script)}": prompt_new_script,
@@ -183,9 +329,26 @@ job_settings_prompter: dict[str, Callable[[str, str, str], Union[str, int]]] = l
     f"{nameof(JobSettings.name)}": prompt_new_string(allow_empty=True),
     f"{nameof(JobSettings.env_name)}": prompt_new_string(allow_empty=True),
     f"{nameof(JobSettings.env_on_done_delete)}": prompt_new_boolean,
+    f"{nameof(JobSettings.env_solver)}": prompt_new_backend(["conda", "mamba", "micromamba"]),
+    f"{nameof(JobSettings.env_installer)}": prompt_new_backend(["pip", "uv"]),
+    f"{nameof(JobSettings.env_packed)}": prompt_new_boolean,
+    f"{nameof(JobSettings.env_shared)}": prompt_new_boolean,
 
     f"{nameof(JobSettings.email)}": prompt_new_string(allow_empty=True),
 
+    f"{nameof(JobSettings.status_cache_ttl)}": prompt_new_whole,
+
+    f"{nameof(JobSettings.compress_finished)}": prompt_new_boolean,
+    f"{nameof(JobSettings.compress_format)}": prompt_new_compression,
+
+    f"{nameof(JobSettings.output_buffering)}": prompt_new_buffering,
+    f"{nameof(JobSettings.output_timestamps)}": prompt_new_timestamps,
+
+    f"{nameof(JobSettings.stage_in)}": prompt_new_paths,
+    f"{nameof(JobSettings.stage_out)}": prompt_new_paths,
+
+    f"{nameof(JobSettings.progress_pattern)}": prompt_new_pattern,
+
     # Skipping: version
 }
 
@@ -0,0 +1,370 @@
+from typing import Optional, Callable, Any
+from dataclasses import dataclass
+from datetime import datetime
+from fnmatch import fnmatchcase
+import operator
+import re
+
+from lsf import JobDetails
+
+
+
+@dataclass(frozen=True, slots=True)
+class JobRecord:
+    job_id: str
+    name: str
+    queue: str
+    status: str
+    time_submit: Optional[float]        # Seconds since epoch
+    time_start: Optional[float]         # Seconds since epoch
+    time_elapsed: Optional[int]         # Seconds
+    cpu_usage: Optional[float]          # Percent
+    mem_usage: Optional[int]            # Bytes
+    mem_usage_avg: Optional[int]        # Bytes
+    mem_usage_max: Optional[int]        # Bytes
+
+    details: JobDetails
+
+
+
+# Multipliers of memory units
+memory_units = {"": 1, "B": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4, "P": 1024**5}
+
+# Multipliers of duration units
+duration_units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+
+def parse_memory_bytes(value: Optional[str]) -> Optional[int]:
+    """Parse memory (e.g. "1.2G", "800 Mbytes", "512") into bytes
+
+    Args:
+        value (Optional[str]): Memory as reported by LSF or typed by user
+
+    Returns:
+        Optional[int]: Bytes, or None if not parsable
+    """
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGTP]?)(?:i?B|bytes)?\s*", value or "", re.IGNORECASE)
+    if not match:
+        return None
+
+    try:
+        return int(float(match.group(1)) * memory_units[match.group(2).upper()])
+    except ValueError:
+        return None
+
+
+
+def parse_cpu_percent(value: Optional[str]) -> Optional[float]:
+    """Parse CPU usage (e.g. "97.50", "97.5%") into a percentage
+
+    Args:
+        value (Optional[str]): CPU usage as reported by LSF or typed by user
+
+    Returns:
+        Optional[float]: Percentage, or None if not parsable
+    """
+    try:
+        return float((value or "").strip().rstrip("%"))
+    except ValueError:
+        return None
+
+
+
+def parse_duration_seconds(value: Optional[str]) -> Optional[int]:
+    """Parse a duration (e.g. "1:02:03", "02:03", "3723 second(s)", "2h", "1d12h") into seconds
+
+    Args:
+        value (Optional[str]): Duration as reported by LSF or typed by user
+
+    Returns:
+        Optional[int]: Seconds, or None if not parsable
+    """
+    value = (value or "").strip()
+
+    # Clock format, H:MM:SS or MM:SS
+    if re.fullmatch(r"\d+(?::\d+){1,2}", value):
+        seconds = 0
+        for component in value.split(":"):
+            seconds = seconds*60 + int(component)
+        return seconds
+
+    # LSF format, N second(s)
+    match = re.fullmatch(r"(\d+)\s*second\(s\)", value)
+    if match:
+        return int(match.group(1))
+
+    # Unit format, e.g. 1d12h or 90 (seconds)
+    if re.fullmatch(r"(?:\d+[smhdw])+", value):
+        return sum(int(amount) * duration_units[unit] for amount, unit in re.findall(r"(\d+)([smhdw])", value))
+    if value.isdigit():
+        return int(value)
+
+
+    # Unknown format
+    return None
+
+
+
+def parse_time_start(value: Optional[str]) -> Optional[float]:
+    """Parse start time as reported by LSF (e.g. "Oct 16 10:22") into seconds since epoch
+
+    Args:
+        value (Optional[str]): Start time as reported by LSF
+
+    Returns:
+        Optional[float]: Seconds since epoch, or None if not parsable
+    """
+    # Strip LSF annotations such as estimated (E) or local (L) times
+    value = re.sub(r"\s+[A-Z]$", "", (value or "").strip())
+
+    try:
+        time = datetime.strptime(f"{datetime.now().year} {value}", "%Y %b %d %H:%M")
+    except ValueError:
+        return None
+
+    # If time appears to be in the future, it is from last year
+    if time > datetime.now():
+        time = time.replace(year=time.year - 1)
+
+    return time.timestamp()
+
+
+
+def parse_time_point(value: Optional[str]) -> Optional[float]:
+    """Parse a point in time given as a date (e.g. "2024-01-31", "2024-01-31 12:00") 
+    or as a duration ago (e.g. "2h", "7d") into seconds since epoch
+
+    Args:
+        value (Optional[str]): Point in time typed by user
+
+    Returns:
+        Optional[float]: Seconds since epoch, or None if not parsable
+    """
+    value = (value or "").strip()
+
+    # Date format
+    for format in ["%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"]:
+        try:
+            return datetime.strptime(value, format).timestamp()
+        except ValueError:
+            pass
+
+    # Duration ago format
+    seconds = parse_duration_seconds(value)
+    return datetime.now().timestamp() - seconds if seconds is not None else None
+
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Parse a point in time either as reported by LSF or as typed by user, see parse_time_start and parse_time_point
+
+    Args:
+        value (Optional[str]): Point in time
+
+    Returns:
+        Optional[float]: Seconds since epoch, or None if not parsable
+    """
+    time = parse_time_start(value)
+    return time if time is not None else parse_time_point(value)
+
+
+
+def format_memory_bytes(value: Optional[int]) -> Optional[str]:
+    """Format bytes like LSF does (e.g. "1.2G")
+
+    Args:
+        value (Optional[int]): Bytes
+
+    Returns:
+        Optional[str]: Formatted memory, or None if no value
+    """
+    if value is None:
+        return None
+
+    for unit in ["P", "T", "G", "M", "K"]:
+        if value >= memory_units[unit]:
+            return f"{value / memory_units[unit]:.1f}{unit}"
+
+    return f"{value}B"
+
+
+
+def format_duration_seconds(value: Optional[float]) -> Optional[str]:
+    """Format seconds like LSF does (e.g. "1:02:03")
+
+    Args:
+        value (Optional[float]): Seconds
+
+    Returns:
+        Optional[str]: Formatted duration, or None if no value
+    """
+    if value is None:
+        return None
+
+    value = int(value)
+    return f"{value // 3600}:{value // 60 % 60:02}:{value % 60:02}"
+
+
+
+def to_job_record(job: JobDetails) -> JobRecord:
+    """Convert job details with LSF formatted strings into a numeric job record
+
+    Args:
+        job (JobDetails): Job details to convert
+
+    Returns:
+        JobRecord: Job record with parsed values
+    """
+    return JobRecord(
+        job_id=job.job_id,
+        name=job.name_short,
+        queue=job.queue,
+        status=job.status,
+        time_submit=parse_time_start(job.time_submit),
+        time_start=parse_time_start(job.time_start),
+        time_elapsed=parse_duration_seconds(job.time_elapsed),
+        cpu_usage=parse_cpu_percent(job.cpu_usage),
+        mem_usage=parse_memory_bytes(job.mem_usage),
+        mem_usage_avg=parse_memory_bytes(job.mem_usage_avg),
+        mem_usage_max=parse_memory_bytes(job.mem_usage_max),
+        details=job
+    )
+
+
+
+# Column names mapped to (record attribute, parser of user input)
+job_table_columns: dict[str, tuple[str, Callable[[str], Any]]] = {
+    "name":    ("name", str),
+    "id":      ("job_id", str),
+    "queue":   ("queue", str),
+    "status":  ("status", str),
+    "submitted": ("time_submit", parse_time),
+    "started": ("time_start", parse_time),
+    "elapsed": ("time_elapsed", parse_duration_seconds),
+    "cpu":     ("cpu_usage", parse_cpu_percent),
+    "mem":     ("mem_usage", parse_memory_bytes),
+    "avg":     ("mem_usage_avg", parse_memory_bytes),
+    "max":     ("mem_usage_max", parse_memory_bytes),
+}
+
+# Comparison operators of filter conditions
+job_table_operators: dict[str, Callable[[Any, Any], bool]] = {
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    "=":  operator.eq,
+    ">":  operator.gt,
+    "<":  operator.lt,
+}
+
+
+
+class JobTable:
+    """Numeric table of jobs that can be sorted and filtered"""
+    __slots__ = ["records"]
+
+
+    def __init__(self, records: list[JobRecord]) -> None:
+        self.records = records
+
+
+    @staticmethod
+    def from_jobs(jobs: dict[str, JobDetails]) -> "JobTable":
+        """Create table from job details
+
+        Args:
+            jobs (dict[str, JobDetails]): Job details, where key is job id
+
+        Returns:
+            JobTable: Table of parsed jobs
+        """
+        return JobTable([to_job_record(job) for job in jobs.values()])
+
+
+    def to_jobs(self) -> dict[str, JobDetails]:
+        """Get job details of table in table order
+
+        Returns:
+            dict[str, JobDetails]: Job details, where key is job id
+        """
+        return {record.job_id: record.details for record in self.records}
+
+
+    def sort(self, column: str, descending: bool = False) -> "JobTable":
+        """Sort table by a column. Missing values are always placed last.
+
+        Args:
+            column (str): Column name, see job_table_columns
+            descending (bool, optional): Whether to sort in descending order. Defaults to False.
+
+        Raises:
+            ValueError: If column is unknown
+
+        Returns:
+            JobTable: Sorted table
+        """
+        if column not in job_table_columns:
+            raise ValueError(f'Unknown column "{column}". Choose from: {", ".join(job_table_columns)}')
+
+        attr = job_table_columns[column][0]
+
+        # Sort present values, and append missing values
+        present = [record for record in self.records if getattr(record, attr) is not None]
+        missing = [record for record in self.records if getattr(record, attr) is None]
+        present.sort(key=lambda record: getattr(record, attr), reverse=descending)
+
+        return JobTable(present + missing)
+
+
+    def filter(self, conditions: list[str]) -> "JobTable":
+        """Filter table by conditions such as "status=RUN", "name=sweep-*", or "mem>2G".
+        Text columns support = and != with wildcards. Numeric columns also support <, <=, >, and >=.
+        Records with missing values never match.
+
+        Args:
+            conditions (list[str]): Conditions that must all hold
+
+        Raises:
+            ValueError: If a condition is malformed
+
+        Returns:
+            JobTable: Filtered table
+        """
+        records = self.records
+
+        for condition in conditions:
+            # Parse condition
+            match = re.fullmatch(r"\s*(\w+)\s*(!=|>=|<=|=|>|<)\s*(.*?)\s*", condition)
+            if not match or match.group(1) not in job_table_columns:
+                raise ValueError(f'Invalid filter "{condition}". Expected <column><operator><value> with column from: {", ".join(job_table_columns)}')
+
+            column, op, value = match.groups()
+            attr, parse = job_table_columns[column]
+
+
+            # Text columns compare with wildcards
+            if parse is str:
+                if op not in ["=", "!="]:
+                    raise ValueError(f'Invalid filter "{condition}". Column "{column}" only supports = and !=')
+
+                negate = op == "!="
+                records = [record for record in records if fnmatchcase(getattr(record, attr), value) != negate]
+            # Numeric columns compare by value
+            else:
+                value_parsed = parse(value)
+                if value_parsed is None:
+                    raise ValueError(f'Invalid filter "{condition}". Could not parse value "{value}" for column "{column}"')
+
+                compare = job_table_operators[op]
+                records = [
+                    record for record in records
+                    if getattr(record, attr) is not None and compare(getattr(record, attr), value_parsed)
+                ]
+
+
+        return JobTable(records)
+
+
+    def __len__(self) -> int:
+        return len(self.records)
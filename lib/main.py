@@ -23,14 +23,30 @@ try:
     if "start" in args:
         exit_code = Command.start(
             args["<args>"] if "<args>" in args else 
-                []
+                [],
+            "--right-size" in args,
+            args.get("--sweep"),
+            "--force" in args
+        )
+
+    elif "submit-many" in args:
+        exit_code = Command.submit_many(
+            args["<manifest>"],
+            args.get("--workers"),
+            args.get("--rate"),
+            args.get("--retries")
         )
 
     elif "stop" in args:
         exit_code = Command.stop(
             args["<job_id>"] if "<job_id>" in args else 
                 "all" if "-a" in args else 
-                []
+                [],
+            args.get("--name"),
+            args.get("--status"),
+            args.get("--queue"),
+            args.get("--older-than"),
+            "--fresh" in args
         )
 
     elif "view" in args:
@@ -41,24 +57,88 @@ try:
                 None,
             args["<job_id>"][0] if "<job_id>" in args else 
                 None,
-            "-a" in args
+            "-a" in args,
+            args.get("--lines"),
+            args.get("--head"),
+            "--bytes" in args,
+            args.get("--since"),
+            "--fresh" in args
+        )
+
+    elif "follow" in args:
+        exit_code = Command.follow(
+            args["<job_id>"] if "<job_id>" in args else 
+                "all" if "-a" in args else 
+                [],
+            [type for type in ["output", "log", "error"] if f"--{type}" in args],
+            "--fresh" in args
+        )
+
+    elif "grep" in args:
+        exit_code = Command.grep(
+            args["<regex>"],
+            args["<job_id>"] if "<job_id>" in args else 
+                [],
+            "--active" in args,
+            "--failed" in args,
+            args.get("--since"),
+            "-i" in args,
+            [type for type in ["output", "log", "error"] if f"--{type}" in args],
+            "--fresh" in args
         )
 
     elif "status" in args:
-        exit_code = Command.status()
+        exit_code = Command.status(
+            "--fresh" in args,
+            "-w" in args,
+            args["--sort"] if "--sort" in args else
+                None,
+            "--descending" in args,
+            args["--filter"] if "--filter" in args else
+                []
+        )
+
+    elif "history" in args:
+        exit_code = Command.history(
+            args.get("--name"),
+            args.get("--queue"),
+            args.get("--since"),
+            args.get("--until"),
+            args.get("--exit"),
+            "--failed" in args,
+            args.get("--limit")
+        )
+
+    elif "summary" in args:
+        exit_code = Command.summary(
+            args.get("--name"),
+            args.get("--limit")
+        )
+
+    elif "clean" in args:
+        exit_code = Command.clean(
+            "--compress" in args,
+            "--delete" in args,
+            args.get("--keep-last"),
+            args.get("--keep-newer"),
+            "--keep-failed" in args,
+            "--dry-run" in args,
+            "--fresh" in args
+        )
 
     elif "settings" in args:
         exit_code = Command.settings()
         
     elif "setup" in args:
-        exit_code = Command.setup("-d" in args)
+        exit_code = Command.setup("-d" in args, "--force" in args)
 
     elif "export" in args:
         exit_code = Command.export(
             args["<path>"] if "<path>" in args else 
                 [],
             args["<args>"] if "<args>" in args else 
-                []
+                [],
+            args.get("--sweep")
         )
 
     elif "update" in args:
@@ -0,0 +1,80 @@
+"""Copy stdin to stdout, flushing at most every interval, optionally prefixing lines with timestamps.
+
+Runs inside jobs with whichever Python the job environment provides,
+so it only uses the standard library and avoids recent language features.
+
+Usage: python3 output_flusher.py [--interval <seconds>] [--timestamps]
+"""
+import os
+import sys
+import time
+import select
+import signal
+
+
+
+# Bytes buffered before flushing regardless of interval
+flush_size_max = 1024**2
+
+
+
+def main():
+    interval = float(sys.argv[sys.argv.index("--interval") + 1]) if "--interval" in sys.argv else 1.0
+    timestamps = "--timestamps" in sys.argv
+
+    # Keep draining output until the job closes it, even when the job is being killed
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    source = sys.stdin.fileno()
+    output = sys.stdout.buffer
+
+    buffer = []
+    buffer_size = 0
+    line_start = True
+    time_flushed = time.monotonic()
+
+
+    while True:
+        # Wait for output, or until buffered output is due to be flushed
+        timeout = max(0.0, time_flushed + interval - time.monotonic()) if buffer else None
+        readable, _, _ = select.select([source], [], [], timeout)
+
+        if readable:
+            data = os.read(source, 65536)
+            if not data:
+                break
+
+            # Prefix lines with the time their first output arrived
+            if timestamps:
+                prefix = time.strftime("%Y-%m-%d %H:%M:%S ").encode()
+                lines = data.split(b"\n")
+                for index, line in enumerate(lines):
+                    if line and (index > 0 or line_start):
+                        lines[index] = prefix + line
+
+                line_start = data.endswith(b"\n")
+                data = b"\n".join(lines)
+
+            buffer.append(data)
+            buffer_size += len(data)
+
+
+        # Flush once interval has passed or buffer is large
+        if buffer and (time.monotonic() - time_flushed >= interval or buffer_size >= flush_size_max):
+            output.write(b"".join(buffer))
+            output.flush()
+
+            buffer = []
+            buffer_size = 0
+            time_flushed = time.monotonic()
+
+
+    # Flush remaining output
+    output.write(b"".join(buffer))
+    output.flush()
+
+
+
+if __name__ == "__main__":
+    main()
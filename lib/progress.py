@@ -0,0 +1,236 @@
+from typing import Optional
+from dataclasses import dataclass
+import sqlite3
+import time
+import os
+import re
+
+from constants import sprinkle_project_dir, sprinkle_project_progress_file
+from job_files import find_job_files
+
+
+
+@dataclass(frozen=True)
+class JobProgress:
+    done: float
+    total: float
+    time_remaining: Optional[float] = None  # Seconds
+
+
+
+progress_schema = """
+CREATE TABLE IF NOT EXISTS progress (
+    path        TEXT PRIMARY KEY,
+    inode       INTEGER NOT NULL,
+    offset      INTEGER NOT NULL,
+
+    done        REAL,
+    total       REAL,
+    time        REAL,
+    done_first  REAL,
+    time_first  REAL
+);
+"""
+
+# Progress such as "450/1000" printed by tqdm or "Epoch 3/10"
+progress_pattern_default = r"\b(\d+)/(\d+)\b"
+
+# Maximum new bytes to read of a file, as only the latest progress matters
+progress_read_max = 1024**2
+
+
+
+@dataclass(slots=True)
+class _ProgressCursor:
+    inode: int
+    offset: int = 0
+
+    done: Optional[float] = None
+    total: Optional[float] = None
+    time: Optional[float] = None        # Seconds since epoch progress was last seen
+    done_first: Optional[float] = None
+    time_first: Optional[float] = None  # Seconds since epoch progress started
+
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """Connect to the project's progress cursors, creating them if necessary
+
+    Returns:
+        Optional[sqlite3.Connection]: Connection, or None if not in a project directory
+    """
+    # If not in a project directory, do not create one just for the cursors
+    if not os.path.isdir(sprinkle_project_dir):
+        return None
+
+    connection = sqlite3.connect(sprinkle_project_progress_file, timeout=30)
+    connection.executescript(progress_schema)
+
+    return connection
+
+
+
+def _parse_progress(match: re.Match) -> Optional[tuple[float, float]]:
+    """Get done and total of a progress match, where a single group is a percentage
+
+    Args:
+        match (re.Match): Match of progress pattern
+
+    Returns:
+        Optional[tuple[float, float]]: Done and total, or None if not valid progress
+    """
+    try:
+        groups = [float(group) for group in match.groups() if group is not None]
+    except ValueError:
+        return None
+
+    if len(groups) == 0:
+        return None
+
+    done, total = groups[:2] if len(groups) >= 2 else (groups[0], 100.0)
+    return (done, total) if 0 < total and 0 <= done <= total else None
+
+
+
+def _advance_cursor(cursor: Optional[_ProgressCursor], path: str, regex: re.Pattern, time_start: float) -> _ProgressCursor:
+    """Read bytes appended to a file since the cursor and update progress from them.
+    A partial last line is read again next time, as progress bars redraw their line without ending it.
+
+    Args:
+        cursor (Optional[_ProgressCursor]): Cursor of file, or None if file has not been read
+        path (str): Path of file
+        regex (re.Pattern): Compiled progress pattern
+        time_start (float): Seconds since epoch the job started
+
+    Raises:
+        OSError: If the file cannot be read
+
+    Returns:
+        _ProgressCursor: Updated cursor
+    """
+    with open(path, "rb") as file:
+        stat = os.fstat(file.fileno())
+
+        # If file is new, replaced, or truncated, start over
+        if cursor is None or stat.st_ino != cursor.inode or stat.st_size < cursor.offset:
+            cursor = _ProgressCursor(stat.st_ino)
+
+        # If nothing new, nothing to do
+        if stat.st_size == cursor.offset:
+            return cursor
+
+
+        # Read new bytes, skipping all but the latest
+        file.seek(max(cursor.offset, stat.st_size - progress_read_max))
+        data = file.read(stat.st_size - file.tell())
+
+
+    # Continue from the last partial line next time, where progress bars end lines with carriage returns
+    end = max(data.rfind(b"\n"), data.rfind(b"\r")) + 1
+    cursor.offset = stat.st_size - len(data) + end
+
+
+    # Track progress, where progress going backwards or a changed total means progress restarted
+    for match in regex.finditer(data):
+        # Skip progress at the very end of a partial line, as it may still be being written
+        progress = _parse_progress(match) if match.end() < len(data) or end == len(data) else None
+        if progress is None:
+            continue
+
+        done, total = progress
+        if cursor.done is None:
+            cursor.done_first, cursor.time_first = 0.0, time_start
+        elif done < cursor.done or total != cursor.total:
+            cursor.done_first, cursor.time_first = 0.0, cursor.time
+
+        # NOTE: Progress was last written when the file was last modified
+        cursor.done, cursor.total, cursor.time = done, total, stat.st_mtime
+
+
+    return cursor
+
+
+
+def get_jobs_progress(jobs_elapsed: dict[str, int], pattern: Optional[str] = None) -> dict[str, JobProgress]:
+    """Get progress of running jobs from their output and error files.
+    Only bytes appended since the last call are read, as a cursor of each file is kept in the project.
+
+    Args:
+        jobs_elapsed (dict[str, int]): IDs of running jobs mapped to seconds they have been running
+        pattern (Optional[str], optional): Regular expression of progress with groups for done and total,
+            or a single group for a percentage. Defaults to None which matches "x/y".
+
+    Raises:
+        re.error: If pattern is not a valid regular expression
+
+    Returns:
+        dict[str, JobProgress]: IDs of jobs with known progress mapped to their progress
+    """
+    regex = re.compile((pattern or progress_pattern_default).encode())
+
+    # If nothing to track, return nothing
+    if len(jobs_elapsed) == 0:
+        return {}
+
+    connection = _connect()
+    if connection is None:
+        return {}
+
+
+    # Load cursors of files of jobs
+    # NOTE: Not rebuilding index for missing jobs, as jobs of other projects are active too and never found
+    files = {job.job_id: [path for path in (job.output, job.error) if path] for job in find_job_files(list(jobs_elapsed), rebuild=False)}
+    paths = [path for job_paths in files.values() for path in job_paths]
+
+    cursors = {
+        path: _ProgressCursor(*cursor)
+        for path, *cursor in connection.execute(
+            f"SELECT path, inode, offset, done, total, time, done_first, time_first FROM progress WHERE path IN ({', '.join(['?'] * len(paths))})",
+            paths
+        )
+    }
+
+
+    # Advance cursors, where progress is taken from whichever file of a job progressed last
+    time_now = time.time()
+    jobs_progress = {}
+
+    for job_id, job_paths in files.items():
+        if job_id not in jobs_elapsed:
+            continue
+
+        for path in job_paths:
+            try:
+                cursor = cursors[path] = _advance_cursor(cursors.get(path), path, regex, time_now - jobs_elapsed[job_id])
+            except OSError:
+                continue
+
+            if cursor.done is not None and (job_id not in jobs_progress or cursor.time > jobs_progress[job_id].time):
+                jobs_progress[job_id] = cursor
+
+
+    # Store cursors
+    with connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO progress (path, inode, offset, done, total, time, done_first, time_first) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (path, cursor.inode, cursor.offset, cursor.done, cursor.total, cursor.time, cursor.done_first, cursor.time_first)
+                for path, cursor in cursors.items()
+            ]
+        )
+    connection.close()
+
+
+    # Estimate remaining time from rate of progress since it started
+    def remaining(cursor: _ProgressCursor) -> Optional[float]:
+        if cursor.done <= cursor.done_first or cursor.time <= cursor.time_first:
+            return None
+
+        rate = (cursor.done - cursor.done_first) / (cursor.time - cursor.time_first)
+        return max(0.0, (cursor.total - cursor.done) / rate - (time_now - cursor.time))
+
+
+    return {
+        job_id: JobProgress(cursor.done, cursor.total, remaining(cursor))
+        for job_id, cursor in jobs_progress.items()
+    }
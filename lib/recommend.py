@@ -0,0 +1,161 @@
+from typing import Optional
+from dataclasses import dataclass, replace
+import math
+import re
+import sqlite3
+
+from varname import nameof
+
+from lsf import JobSettings
+from history import JobHistory, query_job_history, update_job_accounting
+
+
+
+@dataclass(frozen=True)
+class ResourceRecommendation:
+    cpu_cores: int
+    cpu_mem_gb: int
+    time_max: str
+
+    runs: int
+
+
+
+# Number of most recent finished runs to base recommendations on
+recommend_runs_max = 20
+# Number of finished runs required before recommending
+recommend_runs_min = 3
+
+# Relative headroom added on top of observed usage
+recommend_headroom_cpu = 1.25
+recommend_headroom_mem = 1.25
+recommend_headroom_time = 1.5
+
+# Granularity of recommended max time in minutes
+recommend_time_step = 15
+
+
+
+def _parse_time_max(time_max: str) -> int:
+    """Parse max time (HH:MM) into minutes"""
+    hours, minutes = time_max.split(":")
+    return int(hours)*60 + int(minutes)
+
+
+def _format_time_max(minutes: int) -> str:
+    """Format minutes as max time (HH:MM)"""
+    return f"{minutes // 60}:{minutes % 60:02}"
+
+
+def _escape_glob(pattern: str) -> str:
+    """Escape wildcards so a name only matches itself"""
+    return re.sub(r"([*?\[])", r"[\1]", pattern)
+
+
+
+def recommend_resources(settings: JobSettings, runs: list[JobHistory]) -> Optional[ResourceRecommendation]:
+    """Recommend CPU cores, memory per core, and max time based on usage of previous runs.
+    Only tightens requests, except memory which is raised if a run failed close to its memory limit.
+
+    Args:
+        settings (JobSettings): Current job settings
+        runs (list[JobHistory]): Previous runs of the job
+
+    Returns:
+        Optional[ResourceRecommendation]: Recommendation, or None if too few finished runs
+    """
+    # Only consider runs with resource usage
+    done = [
+        run for run in runs
+        if run.accounting and run.accounting.status == "DONE"
+           and run.accounting.time_run and run.accounting.time_cpu is not None and run.accounting.mem_max
+    ]
+    failed = [run for run in runs if run.accounting and run.accounting.status == "EXIT"]
+
+    # If too few successful runs, do not recommend
+    if len(done) < recommend_runs_min:
+        return None
+
+
+    # Cores, from average number of cores kept busy
+    cores_used = max(run.accounting.time_cpu / run.accounting.time_run for run in done)
+    cpu_cores = max(1, min(settings.cpu_cores, math.ceil(cores_used * recommend_headroom_cpu)))
+
+
+    # Memory per core, from peak memory
+    mem_used = max(run.accounting.mem_max for run in done)
+    mem_total_gb = mem_used * recommend_headroom_mem / 1024**3
+    cpu_mem_gb = max(1, min(settings.cpu_mem_gb * settings.cpu_cores // cpu_cores, math.ceil(mem_total_gb / cpu_cores)))
+
+    # If a run failed close to its memory limit, ensure more memory than it had
+    for run in failed:
+        if run.accounting.mem_max and run.accounting.mem_requested and run.accounting.mem_max >= 0.95 * run.accounting.mem_requested:
+            cpu_mem_gb = max(cpu_mem_gb, math.ceil(2 * run.accounting.mem_requested / 1024**3 / cpu_cores))
+
+
+    # Max time, from longest run
+    time_used = max(run.accounting.time_run for run in done) / 60
+    time_steps = math.ceil(time_used * recommend_headroom_time / recommend_time_step)
+    time_max = min(_parse_time_max(settings.time_max), max(1, time_steps) * recommend_time_step)
+
+
+    # Return recommendation
+    return ResourceRecommendation(
+        cpu_cores=cpu_cores,
+        cpu_mem_gb=cpu_mem_gb,
+        time_max=_format_time_max(time_max),
+        runs=len(done)
+    )
+
+
+
+def recommend_settings(settings: JobSettings, update: bool = True) -> tuple[JobSettings, Optional[str]]:
+    """Recommend settings based on the history of previous runs with the same job name
+
+    Args:
+        settings (JobSettings): Current job settings
+        update (bool, optional): Whether to first record accounting of finished jobs from their log files. Defaults to True.
+
+    Returns:
+        tuple[JobSettings, Optional[str]]: Settings with recommended resources,
+            and a description of the changes or None if no changes are recommended
+    """
+    # Get previous runs of job, if history is unavailable, e.g. locked or corrupt, recommend no change
+    try:
+        if update:
+            update_job_accounting()
+        runs = query_job_history(
+            name=_escape_glob(settings.name or JobSettings.defaults.name()),
+            limit=recommend_runs_max
+        )
+    except sqlite3.Error:
+        return settings, None
+
+    # Get recommendation, if none, return no change
+    recommendation = recommend_resources(settings, runs)
+    if recommendation is None:
+        return settings, None
+
+
+    # Describe changes
+    changes = []
+    if recommendation.cpu_cores != settings.cpu_cores:
+        changes.append(f"CPU cores {settings.cpu_cores} -> {recommendation.cpu_cores}")
+    if recommendation.cpu_mem_gb != settings.cpu_mem_gb:
+        changes.append(f"CPU memory {settings.cpu_mem_gb} GB -> {recommendation.cpu_mem_gb} GB")
+    if _parse_time_max(recommendation.time_max) != _parse_time_max(settings.time_max):
+        changes.append(f"Max time {settings.time_max} -> {recommendation.time_max}")
+
+    # If no changes, return no change
+    if len(changes) == 0:
+        return settings, None
+
+
+    # Return recommended settings and description
+    settings = replace(settings, **{
+        nameof(JobSettings.cpu_cores): recommendation.cpu_cores,
+        nameof(JobSettings.cpu_mem_gb): recommendation.cpu_mem_gb,
+        nameof(JobSettings.time_max): recommendation.time_max,
+    })
+
+    return settings, f"Based on {recommendation.runs} previous runs: {', '.join(changes)}"
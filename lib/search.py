@@ -0,0 +1,170 @@
+from typing import Optional
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+import os
+import re
+
+from compress import is_compressed, open_file
+
+
+
+@dataclass(frozen=True)
+class SearchMatch:
+    path: str
+    line_number: int
+    line: str
+
+
+
+# Maximum characters of a matching line to report
+search_line_max = 500
+
+# Bytes of compressed files decompressed at a time
+search_chunk_size = 16 * 1024**2
+
+
+
+def _search_buffer(regex: re.Pattern, data: bytes, line_number: int, max_matches: Optional[int]) -> tuple[list[tuple[int, str]], int]:
+    """Search a buffer of complete lines for lines matching a pattern
+
+    Args:
+        regex (re.Pattern): Compiled regular expression
+        data (bytes): Buffer of lines, such as a memory mapped file
+        line_number (int): Line number of first line in buffer
+        max_matches (Optional[int]): Maximum matching lines to report
+
+    Returns:
+        tuple[list[tuple[int, str]], int]: Line number and content of each matching line, 
+            and line number of the line following the buffer
+    """
+    matches = []
+    position = 0
+
+    while position < len(data) and (max_matches is None or len(matches) < max_matches):
+        match = regex.search(data, position)
+        if match is None:
+            break
+
+        # Find line of match, counting lines since previous match
+        line_start = data.rfind(b"\n", 0, match.start()) + 1
+        line_end = data.find(b"\n", match.start())
+        line_end = len(data) if line_end == -1 else line_end
+
+        line_number += data[position:line_start].count(b"\n")
+        matches.append((line_number, bytes(data[line_start:min(line_end, line_start + search_line_max)]).decode(errors="replace").rstrip("\r")))
+
+        # Continue from next line, so each line is reported once
+        position = line_end + 1
+        line_number += 1
+
+
+    # Count remaining lines
+    if position < len(data):
+        line_number += data[position:].count(b"\n")
+
+
+    return matches, line_number
+
+
+
+def _search_file(pattern: bytes, flags: int, path: str, max_matches: Optional[int]) -> list[tuple[int, str]]:
+    """Search a file for lines matching a pattern. 
+    Uncompressed files are memory mapped, while compressed files are decompressed as a stream in chunks.
+
+    Args:
+        pattern (bytes): Regular expression
+        flags (int): Regular expression flags
+        path (str): Path of file to search
+        max_matches (Optional[int]): Maximum matching lines to report
+
+    Returns:
+        list[tuple[int, str]]: Line number and content of each matching line
+    """
+    regex = re.compile(pattern, flags | re.MULTILINE)
+
+    try:
+        # Compressed, search chunks of complete lines
+        if is_compressed(path):
+            matches = []
+            line_number = 1
+            remainder = b""
+
+            with open_file(path) as file:
+                while max_matches is None or len(matches) < max_matches:
+                    chunk = file.read(search_chunk_size)
+                    data = remainder + chunk
+
+                    # Keep incomplete last line for next chunk, unless at end of file
+                    split = data.rfind(b"\n") + 1 if chunk else len(data)
+                    data, remainder = data[:split], data[split:]
+
+                    chunk_matches, line_number = _search_buffer(
+                        regex, data, line_number, 
+                        max_matches - len(matches) if max_matches is not None else None
+                    )
+                    matches += chunk_matches
+
+                    if not chunk:
+                        break
+
+            return matches
+
+
+        # Uncompressed, search memory mapped file
+        with open(path, "rb") as file:
+            # Empty files cannot be memory mapped, and contain nothing
+            if os.fstat(file.fileno()).st_size == 0:
+                return []
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _search_buffer(regex, data, 1, max_matches)[0]
+    except (OSError, EOFError):
+        return []
+
+
+
+def search_files(pattern: str, paths: list[str], ignore_case: bool = False, max_matches: Optional[int] = None, workers: Optional[int] = None) -> list[SearchMatch]:
+    """Search files for lines matching a regular expression, in parallel across processes
+
+    Args:
+        pattern (str): Regular expression
+        paths (list[str]): Paths of files to search
+        ignore_case (bool, optional): Whether to ignore case. Defaults to False.
+        max_matches (Optional[int], optional): Maximum matching lines to report per file. Defaults to None.
+        workers (Optional[int], optional): Maximum processes. Defaults to None which uses the number of CPUs.
+
+    Raises:
+        re.error: If pattern is not a valid regular expression
+
+    Returns:
+        list[SearchMatch]: Matching lines, in the order of paths and then lines
+    """
+    pattern_bytes = pattern.encode()
+    flags = re.IGNORECASE if ignore_case else 0
+
+    # Validate pattern before starting processes
+    re.compile(pattern_bytes, flags)
+
+    # If nothing to search, return nothing
+    if len(paths) == 0:
+        return []
+
+
+    # Search files in parallel
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _search_file,
+            [pattern_bytes]*len(paths),
+            [flags]*len(paths),
+            paths,
+            [max_matches]*len(paths),
+            chunksize=max(1, len(paths) // (workers * 4))
+        )
+
+        return [
+            SearchMatch(path, line_number, line)
+            for path, matches in zip(paths, results)
+            for line_number, line in matches
+        ]
@@ -0,0 +1,212 @@
+from typing import Optional
+from dataclasses import dataclass, fields
+from concurrent.futures import ProcessPoolExecutor
+import sqlite3
+import os
+
+from constants import sprinkle_project_dir, sprinkle_project_summary_file, sprinkle_project_log_dir
+from job_files import job_file_name_pattern
+from lsf_log import JobAccounting, read_log
+
+
+
+@dataclass(frozen=True)
+class JobSummary:
+    job_id: str
+    name: str
+    log_file: str
+    accounting: JobAccounting
+
+
+
+summary_schema = """
+CREATE TABLE IF NOT EXISTS log_summary (
+    log_file        TEXT PRIMARY KEY,
+    size            INTEGER NOT NULL,
+    mtime_ns        INTEGER NOT NULL,
+
+    status          TEXT,
+    exit_code       INTEGER,
+    time_cpu        REAL,
+    time_run        INTEGER,
+    mem_max         INTEGER,
+    mem_avg         INTEGER,
+    mem_requested   INTEGER,
+    time_start      REAL,
+    time_end        REAL,
+    cpu_cores       INTEGER
+);
+"""
+
+# Columns of accounting in the order of JobAccounting
+summary_accounting_columns = [field.name for field in fields(JobAccounting)]
+
+# Number of logs to parse before starting worker processes
+summary_parallel_min = 16
+
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """Connect to the project's log summary cache, creating it if necessary
+
+    Returns:
+        Optional[sqlite3.Connection]: Connection, or None if not in a project directory
+    """
+    # If not in a project directory, do not create one just for the cache
+    if not os.path.isdir(sprinkle_project_dir):
+        return None
+
+    connection = sqlite3.connect(sprinkle_project_summary_file, timeout=30)
+    connection.executescript(summary_schema)
+
+    return connection
+
+
+
+def _scan_logs() -> dict[str, tuple[int, int]]:
+    """Find log files of jobs
+
+    Returns:
+        dict[str, tuple[int, int]]: Paths of log files mapped to their size and modification time in nanoseconds
+    """
+    logs = {}
+
+    try:
+        with os.scandir(sprinkle_project_log_dir) as entries:
+            for entry in entries:
+                if job_file_name_pattern.fullmatch(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    logs[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        pass
+
+
+    return logs
+
+
+
+def _parse_logs(paths: list[str], workers: Optional[int] = None) -> list[Optional[JobAccounting]]:
+    """Parse log files, in parallel across processes if there are many
+
+    Args:
+        paths (list[str]): Paths of log files
+        workers (Optional[int], optional): Maximum processes. Defaults to None which uses the number of CPUs.
+
+    Returns:
+        list[Optional[JobAccounting]]: Accounting of each log file, or None if its job has not finished
+    """
+    # If few logs, parse them here, as starting processes costs more
+    if len(paths) < summary_parallel_min:
+        return [read_log(path) for path in paths]
+
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_log, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+
+
+def summarize_jobs(workers: Optional[int] = None) -> list[JobSummary]:
+    """Summarize resource usage of finished jobs from the footers of their log files.
+    Parsed logs are cached by size and modification time, so only new or changed logs are parsed.
+
+    Args:
+        workers (Optional[int], optional): Maximum processes parsing logs. Defaults to None which uses the number of CPUs.
+
+    Returns:
+        list[JobSummary]: Summaries of finished jobs, newest first
+    """
+    logs = _scan_logs()
+    connection = _connect()
+
+
+    # Load cached accounting of logs that have not changed since they were parsed
+    cached: dict[str, Optional[JobAccounting]] = {}
+
+    if connection is not None:
+        for log_file, size, mtime_ns, *accounting in connection.execute(
+            f"SELECT log_file, size, mtime_ns, {', '.join(summary_accounting_columns)} FROM log_summary"
+        ):
+            if logs.get(log_file) == (size, mtime_ns):
+                cached[log_file] = JobAccounting(*accounting) if accounting[0] is not None else None
+
+
+    # Parse new or changed logs
+    # NOTE: Unfinished jobs are cached too, as their logs change once they finish
+    stale = [log_file for log_file in logs if log_file not in cached]
+    parsed = dict(zip(stale, _parse_logs(stale, workers)))
+
+
+    # Update cache, forgetting logs that were removed or compressed
+    if connection is not None:
+        with connection:
+            connection.executemany(
+                f"INSERT OR REPLACE INTO log_summary (log_file, size, mtime_ns, {', '.join(summary_accounting_columns)}) " +
+                    f"VALUES ({', '.join(['?'] * (3 + len(summary_accounting_columns)))})",
+                [
+                    (log_file, *logs[log_file], *[getattr(accounting, column) if accounting else None for column in summary_accounting_columns])
+                    for log_file, accounting in parsed.items()
+                ]
+            )
+            connection.executemany(
+                "DELETE FROM log_summary WHERE log_file = ?",
+                [(log_file,) for log_file, in connection.execute("SELECT log_file FROM log_summary") if log_file not in logs]
+            )
+        connection.close()
+
+
+    # Summarize finished jobs
+    summaries = []
+    for log_file, accounting in {**cached, **parsed}.items():
+        if accounting is None:
+            continue
+
+        match = job_file_name_pattern.fullmatch(os.path.basename(log_file))
+        job_id = f"{match.group(1)}[{match.group(2)}]" if match.group(2) else match.group(1)
+        summaries.append(JobSummary(job_id, match.group(3), log_file, accounting))
+
+
+    # Return summaries, newest first
+    return sorted(
+        summaries,
+        key=lambda summary: (summary.accounting.time_end or 0, summary.log_file),
+        reverse=True
+    )
+
+
+
+def cpu_efficiency(accountings: list[JobAccounting]) -> Optional[float]:
+    """Compute CPU time used relative to CPU time reserved by cores during run time
+
+    Args:
+        accountings (list[JobAccounting]): Accounting of jobs
+
+    Returns:
+        Optional[float]: Efficiency between 0 and 1, or None if unknown
+    """
+    accountings = [
+        accounting for accounting in accountings
+        if accounting.time_cpu is not None and accounting.time_run and accounting.cpu_cores
+    ]
+    time_reserved = sum(accounting.time_run * accounting.cpu_cores for accounting in accountings)
+
+    return sum(accounting.time_cpu for accounting in accountings) / time_reserved if time_reserved > 0 else None
+
+
+
+def mem_efficiency(accountings: list[JobAccounting]) -> Optional[float]:
+    """Compute maximum memory used relative to memory requested, averaged over jobs
+
+    Args:
+        accountings (list[JobAccounting]): Accounting of jobs
+
+    Returns:
+        Optional[float]: Efficiency between 0 and 1, or None if unknown
+    """
+    ratios = [
+        accounting.mem_max / accounting.mem_requested
+        for accounting in accountings
+        if accounting.mem_max is not None and accounting.mem_requested
+    ]
+
+    return sum(ratios) / len(ratios) if ratios else None
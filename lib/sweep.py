@@ -0,0 +1,93 @@
+from typing import Any
+from itertools import product
+import json
+import shlex
+
+
+
+def _to_args(parameters: dict[str, Any]) -> list[str]:
+    """Convert parameters to arguments, e.g. {"--lr": 0.1, "--verbose": True} to ["--lr", "0.1", "--verbose"]
+
+    Args:
+        parameters (dict[str, Any]): Parameter names mapped to values.
+            True includes only the name, False and None exclude the parameter.
+
+    Returns:
+        list[str]: Arguments
+    """
+    args = []
+    for name, value in parameters.items():
+        if value is True:
+            args.append(name)
+        elif value is not False and value is not None:
+            args += [name, str(value)]
+
+    return args
+
+
+
+def parse_sweep(text: str, json_format: bool) -> list[list[str]]:
+    """Parse a sweep into a list of arguments for each job in the sweep
+
+    Args:
+        text (str): Contents of sweep file.
+            If JSON, either a grid of parameter names mapped to lists of values (e.g. {"--lr": [0.1, 0.01]}),
+            or a list where each element is a list of arguments or parameter names mapped to values.
+            Else, each non-empty line that is not a comment (#) contains the arguments of one job.
+        json_format (bool): Whether text is JSON
+
+    Raises:
+        ValueError: If the sweep is malformed or empty
+
+    Returns:
+        list[list[str]]: Arguments of each job in the sweep
+    """
+    # Plain text, one line of arguments per job
+    if not json_format:
+        sweep = [
+            shlex.split(line)
+            for line in text.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+    # JSON grid, cartesian product of parameter values
+    elif isinstance(grid := json.loads(text), dict):
+        values = [value if isinstance(value, list) else [value] for value in grid.values()]
+        sweep = [_to_args(dict(zip(grid.keys(), combination))) for combination in product(*values)]
+    # JSON list, one element of arguments per job
+    elif isinstance(grid, list):
+        sweep = []
+        for element in grid:
+            if isinstance(element, dict):
+                sweep.append(_to_args(element))
+            elif isinstance(element, list):
+                sweep.append([str(arg) for arg in element])
+            else:
+                raise ValueError(f"Sweep list elements must be lists or objects, got: {element}")
+    else:
+        raise ValueError("Sweep JSON must be an object or a list")
+
+
+    # If empty, sweep is invalid
+    if len(sweep) == 0:
+        raise ValueError("Sweep contains no jobs")
+
+
+    return sweep
+
+
+
+def load_sweep(path: str) -> list[list[str]]:
+    """Load a sweep file, see parse_sweep for the format
+
+    Args:
+        path (str): Path to sweep file, parsed as JSON if it ends with .json
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the sweep is malformed or empty
+
+    Returns:
+        list[list[str]]: Arguments of each job in the sweep
+    """
+    with open(path, "r") as file:
+        return parse_sweep(file.read(), path.lower().endswith(".json"))
@@ -0,0 +1,206 @@
+from typing import Optional, BinaryIO
+from collections import deque
+from datetime import datetime
+import shutil
+import re
+import os
+
+from compress import is_compressed, open_file
+from follow import tail_offset
+
+
+
+# Timestamp at the start of a line, e.g. "2024-01-31 12:00:00" or "[2024-01-31T12:00:00]"
+line_timestamp_pattern = re.compile(rb"\[?(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})")
+
+# Bytes copied at a time
+view_chunk_size = 1024**2
+
+# Bytes left to scan forwards once binary search for a timestamp has narrowed the range
+view_scan_size = 64 * 1024
+
+
+
+def parse_line_time(line: bytes) -> Optional[float]:
+    """Parse the timestamp at the start of a line
+
+    Args:
+        line (bytes): Line of file
+
+    Returns:
+        Optional[float]: Seconds since epoch, or None if line has no timestamp
+    """
+    match = line_timestamp_pattern.match(line)
+    if match is None:
+        return None
+
+    try:
+        return datetime.strptime(f"{match.group(1).decode()} {match.group(2).decode()}", "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        return None
+
+
+
+def _copy(source: BinaryIO, output: BinaryIO, limit: Optional[int] = None) -> None:
+    """Copy from the current position of source to output
+
+    Args:
+        source (BinaryIO): File to copy from
+        output (BinaryIO): File to copy to
+        limit (Optional[int], optional): Maximum bytes to copy. Defaults to None which copies everything.
+    """
+    if limit is None:
+        shutil.copyfileobj(source, output, view_chunk_size)
+        return
+
+    while limit > 0:
+        chunk = source.read(min(limit, view_chunk_size))
+        if not chunk:
+            break
+
+        output.write(chunk)
+        limit -= len(chunk)
+
+
+
+def _first_time_offset(file: BinaryIO, offset: int, time: float) -> Optional[int]:
+    """Scan forwards for the first line with a timestamp at or after time
+
+    Args:
+        file (BinaryIO): File opened in binary mode
+        offset (int): Offset to start from, where a partial line at the offset is skipped
+        time (float): Seconds since epoch
+
+    Returns:
+        Optional[int]: Offset of found line, or None if no line was found
+    """
+    file.seek(offset)
+    if offset > 0:
+        file.readline()
+
+    while True:
+        position = file.tell()
+        line = file.readline()
+        if not line:
+            return None
+
+        line_time = parse_line_time(line)
+        if line_time is not None and line_time >= time:
+            return position
+
+
+
+def _line_time_after(file: BinaryIO, offset: int) -> Optional[float]:
+    """Get the timestamp of the first timestamped line after an offset
+
+    Args:
+        file (BinaryIO): File opened in binary mode
+        offset (int): Offset to start from, where a partial line at the offset is skipped
+
+    Returns:
+        Optional[float]: Seconds since epoch, or None if no timestamped line within scan range
+    """
+    file.seek(offset)
+    if offset > 0:
+        file.readline()
+
+    while file.tell() < offset + view_scan_size:
+        line = file.readline()
+        if not line:
+            return None
+
+        line_time = parse_line_time(line)
+        if line_time is not None:
+            return line_time
+
+
+    return None
+
+
+
+def write_range(
+    path: str,
+    output: BinaryIO,
+    lines: Optional[int] = None,
+    head: Optional[int] = None,
+    bytes: bool = False,
+    since: Optional[float] = None
+) -> None:
+    """Write a range of a file without reading the rest of it.
+    Last lines are found by reading blocks backwards from the end,
+    and lines since a time by binary search over timestamps at the start of lines.
+    Compressed files cannot be read backwards, so they are streamed instead.
+
+    Args:
+        path (str): Path of file
+        output (BinaryIO): File to write range to
+        lines (Optional[int], optional): Number of last lines to write. Defaults to None.
+        head (Optional[int], optional): Number of first lines to write. Defaults to None.
+        bytes (bool, optional): Whether lines and head count bytes instead of lines. Defaults to False.
+        since (Optional[float], optional): Only write from the first line timestamped at or after this time,
+            in seconds since epoch. Defaults to None.
+            Lines without timestamps are considered part of the preceding timestamped line.
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    compressed = is_compressed(path)
+
+    with open_file(path) as file:
+        # First lines or bytes
+        if head is not None:
+            if bytes:
+                _copy(file, output, head)
+            else:
+                for _ in range(head):
+                    line = file.readline()
+                    if not line:
+                        break
+                    output.write(line)
+
+        # Last lines or bytes of compressed file, keeping only the last ones while streaming
+        elif lines is not None and compressed:
+            if bytes:
+                data = b""
+                while chunk := file.read(view_chunk_size):
+                    data = (data + chunk)[-lines:] if lines > 0 else b""
+                output.write(data)
+            else:
+                output.writelines(deque(file, maxlen=lines))
+
+        # Last lines or bytes of uncompressed file, reading backwards from the end
+        elif lines is not None:
+            size = file.seek(0, os.SEEK_END)
+            file.seek(max(0, size - lines) if bytes else tail_offset(file, lines))
+            _copy(file, output)
+
+        # Lines since time of compressed file, streaming until found
+        elif since is not None and compressed:
+            for line in file:
+                line_time = parse_line_time(line)
+                if line_time is not None and line_time >= since:
+                    output.write(line)
+                    break
+
+            _copy(file, output)
+
+        # Lines since time of uncompressed file, binary searching for the start
+        elif since is not None:
+            low, high = 0, file.seek(0, os.SEEK_END)
+            while high - low > view_scan_size:
+                middle = (low + high) // 2
+                middle_time = _line_time_after(file, middle)
+
+                if middle_time is None or middle_time >= since:
+                    high = middle
+                else:
+                    low = middle
+
+            offset = _first_time_offset(file, low, since)
+            if offset is not None:
+                file.seek(offset)
+                _copy(file, output)
+
+        # Everything
+        else:
+            _copy(file, output)
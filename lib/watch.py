@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Callable
+
+from lsf import JobDetails
+
+
+
+# Job statuses that are not expected to change soon
+job_status_steady = {"RUN", "PEND"}
+
+# ANSI escape sequences for terminal control
+ansi_clear_screen = "\x1b[2J"
+ansi_clear_line = "\x1b[2K"
+ansi_cursor_hide = "\x1b[?25l"
+ansi_cursor_show = "\x1b[?25h"
+ansi_highlight = "\x1b[1;33m"
+ansi_reset = "\x1b[0m"
+
+def ansi_cursor_to(row: int) -> str:
+    return f"\x1b[{row};1H"
+
+
+
+def watch_jobs(
+    get_jobs: Callable[[], dict[str, JobDetails]], 
+    tabulate_jobs: Callable[[dict[str, JobDetails]], str],
+    interval_min: float = 2, 
+    interval_max: float = 30
+) -> int:
+    """Continuously display active jobs until interrupted.
+    Polls quickly while jobs change or are in transitional states, and backs off while they are steady.
+    Only redraws rows that changed and highlights jobs that changed status.
+
+    Args:
+        get_jobs (Callable[[], dict[str, JobDetails]]): Retrieves current active jobs
+        tabulate_jobs (Callable[[dict[str, JobDetails]], str]): Formats jobs as a table 
+            with two header lines followed by one line per job in order
+        interval_min (float, optional): Seconds between polls while jobs change. Defaults to 2.
+        interval_max (float, optional): Maximum seconds between polls while jobs are steady. Defaults to 30.
+
+    Returns:
+        int: 0 meaning success. Always.
+    """
+    # Track previous jobs, drawn screen, and jobs finished since watching started
+    jobs_previous: dict[str, JobDetails] = None
+    jobs_finished: list[JobDetails] = []
+    screen: list[str] = []
+    interval = interval_min
+
+
+    # Prepare terminal
+    sys.stdout.write(ansi_cursor_hide + ansi_clear_screen)
+
+    try:
+        while True:
+            # Get active jobs
+            jobs = get_jobs()
+
+            # Find jobs that appeared, changed status, or finished since last poll
+            if jobs_previous is None:
+                jobs_changed = set()
+            else:
+                jobs_changed = {
+                    job_id
+                    for job_id, job in jobs.items()
+                    if job_id not in jobs_previous or jobs_previous[job_id].status != job.status
+                }
+                jobs_finished += [job for job_id, job in jobs_previous.items() if job_id not in jobs]
+
+            jobs_previous = jobs
+
+
+            # If jobs are changing or starting, poll quickly, else back off
+            if jobs_changed or any(job.status not in job_status_steady for job in jobs.values()):
+                interval = interval_min
+            else:
+                interval = min(interval * 2, interval_max)
+
+
+            # Draw header, job table, and finished jobs
+            lines = [f"Updated {datetime.now():%H:%M:%S}, next update in {interval:g}s (Ctrl+C to exit)", ""]
+
+            if len(jobs) == 0:
+                lines.append("No active jobs to show")
+            else:
+                table = tabulate_jobs(jobs).splitlines()
+                lines += table[:2]
+                lines += [
+                    f"{ansi_highlight}{line}{ansi_reset}" if job_id in jobs_changed else line
+                    for job_id, line in zip(jobs.keys(), table[2:])
+                ]
+
+            if jobs_finished:
+                lines += ["", f"No longer active: {', '.join(job.job_id for job in jobs_finished[-10:])}"]
+
+
+            # Only draw what fits in terminal
+            try:
+                lines = lines[:os.get_terminal_size().lines - 1]
+            except OSError:
+                pass
+
+            # Redraw only changed lines
+            output = []
+            for row, line in enumerate(lines):
+                if row >= len(screen) or screen[row] != line:
+                    output.append(f"{ansi_cursor_to(row+1)}{ansi_clear_line}{line}")
+
+            # Clear lines no longer in use
+            for row in range(len(lines), len(screen)):
+                output.append(f"{ansi_cursor_to(row+1)}{ansi_clear_line}")
+
+            sys.stdout.write("".join(output) + ansi_cursor_to(len(lines)+1))
+            sys.stdout.flush()
+            screen = lines
+
+
+            # Wait for next poll
+            time.sleep(interval)
+
+    # Stop watching on interrupt
+    except KeyboardInterrupt:
+        pass
+    # Restore terminal
+    finally:
+        sys.stdout.write(ansi_cursor_to(len(screen)+1) + ansi_cursor_show)
+        sys.stdout.flush()
+
+
+    return 0
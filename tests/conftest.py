@@ -0,0 +1,7 @@
+import os
+import sys
+
+
+
+# Modules of sprinkle import each other by name, as when run by bin/sprinkle
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib"))
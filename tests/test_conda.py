@@ -0,0 +1,131 @@
+from conda import (
+    EnvironmentBackend,
+    _python_requirement,
+    _requirement_lines,
+    _requirement_name,
+    _pip_update_commands,
+    _pip_requirements,
+    _without_pip_section,
+    shared_environment_fingerprint,
+)
+
+
+
+backend = EnvironmentBackend("conda", "pip")
+python = "/envs/project/bin/python"
+install = [python, "-m", "pip", "install"]
+uninstall = [python, "-m", "pip", "uninstall", "-y"]
+
+
+
+def test_python_requirement_ignores_whitespace_and_comments():
+    assert _python_requirement("dependencies:\n  - python=3.10\n") == "python=3.10"
+    assert _python_requirement("dependencies:\n  -   python >= 3.10 , <3.12  # pinned\n") == "python>=3.10,<3.12"
+    assert _python_requirement("dependencies:\n  - python\n") == "python"
+
+
+def test_python_requirement_ignores_other_packages():
+    assert _python_requirement("dependencies:\n  - python-dateutil=2.8\n  - pythonnet\n") is None
+
+
+
+def test_requirement_lines_drop_comments_and_blank_lines():
+    assert _requirement_lines("# comment\n\n  torch>=2.0  # inline\nnumpy\n") == ["torch>=2.0", "numpy"]
+    assert _requirement_lines(None) == []
+
+
+def test_requirement_name_normalizes_plain_requirements():
+    assert _requirement_name("Torch_Vision>=0.15") == "torch-vision"
+    assert _requirement_name("requests[socks] == 2.31") == "requests"
+    assert _requirement_name("numpy; python_version >= '3.10'") == "numpy"
+    assert _requirement_name("package @ https://example.com/package.whl") == "package"
+
+
+def test_requirement_name_rejects_options_urls_and_paths():
+    for line in ["-r other.txt", "--index-url https://example.com/simple", "-e .", "./local", "git+https://example.com/repo.git"]:
+        assert _requirement_name(line) is None
+
+
+
+def test_pip_update_installs_changed_version_without_uninstalling():
+    commands = _pip_update_commands(backend, python, "requirements.txt", "torch==2.0\nnumpy\n", "torch==2.1\nnumpy\n")
+    assert commands == [install + ["torch==2.1"]]
+
+
+def test_pip_update_uninstalls_removed_requirements():
+    commands = _pip_update_commands(backend, python, "requirements.txt", "torch\nNumPy\n", "torch\n")
+    assert commands == [uninstall + ["numpy"]]
+
+
+def test_pip_update_installs_all_requirements_if_options_changed():
+    commands = _pip_update_commands(backend, python, "requirements.txt", "torch\n", "-r extra.txt\ntorch\n")
+    assert commands == [install + ["-r", "requirements.txt"]]
+
+    commands = _pip_update_commands(backend, python, "requirements.txt", "--index-url https://a\ntorch\n", "torch\n")
+    assert commands == [install + ["-r", "requirements.txt"]]
+
+
+def test_pip_update_ignores_comments_and_whitespace():
+    assert _pip_update_commands(backend, python, "requirements.txt", "torch\nnumpy\n", "# models\n  torch  \n\nnumpy # arrays\n") == []
+
+
+
+environment_file = """name: project
+channels:
+  - conda-forge
+dependencies:
+  - python=3.11
+  - pip
+  - pip:
+      - -r requirements.txt
+      - rich  # output
+variables:
+  PYTHONUNBUFFERED: "1"
+"""
+
+
+def test_pip_requirements_of_environment_file():
+    assert _pip_requirements(environment_file) == ["-r requirements.txt", "rich"]
+    assert _pip_requirements("dependencies:\n- python\n- pip:\n  - rich\nvariables:\n  - not-pip\n") == ["rich"]
+
+
+def test_without_pip_section_keeps_everything_else():
+    assert _without_pip_section(environment_file) == (
+        "name: project\n"
+        "channels:\n"
+        "  - conda-forge\n"
+        "dependencies:\n"
+        "  - python=3.11\n"
+        "  - pip\n"
+        "variables:\n"
+        "  PYTHONUNBUFFERED: \"1\"\n"
+    )
+
+
+
+def write_specification(directory, env: str, req: str) -> tuple[str, str]:
+    """Writes an environment and requirements file to a directory, returning their paths"""
+    directory.mkdir(exist_ok=True)
+    (directory / "environment.yml").write_text(env)
+    (directory / "requirements.txt").write_text(req)
+
+    return str(directory / "environment.yml"), str(directory / "requirements.txt")
+
+
+def test_shared_environment_fingerprint_ignores_name_comments_and_order(tmp_path):
+    fingerprint = shared_environment_fingerprint(*write_specification(
+        tmp_path / "a", "name: a\ndependencies:\n  - python=3.11\n", "torch\nnumpy\n"
+    ))
+    fingerprint_same = shared_environment_fingerprint(*write_specification(
+        tmp_path / "b", "name: b  # other project\n\ndependencies:\n  - python=3.11   # pinned\n", "# arrays\nnumpy\ntorch\n"
+    ))
+    fingerprint_other = shared_environment_fingerprint(*write_specification(
+        tmp_path / "c", "name: c\ndependencies:\n  - python=3.12\n", "torch\nnumpy\n"
+    ))
+
+    assert fingerprint == fingerprint_same
+    assert fingerprint != fingerprint_other
+
+
+def test_shared_environment_fingerprint_of_missing_environment_file(tmp_path):
+    assert shared_environment_fingerprint(str(tmp_path / "environment.yml"), str(tmp_path / "requirements.txt")) is None